@@ -0,0 +1,67 @@
+# -*- mode: python ; coding: utf-8 -*-
+# 启动优化的打包配置（与 DesktopStickyNotes.spec 的单文件版本相比）:
+# - 目录模式（onedir）：启动时不需要先把整个 PyQt5 解压到临时目录
+# - 不使用 UPX：Qt 动态库每次加载都要解压，且 UPX 会破坏共享页
+# - 排除未使用的 Qt 模块和标准库模块，减少需要加载和扫描的文件
+# - 以 optimize=2 预编译字节码（去掉 assert 和文档字符串）
+#
+# 打包: pyinstaller DesktopStickyNotes-fast.spec
+# 输出: dist/DesktopStickyNotes-fast/DesktopStickyNotes-fast
+
+# 程序只用到 QtCore、QtGui、QtWidgets、QtNetwork
+QT_EXCLUDES = [
+    'PyQt5.QtBluetooth', 'PyQt5.QtDBus', 'PyQt5.QtDesigner', 'PyQt5.QtHelp',
+    'PyQt5.QtLocation', 'PyQt5.QtMultimedia', 'PyQt5.QtMultimediaWidgets',
+    'PyQt5.QtNfc', 'PyQt5.QtOpenGL', 'PyQt5.QtPositioning', 'PyQt5.QtPrintSupport',
+    'PyQt5.QtQml', 'PyQt5.QtQuick', 'PyQt5.QtQuickWidgets', 'PyQt5.QtRemoteObjects',
+    'PyQt5.QtSensors', 'PyQt5.QtSerialPort', 'PyQt5.QtSql', 'PyQt5.QtSvg',
+    'PyQt5.QtTest', 'PyQt5.QtTextToSpeech', 'PyQt5.QtWebChannel', 'PyQt5.QtWebEngine',
+    'PyQt5.QtWebEngineCore', 'PyQt5.QtWebEngineWidgets', 'PyQt5.QtWebSockets',
+    'PyQt5.QtXml', 'PyQt5.QtXmlPatterns', 'PyQt5.uic',
+]
+STDLIB_EXCLUDES = [
+    'tkinter', 'unittest', 'pydoc', 'doctest', 'lib2to3', 'xmlrpc', 'pdb',
+]
+
+a = Analysis(
+    ['main.py'],
+    pathex=[],
+    binaries=[],
+    datas=[],
+    hiddenimports=[],
+    hookspath=[],
+    hooksconfig={},
+    runtime_hooks=[],
+    excludes=QT_EXCLUDES + STDLIB_EXCLUDES,
+    noarchive=False,
+    optimize=2,
+)
+pyz = PYZ(a.pure)
+
+exe = EXE(
+    pyz,
+    a.scripts,
+    [],
+    exclude_binaries=True,
+    name='DesktopStickyNotes-fast',
+    debug=False,
+    bootloader_ignore_signals=False,
+    strip=False,
+    upx=False,
+    console=False,
+    disable_windowed_traceback=False,
+    argv_emulation=False,
+    target_arch=None,
+    codesign_identity=None,
+    entitlements_file=None,
+)
+
+coll = COLLECT(
+    exe,
+    a.binaries,
+    a.datas,
+    strip=False,
+    upx=False,
+    upx_exclude=[],
+    name='DesktopStickyNotes-fast',
+)
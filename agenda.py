@@ -0,0 +1,180 @@
+from bisect import bisect_left
+from datetime import datetime, timedelta
+from enum import Enum
+from typing import Dict, List, Optional, Tuple
+
+from clock import get_clock
+from note_manager import Note
+
+
+class AgendaBucket(Enum):
+    """日程分组枚举（按时间先后排列）"""
+    OVERDUE = "已过期"
+    TODAY = "今天"
+    TOMORROW = "明天"
+    THIS_WEEK = "本周"
+    LATER = "以后"
+
+
+# 分组的先后顺序，与排序后的笔记列表一一对应
+BUCKET_ORDER: List[AgendaBucket] = list(AgendaBucket)
+
+# 标题栏计数使用的简称
+BUCKET_SHORT_LABELS: Dict[AgendaBucket, str] = {
+    AgendaBucket.OVERDUE: "逾",
+    AgendaBucket.TODAY: "今",
+    AgendaBucket.TOMORROW: "明",
+    AgendaBucket.THIS_WEEK: "周",
+    AgendaBucket.LATER: "后",
+}
+
+
+class Agenda:
+    """按到期时间分组的日程
+
+    笔记按 (到期时间, ID) 有序保存，每个分组都是有序列表中的一段连续区间，
+    只需维护四个分界下标即可。插入/删除使用二分查找，跨越分组边界（笔记到期、
+    午夜、新的一周）时只重新计算分界下标，而不必逐个笔记比较时间。
+    """
+
+    def __init__(self, now: Optional[datetime] = None):
+        self._keys: List[Tuple[datetime, int]] = []
+        self._notes: Dict[int, Note] = {}
+        self._note_keys: Dict[int, Tuple[datetime, int]] = {}
+        self._cuts: List[int] = [0, 0, 0, 0]
+        self.now = now or get_clock().now()
+        self._bounds = self._compute_bounds(self.now)
+
+    @staticmethod
+    def _compute_bounds(now: datetime) -> List[datetime]:
+        """计算各分组的起始时间（今天、明天、本周剩余、以后）"""
+        today_start = now.replace(hour=0, minute=0, second=0, microsecond=0)
+        tomorrow_start = today_start + timedelta(days=1)
+        day_after_start = today_start + timedelta(days=2)
+        next_week_start = today_start + timedelta(days=7 - today_start.weekday())
+        return [now, tomorrow_start, day_after_start, max(day_after_start, next_week_start)]
+
+    def _recompute_cuts(self):
+        """根据当前边界重新计算分界下标"""
+        self._cuts = [bisect_left(self._keys, (bound,)) for bound in self._bounds]
+
+    def _bucket_at(self, index: int) -> AgendaBucket:
+        """获取有序列表中某个位置所属的分组"""
+        return self._bucket_for_cuts(index, self._cuts)
+
+    def _bucket_range(self, bucket: AgendaBucket) -> Tuple[int, int]:
+        """获取分组在有序列表中的区间"""
+        bucket_index = BUCKET_ORDER.index(bucket)
+        start = self._cuts[bucket_index - 1] if bucket_index > 0 else 0
+        end = self._cuts[bucket_index] if bucket_index < len(self._cuts) else len(self._keys)
+        return start, end
+
+    def rebuild(self, notes: List[Note], now: Optional[datetime] = None):
+        """用一组笔记重建日程"""
+        if now is not None:
+            self.now = now
+            self._bounds = self._compute_bounds(now)
+        self._notes = {note.id: note for note in notes}
+        self._note_keys = {note.id: (note.due_date, note.id) for note in notes}
+        self._keys = sorted(self._note_keys.values())
+        self._recompute_cuts()
+
+    def insert(self, note: Note) -> AgendaBucket:
+        """插入笔记，返回其所属分组"""
+        key = (note.due_date, note.id)
+        index = bisect_left(self._keys, key)
+        self._keys.insert(index, key)
+        self._notes[note.id] = note
+        self._note_keys[note.id] = key
+        for i, bound in enumerate(self._bounds):
+            if key < (bound,):
+                self._cuts[i] += 1
+        return self._bucket_at(index)
+
+    def remove(self, note_id: int) -> Optional[AgendaBucket]:
+        """移除笔记，返回其原来所属的分组"""
+        key = self._note_keys.pop(note_id, None)
+        if key is None:
+            return None
+        del self._notes[note_id]
+        index = bisect_left(self._keys, key)
+        bucket = self._bucket_at(index)
+        del self._keys[index]
+        for i, bound in enumerate(self._bounds):
+            if key < (bound,):
+                self._cuts[i] -= 1
+        return bucket
+
+    def advance(self, now: datetime) -> List[Tuple[Note, AgendaBucket, AgendaBucket]]:
+        """推进当前时间，返回发生分组变化的笔记 (笔记, 原分组, 新分组)
+
+        只有位于新旧分界下标之间的笔记会被重新归类。
+        """
+        old_cuts = self._cuts
+        self.now = now
+        self._bounds = self._compute_bounds(now)
+        self._recompute_cuts()
+
+        changed = set()
+        for old_cut, new_cut in zip(old_cuts, self._cuts):
+            changed.update(range(min(old_cut, new_cut), max(old_cut, new_cut)))
+
+        moved = []
+        for index in sorted(changed):
+            old_bucket = self._bucket_for_cuts(index, old_cuts)
+            new_bucket = self._bucket_at(index)
+            if old_bucket != new_bucket:
+                moved.append((self._notes[self._keys[index][1]], old_bucket, new_bucket))
+        return moved
+
+    @staticmethod
+    def _bucket_for_cuts(index: int, cuts: List[int]) -> AgendaBucket:
+        """按给定的分界下标获取分组"""
+        for bucket_index, cut in enumerate(cuts):
+            if index < cut:
+                return BUCKET_ORDER[bucket_index]
+        return AgendaBucket.LATER
+
+    def next_boundary(self) -> datetime:
+        """下一次需要重新归类的时间（下一条笔记到期或午夜，取较早者）"""
+        boundary = self._bounds[1]
+        first_pending = self._cuts[0]
+        if first_pending < len(self._keys):
+            boundary = min(boundary, self._keys[first_pending][0])
+        return boundary
+
+    def due_date_of(self, note_id: int) -> Optional[datetime]:
+        """获取笔记加入日程时的到期时间"""
+        key = self._note_keys.get(note_id)
+        return key[0] if key else None
+
+    def bucket_of(self, note_id: int) -> Optional[AgendaBucket]:
+        """获取笔记所属分组"""
+        key = self._note_keys.get(note_id)
+        if key is None:
+            return None
+        return self._bucket_at(bisect_left(self._keys, key))
+
+    def notes_in(self, bucket: AgendaBucket) -> List[Note]:
+        """获取分组内的笔记（按时间排序）"""
+        start, end = self._bucket_range(bucket)
+        return [self._notes[note_id] for _, note_id in self._keys[start:end]]
+
+    def count(self, bucket: AgendaBucket) -> int:
+        """获取分组内的笔记数量"""
+        start, end = self._bucket_range(bucket)
+        return end - start
+
+    def counts(self) -> Dict[AgendaBucket, int]:
+        """获取所有分组的笔记数量"""
+        return {bucket: self.count(bucket) for bucket in BUCKET_ORDER}
+
+    def note_ids(self) -> List[int]:
+        """获取日程中所有笔记的ID"""
+        return list(self._note_keys)
+
+    def __contains__(self, note_id: int) -> bool:
+        return note_id in self._note_keys
+
+    def __len__(self) -> int:
+        return len(self._keys)
@@ -0,0 +1,366 @@
+"""笔记备份（增量、按内容去重）
+
+备份目录结构（位于数据目录下）:
+    backups/objects/ab/cdef....json    每条笔记记录一个对象，文件名为内容的 SHA-256
+    backups/generations/<代>.json      每一代的清单：按顺序列出各条笔记的对象哈希
+
+没有变化的笔记在所有代之间只保存一份。每次备份只序列化上次备份之后
+变化过的笔记（来自笔记管理器的变化记录），哈希计算和文件写入在后台线程
+完成。超过保留代数的旧清单被删除，不再被任何清单引用的对象随之删除。
+
+长内容（见 blobs.py）不在备份中重复保存，备份的笔记记录只引用其哈希；
+清理长内容时保留所有备份仍在引用的内容。
+
+也可以在程序未运行时从命令行使用:
+    python backup.py list
+    python backup.py restore 20240115-093000-r42
+    python backup.py gc
+"""
+import os
+import sys
+import json
+import argparse
+import queue
+import hashlib
+import logging
+import threading
+from collections import Counter
+from datetime import datetime, timedelta
+from typing import Any, Dict, Generator, List, Optional, Set
+
+from config import config
+from clock import get_clock
+from blobs import blob_store, write_atomic
+from note_manager import Note, NoteManager, note_manager
+
+log = logging.getLogger(__name__)
+
+
+class BackupManager:
+    """备份管理器"""
+
+    OBJECTS_PER_STEP = 200  # 分步清理时每一步读取或删除的对象数
+
+    def __init__(self, manager: NoteManager):
+        self.manager = manager
+        self._last_revision: Optional[int] = None  # 上次备份时的存储版本号
+        self._last_time: Optional[datetime] = None
+        self._lock = threading.Lock()  # 保护备份目录（后台写入/轮换 与 恢复）
+        self._jobs: 'queue.Queue' = queue.Queue()
+        self._worker: Optional[threading.Thread] = None
+
+        # 以下只在后台线程中使用
+        self._hashes: Dict[int, str] = {}  # 笔记ID -> 最近一次备份的对象哈希
+        self._refcounts: Optional[Counter] = None  # 对象哈希 -> 引用它的清单数
+
+    @property
+    def backup_dir(self) -> str:
+        return os.path.join(config.DATA_DIR, config.BACKUP_DIR_NAME)
+
+    @property
+    def generations_dir(self) -> str:
+        return os.path.join(self.backup_dir, "generations")
+
+    def _object_path(self, digest: str) -> str:
+        return os.path.join(self.backup_dir, "objects", digest[:2], digest[2:] + ".json")
+
+    def backup_if_due(self, force: bool = False) -> bool:
+        """到了备份间隔且数据有变化时提交一次备份，返回是否提交
+
+        在主线程调用：这里只读取变化过的笔记，其余工作交给后台线程。
+        """
+        now = get_clock().now()
+        if self.manager.revision == self._last_revision:
+            return False
+        if (not force and self._last_time is not None
+                and now - self._last_time < timedelta(minutes=config.BACKUP_INTERVAL)):
+            return False
+
+        # 在读锁内读取，笔记列表和变化记录属于同一个版本
+        with self.manager.reading():
+            changes = None
+            if self._last_revision is not None:
+                changes = self.manager.changes_since(self._last_revision)
+            if changes is None:
+                # 首次备份或落后太多：全部笔记都需要处理（已有对象不会重复写入）
+                dirty_ids = [note.id for note in self.manager.notes]
+            else:
+                dirty_ids = dict.fromkeys(note_id for event in changes for note_id in event.note_ids)
+
+            records = {}
+            for note_id in dirty_ids:
+                note = self.manager.get_note(note_id)
+                records[note_id] = note.to_dict() if note is not None else None
+            order = [note.id for note in self.manager.notes]
+
+            self._last_revision = self.manager.revision
+        self._last_time = now
+        self._jobs.put((self._last_revision, now, order, records, changes is None))
+        self._ensure_worker()
+        return True
+
+    def _ensure_worker(self):
+        if self._worker is None or not self._worker.is_alive():
+            self._worker = threading.Thread(target=self._run, name="backup", daemon=True)
+            self._worker.start()
+
+    def wait(self):
+        """等待已提交的备份全部完成（例如退出前）"""
+        self._jobs.join()
+
+    def _run(self):
+        """后台线程：依次处理备份任务"""
+        while True:
+            job = self._jobs.get()
+            try:
+                with self._lock:
+                    self._write_generation(*job)
+            except Exception:
+                log.exception("备份失败")
+                # 后台记录的哈希可能不完整，下次重新处理全部笔记
+                self._last_revision = None
+            finally:
+                self._jobs.task_done()
+
+    def _store_object(self, record: Dict[str, Any]) -> str:
+        """保存笔记记录对象（已存在则跳过），返回哈希"""
+        text = json.dumps(record, ensure_ascii=False, sort_keys=True, separators=(',', ':'))
+        digest = hashlib.sha256(text.encode('utf-8')).hexdigest()
+        path = self._object_path(digest)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            write_atomic(path, text)
+        return digest
+
+    def _write_generation(self, revision: int, created_at: datetime, order: List[int],
+                          records: Dict[int, Optional[Dict[str, Any]]], full: bool):
+        """写入一代备份并轮换旧备份"""
+        if self._refcounts is None:
+            self._load_refcounts()
+        if full:
+            self._hashes = {}
+        for note_id, record in records.items():
+            if record is None:
+                self._hashes.pop(note_id, None)
+            else:
+                self._hashes[note_id] = self._store_object(record)
+
+        hashes = [self._hashes[note_id] for note_id in order]
+        name = f"{created_at:%Y%m%d-%H%M%S}-r{revision}"
+        manifest = {'created_at': created_at.isoformat(), 'revision': revision, 'notes': hashes}
+        os.makedirs(self.generations_dir, exist_ok=True)
+        write_atomic(os.path.join(self.generations_dir, name + ".json"), json.dumps(manifest))
+        self._refcounts.update(set(hashes))
+
+        self._rotate()
+
+    def _load_refcounts(self):
+        """统计现有清单对各对象的引用"""
+        self._refcounts = Counter()
+        for name in self.list_generations():
+            self._refcounts.update(set(self._read_manifest(name)['notes']))
+
+    def _rotate(self):
+        """删除超过保留代数的旧清单，以及不再被引用的对象"""
+        generations = self.list_generations()
+        for name in generations[:max(0, len(generations) - config.BACKUP_GENERATIONS)]:
+            hashes = set(self._read_manifest(name)['notes'])
+            os.remove(os.path.join(self.generations_dir, name + ".json"))
+            self._refcounts.subtract(hashes)
+            for digest in hashes:
+                if self._refcounts[digest] <= 0:
+                    del self._refcounts[digest]
+                    try:
+                        os.remove(self._object_path(digest))
+                    except OSError:
+                        pass
+
+    def _read_manifest(self, name: str) -> Dict[str, Any]:
+        with open(os.path.join(self.generations_dir, name + ".json"), 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    def list_generations(self) -> List[str]:
+        """列出所有备份代（从旧到新）"""
+        if not os.path.isdir(self.generations_dir):
+            return []
+        return sorted(name[:-5] for name in os.listdir(self.generations_dir)
+                      if name.endswith(".json"))
+
+    def collect_blobs(self) -> int:
+        """删除当前笔记和各代备份都不再引用的长内容，返回删除的数量"""
+        steps = self.collect_blobs_steps()
+        while True:
+            try:
+                next(steps)
+            except StopIteration as done:
+                return done.value
+
+    def collect_blobs_steps(self) -> Generator[None, None, int]:
+        """分步执行 collect_blobs：每列出一个长内容子目录、读取一个清单、读取
+        或删除一批对象让出一次（供空闲整理分片执行）
+
+        让出时不持有锁，后台备份不需要等待。
+        """
+        unused: Set[str] = set()
+        for prefix in blob_store.prefixes():
+            yield
+            unused.update(blob_store.list_prefix(prefix))
+        yield
+        _, notes = self.manager.snapshot()
+        unused -= {note.content_hash for note in notes}
+        checked: Set[str] = set()  # 已读取过的对象
+        seen: Set[str] = set()  # 已检查过的代
+        while unused:
+            generations = [name for name in self.list_generations() if name not in seen]
+            if not generations:
+                break
+            for name in generations:
+                yield
+                seen.add(name)
+                with self._lock:
+                    try:
+                        digests = list(set(self._read_manifest(name)['notes']) - checked)
+                    except FileNotFoundError:
+                        continue  # 两步之间被轮换删除
+                for index in range(0, len(digests), self.OBJECTS_PER_STEP):
+                    if index:
+                        yield
+                    with self._lock:
+                        for digest in digests[index:index + self.OBJECTS_PER_STEP]:
+                            try:
+                                with open(self._object_path(digest), 'r', encoding='utf-8') as f:
+                                    unused.discard(json.load(f).get('content_hash'))
+                            except FileNotFoundError:
+                                pass
+                checked.update(digests)
+        removed = 0
+        unused_list = sorted(unused)
+        for index in range(0, len(unused_list), self.OBJECTS_PER_STEP):
+            yield
+            # 分步进行期间可能有新的笔记引用了这些内容
+            _, notes = self.manager.snapshot()
+            chunk = set(unused_list[index:index + self.OBJECTS_PER_STEP])
+            removed += blob_store.remove(chunk - {note.content_hash for note in notes})
+        return removed
+
+    def vacuum_steps(self) -> Generator[None, None, int]:
+        """分步删除没有被任何一代引用的对象和写入中断留下的临时文件，返回删除的数量
+
+        轮换时已经删除了不再引用的对象，这些文件只在备份过程中程序退出时留下。
+        每读取一个清单、每检查一批对象让出一次（供空闲整理分片执行）。
+        """
+        removed = 0
+        objects_dir = os.path.join(self.backup_dir, "objects")
+        folders = sorted(os.listdir(objects_dir)) if os.path.isdir(objects_dir) else []
+        read: Set[str] = set()  # 已读取的清单
+        # 已读取的清单引用的对象；期间被轮换删除的清单的引用仍然保留，
+        # 只会少删除（这些对象在轮换时已经删除）
+        referenced: Set[str] = set()
+        for prefix in folders:
+            yield
+            folder = os.path.join(objects_dir, prefix)
+            try:
+                file_names = os.listdir(folder)
+            except OSError:
+                continue
+            for index in range(0, len(file_names), self.OBJECTS_PER_STEP):
+                chunk = file_names[index:index + self.OBJECTS_PER_STEP]
+                while True:
+                    # 后台线程先写对象后写清单：确认所有清单都已读取和删除对象在
+                    # 同一次持有锁期间进行，避免删除刚写入的对象
+                    with self._lock:
+                        unread = [name for name in self.list_generations() if name not in read]
+                        if not unread:
+                            removed += self._remove_unreferenced(folder, prefix, chunk,
+                                                                 referenced)
+                            break
+                        read.add(unread[0])
+                        try:
+                            referenced.update(self._read_manifest(unread[0])['notes'])
+                        except FileNotFoundError:
+                            pass
+                    yield
+                yield
+
+        yield
+        if os.path.isdir(self.generations_dir):
+            with self._lock:
+                for file_name in os.listdir(self.generations_dir):
+                    if file_name.endswith(".tmp"):
+                        try:
+                            os.remove(os.path.join(self.generations_dir, file_name))
+                            removed += 1
+                        except OSError:
+                            pass
+        return removed
+
+    def _remove_unreferenced(self, folder: str, prefix: str, file_names: List[str],
+                             referenced: Set[str]) -> int:
+        """删除一批没有被引用的对象文件（需持有锁），返回删除的数量"""
+        removed = 0
+        for file_name in file_names:
+            if file_name.endswith(".json") and prefix + file_name[:-5] in referenced:
+                continue
+            try:
+                os.remove(os.path.join(folder, file_name))
+                removed += 1
+            except OSError:
+                pass
+        return removed
+
+    def restore(self, name: str) -> int:
+        """恢复到指定的备份代，返回恢复的笔记数量
+
+        恢复前先备份当前数据，恢复操作本身也可以撤销。恢复的数据经笔记管理器
+        保存，排队中的旧的保存不会覆盖恢复的文件。
+        """
+        # 先读出要恢复的数据：备份当前数据时的轮换可能删除这一代
+        with self._lock:
+            manifest = self._read_manifest(name)
+            records = []
+            for digest in manifest['notes']:
+                with open(self._object_path(digest), 'r', encoding='utf-8') as f:
+                    records.append(json.load(f))
+
+        # 等待排队中的保存，备份的当前数据包括最后的修改
+        self.manager.wait_saved()
+        self.backup_if_due(force=True)
+        self.wait()
+        self.manager.replace_notes([Note.from_dict(record) for record in records])
+        return len(records)
+
+
+# 全局备份管理器实例
+backup_manager = BackupManager(note_manager)
+
+
+def parse_args(argv=None):
+    """解析命令行参数"""
+    parser = argparse.ArgumentParser(description="桌面便签备份（程序运行时请使用托盘菜单恢复）")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    subparsers.add_parser("list", help="列出所有备份（从旧到新）")
+    restore_parser = subparsers.add_parser("restore", help="恢复到指定的备份")
+    restore_parser.add_argument("name", help="备份名，例如 20240115-093000-r42")
+    subparsers.add_parser("gc", help="删除当前便签和备份都不再使用的长内容")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    """命令行：列出或恢复备份（程序运行时请使用托盘菜单恢复）"""
+    args = parse_args(argv)
+    if args.command == "list":
+        for name in backup_manager.list_generations():
+            print(name)
+    elif args.command == "restore":
+        if args.name not in backup_manager.list_generations():
+            print(f"备份不存在: {args.name}", file=sys.stderr)
+            return 1
+        count = backup_manager.restore(args.name)
+        print(f"已恢复 {count} 条便签")
+    elif args.command == "gc":
+        print(f"已删除 {backup_manager.collect_blobs()} 个不再使用的长内容")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
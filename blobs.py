@@ -0,0 +1,120 @@
+"""长内容存储（按内容去重）
+
+超过 BLOB_THRESHOLD 个字符的笔记内容不直接写入 notes.json，而是保存在
+数据目录下的 blobs/ab/cdef....txt 中（文件名为内容的 SHA-256），笔记里只
+保留哈希和开头的预览。内容相同的笔记（例如重复便签生成的下一次）只保存
+一份。最近读取的内容缓存在内存中（多个线程同时读取时由锁保护）。
+"""
+import os
+import hashlib
+import itertools
+import threading
+from collections import OrderedDict
+from typing import Iterable, List, Set
+
+from config import config
+
+
+def write_atomic(path: str, text: str):
+    """先写临时文件再替换，避免写到一半时留下损坏的文件"""
+    temp_path = path + ".tmp"
+    with open(temp_path, 'w', encoding='utf-8') as f:
+        f.write(text)
+    os.replace(temp_path, path)
+
+
+def create_unique(directory: str, name: str, suffix: str):
+    """新建 directory 下的 name+suffix（已存在时加序号 name-2 ...），返回打开的文件
+
+    文件名中的时间只精确到秒，同一秒内生成的多个文件不会互相覆盖。
+    """
+    os.makedirs(directory, exist_ok=True)
+    for index in itertools.count(1):
+        stem = name if index == 1 else f"{name}-{index}"
+        try:
+            return open(os.path.join(directory, stem + suffix), 'x', encoding='utf-8')
+        except FileExistsError:
+            continue
+
+
+class BlobStore:
+    """长内容存储"""
+
+    def __init__(self):
+        self._cache: 'OrderedDict[str, str]' = OrderedDict()
+        self._cache_lock = threading.Lock()
+
+    @property
+    def directory(self) -> str:
+        return os.path.join(config.DATA_DIR, config.BLOB_DIR_NAME)
+
+    def _path(self, digest: str) -> str:
+        return os.path.join(self.directory, digest[:2], digest[2:] + ".txt")
+
+    def put(self, text: str) -> str:
+        """保存内容（已存在则跳过），返回哈希"""
+        digest = hashlib.sha256(text.encode('utf-8')).hexdigest()
+        path = self._path(digest)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            write_atomic(path, text)
+        self._remember(digest, text)
+        return digest
+
+    def get(self, digest: str) -> str:
+        """读取内容"""
+        with self._cache_lock:
+            text = self._cache.get(digest)
+            if text is not None:
+                self._cache.move_to_end(digest)
+                return text
+        with open(self._path(digest), 'r', encoding='utf-8') as f:
+            text = f.read()
+        self._remember(digest, text)
+        return text
+
+    def _remember(self, digest: str, text: str):
+        with self._cache_lock:
+            self._cache[digest] = text
+            self._cache.move_to_end(digest)
+            if len(self._cache) > config.BLOB_CACHE_SIZE:
+                self._cache.popitem(last=False)
+
+    def list(self) -> Set[str]:
+        """列出所有已保存内容的哈希"""
+        digests = set()
+        for prefix in self.prefixes():
+            digests.update(self.list_prefix(prefix))
+        return digests
+
+    def prefixes(self) -> List[str]:
+        """内容子目录（哈希的前两位）"""
+        if not os.path.isdir(self.directory):
+            return []
+        return sorted(prefix for prefix in os.listdir(self.directory)
+                      if os.path.isdir(os.path.join(self.directory, prefix)))
+
+    def list_prefix(self, prefix: str) -> Set[str]:
+        """列出一个子目录中内容的哈希（分步列出全部内容时使用）"""
+        try:
+            names = os.listdir(os.path.join(self.directory, prefix))
+        except OSError:
+            return set()
+        return {prefix + name[:-4] for name in names if name.endswith(".txt")}
+
+    def remove(self, digests: Iterable[str]) -> int:
+        """删除内容，返回删除的数量"""
+        count = 0
+        for digest in digests:
+            with self._cache_lock:
+                self._cache.pop(digest, None)
+            try:
+                os.remove(self._path(digest))
+                count += 1
+            except OSError:
+                pass
+        return count
+
+
+# 全局长内容存储实例
+blob_store = BlobStore()
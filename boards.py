@@ -0,0 +1,95 @@
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+
+from config import config
+from clock import get_clock
+from note_manager import ChangeEvent, ChangeKind, Note, NoteManager, note_manager
+
+
+@dataclass
+class Board:
+    """便签板：共享存储上的一个筛选视图
+
+    tag 为 None 时显示所有便签板的笔记，否则只显示属于该便签板的笔记；
+    days 限制到期时间在今后若干天内（包括已过期）；text 筛选内容。
+    在便签板中新建的笔记归属于 tag 指定的便签板。
+    """
+    name: str
+    tag: Optional[str] = None
+    days: Optional[int] = None
+    text: Optional[str] = None
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'Board':
+        """从配置创建便签板"""
+        return cls(name=data['name'], tag=data.get('tag'),
+                   days=data.get('days'), text=data.get('text'))
+
+    def matches(self, note: Note, now: Optional[datetime] = None) -> bool:
+        """笔记是否属于该便签板（不考虑完成状态）"""
+        if self.tag is not None and note.board != self.tag:
+            return False
+        if self.days is not None:
+            now = now or get_clock().now()
+            today_start = now.replace(hour=0, minute=0, second=0, microsecond=0)
+            if note.due_date >= today_start + timedelta(days=self.days):
+                return False
+        if self.text and self.text.lower() not in note.content.lower():
+            return False
+        return True
+
+
+def load_boards() -> List[Board]:
+    """读取配置中的便签板，未配置时只有一个显示全部笔记的便签板"""
+    boards = [Board.from_dict(data) for data in config.BOARDS]
+    return boards or [Board(config.WINDOW_TITLE)]
+
+
+class BoardRouter:
+    """把存储的变化分发给各个便签板
+
+    所有便签板共享同一个笔记管理器，只在这里订阅一次变化信号。每次变化
+    只转发给受影响的便签板：笔记符合其筛选条件，或者笔记原本就在其中
+    （修改后可能需要移出）。视图需要提供 board、contains(note_id)、
+    apply_changes(note_ids) 和 reload()。界面模式下其他线程的修改由
+    BoardManager 设置的 dispatcher 交给界面线程，视图只在界面线程中更新。
+    """
+
+    def __init__(self, manager: NoteManager):
+        self.manager = manager
+        self.views = []
+        manager.changed.connect(self.on_changed)
+
+    def register(self, view):
+        """注册便签板视图"""
+        if view not in self.views:
+            self.views.append(view)
+
+    def unregister(self, view):
+        """注销便签板视图"""
+        if view in self.views:
+            self.views.remove(view)
+
+    def on_changed(self, events: List[ChangeEvent]):
+        """存储变化时，只把相关的笔记ID转发给各个视图"""
+        if any(event.kind == ChangeKind.RELOADED for event in events):
+            for view in list(self.views):
+                view.reload()
+            return
+
+        # 去重并保持顺序
+        note_ids = list(dict.fromkeys(note_id for event in events for note_id in event.note_ids))
+
+        now = get_clock().now()
+        notes = [(note_id, self.manager.get_note(note_id)) for note_id in note_ids]
+        for view in list(self.views):
+            affected = [note_id for note_id, note in notes
+                        if view.contains(note_id)
+                        or (note is not None and view.board.matches(note, now))]
+            if affected:
+                view.apply_changes(affected)
+
+
+# 全局便签板路由实例
+board_router = BoardRouter(note_manager)
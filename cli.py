@@ -0,0 +1,118 @@
+"""桌面便签命令行客户端（通过本地IPC操作正在运行的桌面便签）
+
+用法:
+    python cli.py add "开会" --due "2024-01-15 15:00" [--repeat 每天] [--board 工作]
+    python cli.py complete 3
+    python cli.py query [--all] [--start 2024-01-15] [--end "2024-01-21 23:59"] [--text 开会] [--limit 10]
+    python cli.py changes --since 120       # 某个版本号之后的变化
+    python cli.py batch < commands.jsonl   # 每行一个JSON命令，流水线发送
+"""
+import sys
+import os
+import json
+import argparse
+from datetime import datetime
+
+# 添加当前目录到Python路径
+current_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, current_dir)
+
+from config import config
+from ipc import send_commands
+
+
+def parse_args(argv=None):
+    """解析命令行参数"""
+    parser = argparse.ArgumentParser(description="桌面便签命令行客户端")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    add_parser = subparsers.add_parser("add", help="添加便签")
+    add_parser.add_argument("content")
+    add_parser.add_argument("--due", required=True, help="提醒时间，例如 2024-01-15 15:00")
+    add_parser.add_argument("--repeat", default="不重复", help="重复规则，例如 每天、每周")
+    add_parser.add_argument("--board", default="", help="所属便签板")
+
+    complete_parser = subparsers.add_parser("complete", help="标记便签完成")
+    complete_parser.add_argument("id", type=int)
+
+    reschedule_parser = subparsers.add_parser("reschedule", help="只修改重复便签这一次的时间")
+    reschedule_parser.add_argument("id", type=int)
+    reschedule_parser.add_argument("--due", required=True, help="这一次的新时间，例如 2024-01-15 16:00")
+
+    query_parser = subparsers.add_parser("query", help="列出便签")
+    query_parser.add_argument("--all", action="store_true", help="包括已完成的便签")
+    query_parser.add_argument("--start", help="到期时间下限（包含）")
+    query_parser.add_argument("--end", help="到期时间上限（包含）")
+    query_parser.add_argument("--repeat", help="只列出指定重复规则的便签")
+    query_parser.add_argument("--text", help="只列出内容包含该文字的便签")
+    query_parser.add_argument("--limit", type=int, help="最多列出的数量")
+
+    changes_parser = subparsers.add_parser("changes", help="列出某个版本号之后的变化")
+    changes_parser.add_argument("--since", type=int, default=0, help="上次读取到的版本号")
+
+    subparsers.add_parser("capture", help="打开快速添加弹窗（可绑定到系统快捷键）")
+
+    subparsers.add_parser("batch", help="从标准输入读取JSON命令（每行一条）")
+    return parser.parse_args(argv)
+
+
+def read_batches(stream):
+    """从输入流按批读取命令"""
+    batch = []
+    for line in stream:
+        line = line.strip()
+        if line:
+            batch.append(json.loads(line))
+        if len(batch) >= config.IPC_BATCH_SIZE:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def main():
+    args = parse_args()
+
+    if args.command == "add":
+        due = datetime.fromisoformat(args.due)
+        batches = [[{'cmd': 'add', 'content': args.content,
+                     'due': due.isoformat(), 'repeat': args.repeat,
+                     'board': args.board}]]
+    elif args.command == "complete":
+        batches = [[{'cmd': 'complete', 'id': args.id}]]
+    elif args.command == "reschedule":
+        batches = [[{'cmd': 'reschedule', 'id': args.id,
+                     'due': datetime.fromisoformat(args.due).isoformat()}]]
+    elif args.command == "query":
+        command = {'cmd': 'query', 'all': args.all, 'repeat': args.repeat,
+                   'text': args.text, 'limit': args.limit}
+        for name in ('start', 'end'):
+            value = getattr(args, name)
+            if value:
+                command[name] = datetime.fromisoformat(value).isoformat()
+        batches = [[command]]
+    elif args.command == "changes":
+        batches = [[{'cmd': 'changes', 'since': args.since}]]
+    elif args.command == "capture":
+        batches = [[{'cmd': 'capture'}]]
+    else:
+        batches = read_batches(sys.stdin)
+
+    exit_code = 0
+    for batch in batches:
+        responses = send_commands(batch)
+        if responses is None:
+            print("桌面便签没有在运行", file=sys.stderr)
+            return 1
+        for response in responses:
+            if not response.get('ok'):
+                exit_code = 1
+            print(json.dumps(response, ensure_ascii=False))
+        if len(responses) < len(batch):
+            print(f"等待响应超时，{len(batch) - len(responses)} 条命令结果未知", file=sys.stderr)
+            return 1
+    return exit_code
+
+
+if __name__ == "__main__":
+    sys.exit(main())
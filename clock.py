@@ -0,0 +1,113 @@
+import threading
+from datetime import datetime, date, timedelta
+from typing import Callable, Optional
+
+from events import Signal
+
+
+class Clock:
+    """时钟服务
+
+    统一提供"当前时间"。接入事件循环后（见 set_tick_scheduler），同一轮
+    事件循环内多次调用 now() 只读取一次系统时间；缓存只用于设置调度函数
+    的线程（界面线程），其他线程没有事件循环来清除缓存，每次都读取时间源。
+    定时调用 tick() 时，在分钟/日期变化时发射 minute_changed / day_changed 信号。
+    """
+
+    def __init__(self):
+        self.minute_changed = Signal()  # 参数: 当前时间
+        self.day_changed = Signal()  # 参数: 当前日期
+        self._cached_now: Optional[datetime] = None
+        self._tick_scheduler: Optional[Callable[[Callable], None]] = None
+        self._tick_thread: Optional[int] = None  # 事件循环所在线程
+        self._last_minute: Optional[datetime] = None
+
+    def _read(self) -> datetime:
+        """读取时间源"""
+        return datetime.now()
+
+    def now(self) -> datetime:
+        """获取当前时间（同一轮事件循环内保持不变）"""
+        if self._tick_scheduler is None or threading.get_ident() != self._tick_thread:
+            return self._read()
+        if self._cached_now is None:
+            now = self._read()
+            self._cached_now = now
+            self._tick_scheduler(self.invalidate)
+        return self._cached_now
+
+    def today(self) -> date:
+        """获取今天的日期"""
+        return self.now().date()
+
+    def invalidate(self):
+        """清除缓存的当前时间"""
+        self._cached_now = None
+
+    def set_tick_scheduler(self, scheduler: Optional[Callable[[Callable], None]]):
+        """设置事件循环调度函数
+
+        scheduler(callback) 需在下一轮事件循环时调用 callback，
+        例如 lambda callback: QTimer.singleShot(0, callback)。
+        需在事件循环所在的线程中调用。
+        """
+        self._tick_scheduler = scheduler
+        self._tick_thread = threading.get_ident()
+        self._cached_now = None
+
+    def tick(self):
+        """检查时间变化，必要时发射分钟/日期变化信号"""
+        now = self.now()
+        minute = now.replace(second=0, microsecond=0)
+        last_minute = self._last_minute
+        if minute == last_minute:
+            return
+
+        self._last_minute = minute
+        if last_minute is None:
+            return
+
+        self.minute_changed.emit(now)
+        if minute.date() != last_minute.date():
+            self.day_changed.emit(now.date())
+
+
+class FakeClock(Clock):
+    """可控的假时钟（用于测试和加速时间的性能测试）
+
+    时间只在调用 set()/advance() 时改变，改变后立即检查分钟/日期变化。
+    """
+
+    def __init__(self, start: Optional[datetime] = None):
+        super().__init__()
+        self._now = start or datetime(2024, 1, 1, 9, 0)
+        self._last_minute = self._now.replace(second=0, microsecond=0)
+
+    def _read(self) -> datetime:
+        return self._now
+
+    def now(self) -> datetime:
+        return self._now
+
+    def set(self, new_now: datetime):
+        """设置当前时间"""
+        self._now = new_now
+        self.tick()
+
+    def advance(self, delta: Optional[timedelta] = None, **kwargs):
+        """将时间向前推进，例如 advance(minutes=5)"""
+        self.set(self._now + (delta if delta is not None else timedelta(**kwargs)))
+
+
+# 全局时钟实例
+_clock: Clock = Clock()
+
+def get_clock() -> Clock:
+    """获取当前使用的时钟"""
+    return _clock
+
+def set_clock(clock: Clock) -> Clock:
+    """替换全局时钟（例如换成 FakeClock），返回原来的时钟"""
+    global _clock
+    previous, _clock = _clock, clock
+    return previous
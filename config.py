@@ -1,6 +1,6 @@
 import os
-from dataclasses import dataclass
-from typing import Tuple
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Tuple
 
 @dataclass
 class AppConfig:
@@ -13,14 +13,95 @@ class AppConfig:
     # 样式配置
     BACKGROUND_COLOR: str = "rgba(255, 253, 231, 230)"  # 浅黄色背景
     BORDER_RADIUS: int = 10
+    BORDER_COLOR: str = "#E0E0E0"
+    BACKGROUND_IMAGE: str = ""  # 背景图路径（相对于程序目录），例如 assets/background.png
+    BACKGROUND_IMAGE_OPACITY: float = 0.6
+    DEFAULT_REFRESH_RATE: float = 60.0  # 无法获取屏幕刷新率时拖动使用的帧率
     FONT_FAMILY: str = "Microsoft YaHei, SimHei, sans-serif"
     
     # 数据配置
     DATA_DIR: str = "data"
     NOTES_FILE: str = "notes.json"
     
+    # 备份配置
+    BACKUP_DIR_NAME: str = "backups"  # 数据目录下的备份目录
+    BACKUP_INTERVAL: int = 10  # 两次备份之间的最短间隔(分钟)
+    BACKUP_GENERATIONS: int = 24  # 保留的备份代数
+    RESTORE_MENU_SIZE: int = 10  # 托盘菜单中列出的最近备份数
+    
+    # 长内容配置
+    BLOB_DIR_NAME: str = "blobs"  # 数据目录下保存长内容的目录
+    BLOB_THRESHOLD: int = 4000  # 超过此字符数的内容单独保存，笔记中只保留预览
+    BLOB_PREVIEW_LENGTH: int = 200  # 预览的字符数
+    BLOB_CACHE_SIZE: int = 16  # 内存中缓存的最近读取的长内容数
+    
+    QUERY_CACHE_SIZE: int = 64  # 查询结果缓存的条目数
+    CHANGE_LOG_SIZE: int = 1000  # 内存中保留的最近变化记录数
+    
     # 提醒配置
     CHECK_INTERVAL: int = 1000  # 检查提醒的时间间隔(毫秒)
+    MISSED_REMINDER_WINDOW: int = 24 * 60  # 启动时补发错过提醒的时间范围(分钟)
+    HEADLESS_POLL_INTERVAL: float = 30.0  # 无界面模式检查文件变化的最长间隔(秒)
+    
+    # 本地IPC配置
+    IPC_SERVER_NAME: str = "DesktopStickyNotes"
+    IPC_CONNECT_TIMEOUT: int = 500  # 连接运行中实例的超时时间(毫秒)
+    IPC_TIMEOUT: int = 10000  # 等待响应的超时时间(毫秒)
+    IPC_BATCH_SIZE: int = 500  # 命令行客户端每批发送的命令数
+    EDIT_SAVE_DELAY: int = 500  # 停止输入后保存笔记内容的延迟(毫秒)
+    
+    # 日程分组配置
+    LATER_COLLAPSE_THRESHOLD: int = 20  # "以后"分组超过此数量时默认折叠
+    
+    # 日历视图配置
+    CALENDAR_SIZE: Tuple[int, int] = (760, 560)
+    CALENDAR_CELL_ITEMS: int = 3  # 月视图每个日期格最多列出的事项数
+    OCCURRENCE_CACHE_SIZE: int = 12  # 缓存展开结果的窗口（月/周）数
+    OCCURRENCE_OFFLOAD_SERIES: int = 1000  # 预先展开时系列不少于此数量则交给进程池
+    OCCURRENCE_BATCH_SERIES: int = 2000  # 交给进程池时每批的系列数
+    
+    # 空闲整理配置
+    HOUSEKEEPING_IDLE_MINUTES: int = 5  # 超过此时间没有输入、且此时间内没有提醒时视为空闲(分钟)
+    HOUSEKEEPING_INTERVAL: int = 6 * 60  # 两轮整理之间的最短间隔(分钟)
+    HOUSEKEEPING_SLICE: int = 8  # 每个时间片的最长工作时间(毫秒)
+    HOUSEKEEPING_TICK: int = 50  # 整理进行中两个时间片之间的间隔(毫秒)
+    HOUSEKEEPING_CHECK_INTERVAL: int = 30 * 1000  # 没有整理工作时检查是否空闲的间隔(毫秒)
+    ARCHIVE_FILE: str = "archive.jsonl"  # 数据目录下的归档文件
+    ARCHIVE_AFTER_DAYS: int = 30  # 到期超过此天数的已完成笔记移入归档
+    ARCHIVE_BATCH_SIZE: int = 200  # 归档时每一步处理的笔记数
+    
+    # 进程池配置
+    JOB_WORKERS: int = 2  # 工作进程数，0 表示与CPU核数相同
+    IMPORT_BATCH_LINES: int = 2000  # 导入时每批交给工作进程的行数
+    
+    # 日志配置
+    LOG_DIR_NAME: str = "logs"  # 数据目录下的日志目录
+    LOG_FILE: str = "stickynotes.log"
+    LOG_LEVEL: str = "INFO"  # 写入日志文件的最低级别（内存中的缓冲区保存全部级别）
+    LOG_MAX_BYTES: int = 1024 * 1024  # 日志文件超过此大小时轮换
+    LOG_BACKUP_COUNT: int = 3  # 保留的旧日志文件数
+    LOG_BUFFER_SIZE: int = 2000  # 内存中保存的最近记录数（出错时写入文件）
+    SLOW_SAVE_MS: int = 200  # 保存笔记超过此时间(毫秒)时记录警告
+    
+    # 性能分析配置（见 profiler.py）
+    PROFILE_DIR_NAME: str = "profiles"  # 数据目录下保存分析结果的目录
+    PROFILE_SAMPLE_INTERVAL: int = 5  # 采样模式的采样间隔(毫秒)
+    PROFILE_MODULES: Tuple[str, ...] = ("note_manager", "widgets.main_window",
+                                        "widgets.note_widget")  # 汇总中单独列出的模块
+    PROFILE_TOP_FUNCTIONS: int = 10  # 汇总中每个模块列出的函数数
+    
+    # 快速添加配置
+    QUICK_CAPTURE_WIDTH: int = 320
+    
+    # 便签板配置：每项一个窗口，例如
+    # {"name": "工作", "tag": "工作"}、{"name": "今天", "days": 1}
+    # 为空时只有一个显示全部笔记的窗口
+    BOARDS: List[Dict[str, Any]] = field(default_factory=list)
+    NOTIFICATION_DURATION: int = 3000  # 每条提醒通知的显示时间(毫秒)
+    
+    # 列表加载配置
+    FIRST_PAINT_COUNT: int = 6  # 首屏同步创建的便签数量
+    LOAD_BATCH_SIZE: int = 5  # 之后每批创建的便签数量
     
     def __post_init__(self):
         """确保数据目录存在"""
@@ -0,0 +1,26 @@
+from typing import Callable, List
+
+
+class Signal:
+    """轻量信号（不依赖Qt，用法与 pyqtSignal 相同）
+
+    供无界面模式下也要使用的核心模块（时钟、笔记管理器等）发布事件。
+    """
+
+    def __init__(self):
+        self._slots: List[Callable] = []
+
+    def connect(self, slot: Callable):
+        """连接槽函数"""
+        if slot not in self._slots:
+            self._slots.append(slot)
+
+    def disconnect(self, slot: Callable):
+        """断开槽函数"""
+        if slot in self._slots:
+            self._slots.remove(slot)
+
+    def emit(self, *args):
+        """发射信号"""
+        for slot in list(self._slots):
+            slot(*args)
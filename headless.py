@@ -0,0 +1,49 @@
+import os
+import time
+import logging
+from typing import List
+
+from config import config
+from clock import get_clock
+from note_manager import note_manager
+from scheduler import reminder_scheduler
+from notifiers import create_sink
+
+log = logging.getLogger(__name__)
+
+
+def _notes_mtime() -> float:
+    """笔记文件的修改时间（文件不存在时为0）"""
+    try:
+        return os.path.getmtime(config.notes_file_path)
+    except OSError:
+        return 0.0
+
+
+def run_headless(sink_specs: List[str]) -> int:
+    """无界面提醒守护进程（不导入 PyQt5.QtWidgets）"""
+    for spec in sink_specs or ['stdout']:
+        reminder_scheduler.add_sink(create_sink(spec))
+
+    log.info("无界面模式已启动，共 %d 条未完成便签", note_manager.open_count())
+    last_mtime = _notes_mtime()
+
+    try:
+        while True:
+            # 其他进程修改了笔记文件时重新加载
+            mtime = _notes_mtime()
+            if mtime != last_mtime:
+                last_mtime = mtime
+                note_manager.load_notes()
+
+            reminder_scheduler.check()
+
+            # 睡眠到下一个提醒，但最长不超过轮询间隔（以便发现文件变化）
+            timeout = config.HEADLESS_POLL_INTERVAL
+            next_due = reminder_scheduler.next_due_time()
+            if next_due is not None:
+                timeout = min(timeout, max(0.0, (next_due - get_clock().now()).total_seconds()))
+            time.sleep(timeout)
+    except KeyboardInterrupt:
+        log.info("无界面模式已退出")
+    return 0
@@ -0,0 +1,186 @@
+"""空闲时整理
+
+一些耗时的整理工作（归档旧的已完成笔记、清理不再使用的长内容、清理
+备份目录）没有合适的时机执行。笔记文件每次保存都整个重写，不会留下
+无用的空间，存储的整理就是后两项：长内容存储和备份中不再引用的文件。
+整理器在用户空闲时（一段时间没有输入，并且近期没有要提醒的笔记）分片
+执行这些工作：每个任务是一个生成器，每次 yield 表示一小步已完成；每个
+时间片只执行到时间用完为止，用户一有输入就暂停，下次空闲时从暂停的地方
+继续。一轮结束后通过 finished 信号报告结果。
+
+整理器本身不依赖Qt：输入检测和时间片的调度由界面（见 BoardManager）
+负责，调用 note_activity() 和 run_slice()。
+"""
+import os
+import json
+import time
+from collections import deque
+from datetime import datetime, timedelta
+from typing import Callable, Deque, Generator, List, NamedTuple, Optional, Tuple
+
+from config import config
+from clock import get_clock
+from events import Signal
+from note_manager import NoteManager, note_manager
+from scheduler import ReminderScheduler, reminder_scheduler
+from backup import backup_manager
+
+# 整理任务：无参数，返回生成器；生成器的返回值是结果摘要
+Job = Callable[[], Generator[None, None, str]]
+
+
+class JobReport(NamedTuple):
+    """一个整理任务的执行结果"""
+    name: str
+    summary: str
+    steps: int
+    seconds: float  # 实际工作时间（不含暂停）
+
+
+class Housekeeper:
+    """空闲时整理调度器"""
+
+    def __init__(self, scheduler: ReminderScheduler):
+        self.scheduler = scheduler
+        self.jobs: List[Tuple[str, Job]] = []
+        self.finished = Signal()  # 一轮整理完成，参数为 JobReport 列表
+        self.last_report: List[JobReport] = []
+        self._last_activity = get_clock().now()
+        self._last_round: Optional[datetime] = None  # 上一轮完成的时间
+        self._queue: Deque[Tuple[str, Job]] = deque()  # 本轮尚未开始的任务
+        self._current = None  # 进行中的任务: [名称, 生成器, 步数, 耗时]
+        self._reports: List[JobReport] = []
+
+    def add_job(self, name: str, job: Job):
+        """注册整理任务（按注册顺序执行）"""
+        self.jobs.append((name, job))
+
+    def note_activity(self):
+        """记录用户输入（每次输入事件调用，需要足够快）"""
+        self._last_activity = get_clock().now()
+
+    def is_idle(self) -> bool:
+        """一段时间没有输入，且这段时间内没有要提醒的笔记"""
+        now = get_clock().now()
+        idle_time = timedelta(minutes=config.HOUSEKEEPING_IDLE_MINUTES)
+        if now - self._last_activity < idle_time:
+            return False
+        due = self.scheduler.next_due_time()
+        return due is None or due - now > idle_time
+
+    def is_running(self) -> bool:
+        """本轮整理是否在进行中（包括被输入暂停）"""
+        return self._current is not None or bool(self._queue)
+
+    def _start_round_if_due(self) -> bool:
+        if self.is_running():
+            return True
+        now = get_clock().now()
+        if (self._last_round is not None
+                and now - self._last_round < timedelta(minutes=config.HOUSEKEEPING_INTERVAL)):
+            return False
+        self._queue.extend(self.jobs)
+        self._reports = []
+        return bool(self._queue)
+
+    def run_slice(self, budget: float) -> bool:
+        """空闲时执行最多 budget 秒的整理工作，返回本轮是否还有剩余工作
+
+        时间只在两步之间检查，单步的耗时由任务自己控制在很短的范围内。
+        """
+        if not self.is_idle() or not self._start_round_if_due():
+            return False
+
+        deadline = time.perf_counter() + budget
+        while time.perf_counter() < deadline:
+            if self._current is None:
+                if not self._queue:
+                    self._finish_round()
+                    return False
+                name, job = self._queue.popleft()
+                self._current = [name, job(), 0, 0.0]
+
+            began = time.perf_counter()
+            try:
+                next(self._current[1])
+                summary = None
+            except StopIteration as done:
+                summary = done.value or ""
+            except Exception as e:
+                summary = f"失败: {e}"
+            self._current[2] += 1
+            self._current[3] += time.perf_counter() - began
+
+            if summary is not None:
+                name, _, steps, seconds = self._current
+                self._reports.append(JobReport(name, summary, steps, seconds))
+                self._current = None
+        return True
+
+    def _finish_round(self):
+        self._last_round = get_clock().now()
+        self.last_report = self._reports
+        self._reports = []
+        self.finished.emit(self.last_report)
+
+
+def archive_completed(manager: NoteManager) -> Generator[None, None, str]:
+    """把到期时间早于 ARCHIVE_AFTER_DAYS 天的已完成笔记移到归档文件
+
+    归档文件每行一条笔记的JSON（长内容写入全文，不再依赖长内容存储）。
+    每一步归档一页（ARCHIVE_BATCH_SIZE 条）并从内存中删除这一页，最后保存
+    一次笔记文件（由后台线程写入，不占用界面线程；每一步都保存的话，后台
+    保存读取数据时持有读锁，下一步的删除要等它完成）。中途退出最多在归档
+    中留下重复的记录。重复笔记按系列保存，完成时不再留下已完成的笔记（完成
+    历史在系列中，每次只占几个字节）；旧版本每完成一次留下的一条已完成笔记
+    照常归档。
+    """
+    cutoff = get_clock().now() - timedelta(days=config.ARCHIVE_AFTER_DAYS)
+    path = os.path.join(config.DATA_DIR, config.ARCHIVE_FILE)
+    start = None
+    archived = 0
+    while True:
+        yield
+        page = manager.query(start=start, end=cutoff, limit=config.ARCHIVE_BATCH_SIZE)
+        if not page:
+            break
+        # 下一页从本页最后的到期时间之后开始（之前的未完成笔记保留在原处）
+        start = page[-1].due_date + timedelta(microseconds=1)
+        notes = [note for note in page if note.is_completed]
+        if not notes:
+            continue
+
+        records = []
+        for note in notes:
+            record = note.to_dict()
+            if record.pop('content_hash', None):
+                record['content'] = note.content
+            records.append(json.dumps(record, ensure_ascii=False))
+        with open(path, 'a', encoding='utf-8') as f:
+            f.write("\n".join(records) + "\n")
+        archived += manager.delete_notes((note.id for note in notes), save=False)
+
+    if archived:
+        yield
+        with manager.batch(background_save=True):
+            manager.save_notes()
+    return f"归档了 {archived} 条已完成的笔记"
+
+
+def collect_blobs() -> Generator[None, None, str]:
+    """清理不再使用的长内容"""
+    count = yield from backup_manager.collect_blobs_steps()
+    return f"删除了 {count} 个不再使用的长内容"
+
+
+def vacuum_backups() -> Generator[None, None, str]:
+    """清理备份目录"""
+    count = yield from backup_manager.vacuum_steps()
+    return f"删除了 {count} 个多余的备份文件"
+
+
+# 全局整理器实例
+housekeeper = Housekeeper(reminder_scheduler)
+housekeeper.add_job("归档", lambda: archive_completed(note_manager))
+housekeeper.add_job("长内容", collect_blobs)
+housekeeper.add_job("备份", vacuum_backups)
@@ -0,0 +1,221 @@
+import json
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from PyQt5.QtCore import QObject, pyqtSignal
+from PyQt5.QtNetwork import QLocalServer, QLocalSocket
+
+from config import config
+from note_manager import NoteManager, RepeatType
+
+
+def _encode(message: Dict[str, Any]) -> bytes:
+    """编码一条消息（每行一个JSON对象）"""
+    return json.dumps(message, ensure_ascii=False).encode('utf-8') + b'\n'
+
+
+_REQUIRED = object()
+
+
+def _field(command: Dict[str, Any], key: str, kind: type, default: Any = _REQUIRED) -> Any:
+    """取命令中的字段并检查类型（缺少的可选字段返回 default），不合法时抛出 ValueError"""
+    value = command.get(key)
+    if value is None:
+        if default is _REQUIRED:
+            raise ValueError(f"缺少字段: {key}")
+        return default
+    # bool 是 int 的子类，不能当作编号或数量
+    if not isinstance(value, kind) or (kind is int and isinstance(value, bool)):
+        raise ValueError(f"字段 {key} 应为 {kind.__name__}")
+    return value
+
+
+def _time_field(command: Dict[str, Any], key: str, required: bool = True) -> Optional[datetime]:
+    """ISO 格式的时间字段；笔记中都是不带时区的本地时间，带时区的时间无法与之比较"""
+    value = _field(command, key, str, _REQUIRED if required else None)
+    if not value and not required:
+        return None
+    moment = datetime.fromisoformat(value)
+    if moment.tzinfo is not None:
+        raise ValueError(f"字段 {key} 不能带时区: {value}")
+    return moment
+
+
+def _repeat_field(command: Dict[str, Any], default: Optional[RepeatType]) -> Optional[RepeatType]:
+    """重复规则字段（RepeatType 的值，例如 每天）"""
+    value = _field(command, 'repeat', str, None)
+    if value is None:
+        return default
+    try:
+        return RepeatType(value)
+    except ValueError:
+        raise ValueError(f"未知的重复规则: {value}") from None
+
+
+class IpcServer(QObject):
+    """本地IPC服务（QLocalServer：Windows命名管道 / Unix域套接字）
+
+    协议为按行分隔的JSON命令，客户端可以连续发送多条命令（流水线），
+    同一次读取到的命令作为一批应用到笔记管理器，只保存一次文件。
+    """
+
+    show_requested = pyqtSignal()
+    capture_requested = pyqtSignal()
+
+    def __init__(self, manager: NoteManager, parent=None):
+        super().__init__(parent)
+        self.manager = manager
+        self.server = QLocalServer(self)
+        self.server.newConnection.connect(self.on_new_connection)
+
+    def start(self) -> bool:
+        """开始监听"""
+        if self.server.listen(config.IPC_SERVER_NAME):
+            return True
+        # 上次异常退出可能残留套接字文件
+        QLocalServer.removeServer(config.IPC_SERVER_NAME)
+        return self.server.listen(config.IPC_SERVER_NAME)
+
+    def on_new_connection(self):
+        """新的客户端连接"""
+        while self.server.hasPendingConnections():
+            socket = self.server.nextPendingConnection()
+            socket.readyRead.connect(lambda s=socket: self.on_ready_read(s))
+            socket.disconnected.connect(socket.deleteLater)
+
+    def on_ready_read(self, socket: QLocalSocket):
+        """读取所有完整的命令行并批量处理"""
+        commands = []
+        while socket.canReadLine():
+            line = bytes(socket.readLine()).strip()
+            if line:
+                commands.append(line)
+        if not commands:
+            return
+
+        # 整批命令结束时笔记管理器只发出一次变化通知
+        responses = []
+        with self.manager.batch():
+            for line in commands:
+                try:
+                    command = json.loads(line)
+                    responses.append(self.handle_command(command))
+                except Exception as e:
+                    responses.append({'ok': False, 'error': str(e)})
+
+        socket.write(b''.join(_encode(response) for response in responses))
+        socket.flush()
+
+    def handle_command(self, command: Dict[str, Any]) -> Dict[str, Any]:
+        """处理单条命令"""
+        if not isinstance(command, dict):
+            return {'ok': False, 'error': "命令应为JSON对象"}
+        name = command.get('cmd')
+        handler = getattr(self, f'cmd_{name}', None)
+        if handler is None:
+            return {'ok': False, 'error': f"未知命令: {name}"}
+        # 各命令先检查全部字段再修改笔记，不合法的命令不会改动任何笔记
+        try:
+            return handler(command)
+        except ValueError as e:
+            return {'ok': False, 'error': str(e)}
+
+    def cmd_show(self, command):
+        """显示主窗口"""
+        self.show_requested.emit()
+        return {'ok': True}
+
+    def cmd_capture(self, command):
+        """打开快速添加弹窗"""
+        self.capture_requested.emit()
+        return {'ok': True}
+
+    def cmd_add(self, command):
+        """添加笔记"""
+        content = _field(command, 'content', str)
+        due_date = _time_field(command, 'due')
+        repeat_type = _repeat_field(command, RepeatType.NONE)
+        board = _field(command, 'board', str, '')
+        note = self.manager.add_note(content=content, due_date=due_date,
+                                     repeat_type=repeat_type, board=board)
+        return {'ok': True, 'id': note.id}
+
+    def cmd_complete(self, command):
+        """标记笔记完成"""
+        if not self.manager.mark_completed(_field(command, 'id', int)):
+            return {'ok': False, 'error': f"笔记不存在: {command['id']}"}
+        return {'ok': True}
+
+    def cmd_reschedule(self, command):
+        """只修改重复笔记当前这一次的时间"""
+        note_id = _field(command, 'id', int)
+        due_date = _time_field(command, 'due')
+        if not self.manager.reschedule_occurrence(note_id, due_date):
+            return {'ok': False, 'error': f"不是未完成的重复笔记: {command['id']}"}
+        return {'ok': True}
+
+    def cmd_delete(self, command):
+        """删除笔记"""
+        if not self.manager.delete_note(_field(command, 'id', int)):
+            return {'ok': False, 'error': f"笔记不存在: {command['id']}"}
+        return {'ok': True}
+
+    def cmd_query(self, command):
+        """查询笔记
+
+        all 为真时包括已完成的笔记；可选条件 start/end（ISO 时间）、repeat、
+        completed、text、limit 与 NoteManager.query 相同。
+        """
+        completed = _field(command, 'completed', bool, None)
+        if completed is None and not _field(command, 'all', bool, False):
+            completed = False
+        notes = self.manager.query(
+            start=_time_field(command, 'start', required=False),
+            end=_time_field(command, 'end', required=False),
+            repeat=_repeat_field(command, None),
+            completed=completed,
+            text=_field(command, 'text', str, None) or None,
+            limit=_field(command, 'limit', int, None),
+        )
+        return {'ok': True, 'notes': [note.to_dict() for note in notes]}
+
+
+    def cmd_changes(self, command):
+        """查询某个版本号之后的变化，落后太多时返回全部笔记"""
+        since = _field(command, 'since', int, 0)
+        changes = self.manager.changes_since(since)
+        if changes is None:
+            revision, notes = self.manager.snapshot()
+            return {'ok': True, 'revision': revision,
+                    'snapshot': [note.to_dict() for note in notes]}
+        return {'ok': True, 'revision': self.manager.revision,
+                'changes': [event.to_dict() for event in changes]}
+
+
+def send_commands(commands: List[Dict[str, Any]],
+                  timeout: int = None) -> Optional[List[Dict[str, Any]]]:
+    """向运行中的实例发送一批命令，返回对应的响应；没有运行中的实例时返回 None
+
+    所有命令一次性写出后再读取响应（流水线），不会逐条等待往返。
+    超时时返回已收到的部分响应。
+    """
+    timeout = timeout or config.IPC_TIMEOUT
+    socket = QLocalSocket()
+    socket.connectToServer(config.IPC_SERVER_NAME)
+    if not socket.waitForConnected(config.IPC_CONNECT_TIMEOUT):
+        return None
+
+    socket.write(b''.join(_encode(command) for command in commands))
+    socket.waitForBytesWritten(timeout)
+
+    responses = []
+    buffer = b''
+    while len(responses) < len(commands):
+        if not socket.waitForReadyRead(timeout):
+            break
+        buffer += bytes(socket.readAll())
+        *lines, buffer = buffer.split(b'\n')
+        responses.extend(json.loads(line) for line in lines if line.strip())
+
+    socket.disconnectFromServer()
+    return responses
@@ -0,0 +1,226 @@
+"""进程池任务
+
+批量导入的解析、日历预先展开重复规则等CPU密集的工作即使放在线程中，
+也会因为GIL卡住界面线程。
+这里把这类工作分批交给进程池：每批数据和结果都是序列化后的 bytes（进程
+之间只传递紧凑的数据），界面线程只负责分批提交和最后的合并。合并在
+界面线程中进行，对笔记管理器的所有修改放在一次批量修改中提交。
+
+工作进程会导入本模块，因此模块级不导入笔记管理器（导入时会加载笔记文件）。
+"""
+import json
+import multiprocessing
+from concurrent.futures import Future, ProcessPoolExecutor
+from datetime import date, datetime, timedelta
+from typing import Any, Callable, List, NamedTuple, Optional, Tuple
+
+from PyQt5.QtCore import QObject, QTimer, pyqtSignal
+
+from config import config
+from clock import get_clock
+from recurrence import RepeatType, expand_series
+
+_pool: Optional[ProcessPoolExecutor] = None
+
+
+def get_pool() -> ProcessPoolExecutor:
+    """共享的进程池（第一次使用时创建）"""
+    global _pool
+    if _pool is None:
+        # 使用 spawn：界面进程中有Qt和其他线程，fork 出的子进程可能死锁
+        _pool = ProcessPoolExecutor(max_workers=config.JOB_WORKERS or None,
+                                    mp_context=multiprocessing.get_context("spawn"))
+    return _pool
+
+
+def shutdown_pool():
+    """关闭进程池，未开始的批次直接取消（退出时调用）"""
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
+
+
+class ProcessJob(QObject):
+    """在进程池中分批执行的任务
+
+    func(batch, *args) 在工作进程中执行，batch 和返回值都是 bytes；全部
+    批次完成后在界面线程按批次顺序调用 merge(results)，其返回值通过
+    finished 信号发出。取消后尚未开始的批次不再执行，已经在执行的批次
+    的结果被丢弃。
+    """
+
+    progress = pyqtSignal(int, int)  # 已完成批数, 总批数
+    finished = pyqtSignal(object)  # merge 的返回值
+    failed = pyqtSignal(str)
+    cancelled = pyqtSignal()
+    # 批次完成的回调在进程池的管理线程中执行，经此信号转到界面线程
+    _batch_done = pyqtSignal(int, object)
+
+    def __init__(self, func: Callable[..., bytes], batches: List[bytes],
+                 merge: Callable[[List[bytes]], Any], args: Tuple = (), parent=None):
+        super().__init__(parent)
+        self.func = func
+        self.batches = batches
+        self.merge = merge
+        self.args = args
+        self.results: List[Optional[bytes]] = [None] * len(batches)
+        self.done = 0
+        self.running = False
+        self._futures: List[Future] = []
+        self._batch_done.connect(self.on_batch_done)
+
+    def start(self):
+        """提交所有批次"""
+        self.running = True
+        if not self.batches:
+            QTimer.singleShot(0, self.finish)
+            return
+        pool = get_pool()
+        for index, batch in enumerate(self.batches):
+            future = pool.submit(self.func, batch, *self.args)
+            future.add_done_callback(
+                lambda future, index=index: self._batch_done.emit(index, future)
+            )
+            self._futures.append(future)
+
+    def cancel(self):
+        """取消任务"""
+        if not self.running:
+            return
+        self._stop()
+        self.cancelled.emit()
+
+    def _stop(self):
+        self.running = False
+        for future in self._futures:
+            future.cancel()
+        self.batches = []
+
+    def on_batch_done(self, index: int, future: Future):
+        """一批完成（界面线程）"""
+        if not self.running or future.cancelled():
+            return
+        error = future.exception()
+        if error is not None:
+            self._stop()
+            self.failed.emit(f"{type(error).__name__}: {error}")
+            return
+        self.results[index] = future.result()
+        self.done += 1
+        self.progress.emit(self.done, len(self.results))
+        if self.done == len(self.results):
+            self.finish()
+
+    def finish(self):
+        """所有批次完成：在界面线程合并结果"""
+        self.running = False
+        try:
+            result = self.merge(self.results)
+        except Exception as e:
+            self.failed.emit(f"{type(e).__name__}: {e}")
+            return
+        self.finished.emit(result)
+
+
+def split_lines(data: bytes, lines_per_batch: int) -> List[bytes]:
+    """按行把数据分成若干批"""
+    lines = data.split(b"\n")
+    return [b"\n".join(lines[start:start + lines_per_batch])
+            for start in range(0, len(lines), lines_per_batch)]
+
+
+class ImportResult(NamedTuple):
+    """导入结果"""
+    added: int
+    errors: List[Tuple[int, str]]  # (行号, 错误)
+
+
+def parse_import_batch(batch: bytes, today: str, repeat_values: List[str]) -> bytes:
+    """在工作进程中解析一批导入数据
+
+    每行一条JSON，格式与命令行客户端的 add 命令相同：
+    {"content": "...", "due": "2024-01-15T15:00", "repeat": "每天", "board": "工作"}
+    返回紧凑的JSON: [[[内容, 到期时间, 重复, 便签板], ...], [[批内行号, 错误], ...]]
+    """
+    earliest = date.fromisoformat(today)
+    records = []
+    errors = []
+    for offset, line in enumerate(batch.split(b"\n")):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            item = json.loads(line)
+            if not isinstance(item, dict):
+                raise ValueError("每行应为JSON对象")
+            content = item['content']
+            if not isinstance(content, str) or not content.strip():
+                raise ValueError("内容不能为空")
+            for key in ('due', 'repeat', 'board'):
+                if key in item and not isinstance(item[key], str):
+                    raise ValueError(f"字段 {key} 应为字符串")
+            due = datetime.fromisoformat(item['due'])
+            if due.tzinfo is not None:
+                # 笔记中都是不带时区的本地时间，带时区的时间无法与之比较
+                raise ValueError(f"到期时间不能带时区: {item['due']}")
+            if due.date() < earliest:
+                raise ValueError("只能记录今天和未来的事项")
+            repeat = item.get('repeat', repeat_values[0])
+            if repeat not in repeat_values:
+                raise ValueError(f"未知的重复规则: {repeat}")
+            records.append([content, due.isoformat(), repeat, item.get('board', "")])
+        except (ValueError, KeyError, TypeError) as e:
+            errors.append([offset, f"{type(e).__name__}: {e}"])
+    return json.dumps([records, errors], ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+
+def expand_occurrence_batch(batch: bytes, start: str, end: str) -> bytes:
+    """在工作进程中展开一批系列在窗口 [start, end) 内的各次发生
+
+    每个系列为 [ID, 重复规则, 当前这一次按规则的时间, 窗口内已完成的日期,
+    [[按规则的时间, 改期后的时间], ...], 原本的日期]（见 OccurrenceCache.prefetch）；
+    返回紧凑的JSON: [[ID, 已完成的次数, 各次相对 start 的微秒数...], ...]，
+    已完成的各次在前，窗口内没有发生的系列不返回。
+    """
+    window_start = datetime.fromisoformat(start)
+    window_end = datetime.fromisoformat(end)
+    unit = timedelta(microseconds=1)
+    result = []
+    for note_id, repeat, cursor, done_days, overrides, anchor_day in json.loads(batch):
+        times = expand_series(RepeatType(repeat), datetime.fromisoformat(cursor), done_days,
+                              {datetime.fromisoformat(rule): datetime.fromisoformat(due)
+                               for rule, due in overrides},
+                              anchor_day, window_start, window_end)
+        if times:
+            result.append([note_id, sum(done for _, done in times),
+                           *((when - window_start) // unit for when, _ in times)])
+    return json.dumps(result, separators=(',', ':')).encode('utf-8')
+
+
+def import_notes(path: str, manager, parent=None) -> ProcessJob:
+    """从文件导入便签（调用 start() 开始），finished 信号的参数为 ImportResult"""
+    from note_manager import Note, RepeatType
+
+    with open(path, 'rb') as f:
+        data = f.read()
+    batch_lines = config.IMPORT_BATCH_LINES
+
+    def merge(results: List[bytes]) -> ImportResult:
+        notes = []
+        errors = []
+        for index, result in enumerate(results):
+            records, batch_errors = json.loads(result)
+            first_line = index * batch_lines + 1
+            errors.extend((first_line + offset, error) for offset, error in batch_errors)
+            notes.extend(Note(content=content, due_date=datetime.fromisoformat(due),
+                              repeat_type=RepeatType(repeat), board=board)
+                         for content, due, repeat, board in records)
+        # 合并在界面线程中进行，文件由后台线程写入
+        with manager.batch(background_save=True):
+            manager.add_notes(notes)
+        return ImportResult(len(notes), errors)
+
+    return ProcessJob(parse_import_batch, split_lines(data, batch_lines), merge,
+                      args=(get_clock().today().isoformat(), [repeat.value for repeat in RepeatType]),
+                      parent=parent)
@@ -0,0 +1,215 @@
+"""日志
+
+各模块使用标准库的 logging（log = logging.getLogger(__name__)），消息使用
+%s 占位符，只在真正输出时才格式化。setup_logging() 之后：
+
+- 记录先放入内存中的环形缓冲区（最近 LOG_BUFFER_SIZE 条，包括 DEBUG），
+  只保存记录对象，转储时才格式化，开销很小。参数中的可变对象（列表、
+  字典等）在记录时转为文本，之后的修改不会改变日志的内容；带异常的记录
+  先生成异常文本，不让缓冲区保留异常的栈帧；
+- 达到 LOG_LEVEL 的记录经队列交给后台线程，写入 data/logs/ 下按大小轮换的
+  日志文件（每行一条JSON），有控制台时同时输出到标准错误；
+- 发生未处理的异常时 dump_recent() 把缓冲区写到单独的文件，事后可以看到
+  崩溃之前发生了什么（打包后的窗口程序没有控制台，print 的输出都会丢失）。
+
+附加字段通过 extra 传入，会作为JSON的字段写入日志文件，例如：
+    log.warning("保存笔记较慢", extra={'notes': 5000, 'ms': 350})
+"""
+import atexit
+import copy
+import enum
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import sys
+import threading
+from collections import deque
+from datetime import date, datetime, time, timedelta
+from typing import List, Optional
+
+from blobs import create_unique
+from config import config
+
+# LogRecord 自带的属性，其余的属性来自 extra
+_RECORD_FIELDS = frozenset(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {
+    "message", "asctime"}
+
+
+class JsonFormatter(logging.Formatter):
+    """每条记录一行JSON: 时间、级别、模块、线程、消息和附加字段"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        data = {
+            'time': datetime.fromtimestamp(record.created).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'thread': record.threadName,
+            'message': record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_FIELDS:
+                data[key] = value
+        if record.exc_info:
+            data['exception'] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            data['exception'] = record.exc_text
+        return json.dumps(data, ensure_ascii=False, default=str)
+
+
+class _Snapshot:
+    """可变参数在记录时的文本（%s 和 %r 的结果与当时格式化相同）"""
+
+    __slots__ = ('text', 'representation')
+
+    def __init__(self, value):
+        self.text = str(value)
+        self.representation = repr(value)
+
+    def __str__(self) -> str:
+        return self.text
+
+    def __repr__(self) -> str:
+        return self.representation
+
+
+# 记录之后不会再变的参数类型，原样保留到格式化时
+_IMMUTABLE_ARGS = (str, int, float, complex, bytes, type(None), date, time, timedelta,
+                   enum.Enum, _Snapshot)
+
+
+def _snapshot_args(record: logging.LogRecord):
+    """把参数中的可变对象换成记录时的文本（其余参数不格式化）
+
+    记录在缓冲区中或者在后台线程中才格式化，这时列表、字典等参数可能已经
+    被修改。对每个处理器结果相同，所以直接替换记录的参数，可以重复调用。
+    """
+    args = record.args
+    if not args:
+        return
+    if isinstance(args, dict):
+        if not all(isinstance(value, _IMMUTABLE_ARGS) for value in args.values()):
+            record.args = {key: value if isinstance(value, _IMMUTABLE_ARGS) else _Snapshot(value)
+                           for key, value in args.items()}
+    elif not all(isinstance(arg, _IMMUTABLE_ARGS) for arg in args):
+        record.args = tuple(arg if isinstance(arg, _IMMUTABLE_ARGS) else _Snapshot(arg)
+                            for arg in args)
+
+
+class RingBufferHandler(logging.Handler):
+    """保存最近的记录
+
+    保存记录本身，转储时才格式化消息；可变的参数先换成文本（见
+    _snapshot_args）。带异常的记录保存一个副本：异常文本在这里生成，副本
+    不引用异常（异常的栈帧会让其中所有的局部变量一直留在内存中）。原来的
+    记录还要交给写文件的后台线程，不能去掉异常。
+    """
+
+    _formatter = logging.Formatter()
+
+    def __init__(self, capacity: int):
+        super().__init__()
+        self.records: 'deque[logging.LogRecord]' = deque(maxlen=capacity)
+
+    def emit(self, record: logging.LogRecord):
+        self.records.append(record)
+
+    def handle(self, record: logging.LogRecord) -> bool:
+        _snapshot_args(record)
+        if record.exc_info:
+            detached = copy.copy(record)
+            detached.exc_text = self._formatter.formatException(record.exc_info)
+            detached.exc_info = None
+            record = detached
+        # 不需要 Handler 的锁：deque.append 本身是线程安全的
+        self.records.append(record)
+        return True
+
+
+class _LazyQueueHandler(logging.handlers.QueueHandler):
+    """把记录放入队列，格式化留给写文件的后台线程（可变的参数先换成文本）"""
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        _snapshot_args(record)
+        return record
+
+
+_buffer: Optional[RingBufferHandler] = None
+_listener: Optional[logging.handlers.QueueListener] = None
+_dump_lock = threading.Lock()
+
+
+def log_dir() -> str:
+    return os.path.join(config.DATA_DIR, config.LOG_DIR_NAME)
+
+
+def setup_logging(console: bool = True):
+    """配置日志（程序启动时调用一次）"""
+    global _buffer, _listener
+    if _listener is not None:
+        return
+    os.makedirs(log_dir(), exist_ok=True)
+
+    file_handler = logging.handlers.RotatingFileHandler(
+        os.path.join(log_dir(), config.LOG_FILE), maxBytes=config.LOG_MAX_BYTES,
+        backupCount=config.LOG_BACKUP_COUNT, encoding='utf-8'
+    )
+    file_handler.setFormatter(JsonFormatter())
+    handlers: List[logging.Handler] = [file_handler]
+    # 打包后的窗口程序没有标准错误
+    if console and sys.stderr is not None:
+        console_handler = logging.StreamHandler(sys.stderr)
+        console_handler.setFormatter(logging.Formatter("%(message)s"))
+        handlers.append(console_handler)
+    _listener = logging.handlers.QueueListener(queue.SimpleQueue(), *handlers)
+
+    queue_handler = _LazyQueueHandler(_listener.queue)
+    queue_handler.setLevel(config.LOG_LEVEL)
+    _buffer = RingBufferHandler(config.LOG_BUFFER_SIZE)
+
+    # 不收集用不到的进程信息，减少每条记录的开销
+    logging.logProcesses = False
+    logging.logMultiprocessing = False
+    root = logging.getLogger()
+    root.setLevel(logging.DEBUG)
+    root.addHandler(_buffer)
+    root.addHandler(queue_handler)
+    _listener.start()
+    atexit.register(shutdown_logging)
+
+
+def shutdown_logging():
+    """写完队列中的记录（退出时调用）"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+def recent_records() -> List[logging.LogRecord]:
+    """环形缓冲区中的记录（从旧到新）"""
+    return list(_buffer.records) if _buffer is not None else []
+
+
+def dump_recent(reason: str = "") -> Optional[str]:
+    """把环形缓冲区写到 data/logs/dump-时间.log，返回文件路径
+
+    在出错的线程中同步写入，不经过后台线程（程序可能马上退出）。
+    """
+    records = recent_records()
+    if not records:
+        return None
+    formatter = JsonFormatter()
+    try:
+        # 同一秒内的多次转储不会互相覆盖
+        with _dump_lock, create_unique(log_dir(), f"dump-{datetime.now():%Y%m%d-%H%M%S}",
+                                       ".log") as f:
+            path = f.name
+            if reason:
+                f.write(json.dumps({'reason': reason}, ensure_ascii=False) + "\n")
+            for record in records:
+                f.write(formatter.format(record) + "\n")
+    except OSError:
+        return None
+    return path
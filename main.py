@@ -1,29 +1,77 @@
 import sys
 import os
+import time
 import ctypes
-from PyQt5.QtWidgets import QApplication, QMessageBox
-from PyQt5.QtCore import Qt
-from PyQt5.QtGui import QFontDatabase
+import logging
+import argparse
+import multiprocessing
+
+# 启动时间测试：窗口显示后输出时间并退出（见 tools/startup_bench.py）
+STARTUP_PROBE = bool(os.environ.get("STICKYNOTES_STARTUP_PROBE"))
 
 # 添加当前目录到Python路径
 current_dir = os.path.dirname(os.path.abspath(__file__))
 sys.path.insert(0, current_dir)
 
-# 现在导入其他模块
-try:
-    from config import config
-    from note_manager import NoteManager, RepeatType
-    from widgets.main_window import MainWindow
-    from widgets.note_widget import NoteWidget
-    from widgets.time_picker import TimePicker, CompactTimePicker
-    print("所有模块导入成功！")
-except ImportError as e:
-    print(f"导入错误: {e}")
-    print("当前目录:", current_dir)
-    print("文件列表:", os.listdir(current_dir))
-    if os.path.exists(os.path.join(current_dir, 'widgets')):
-        print("widgets目录内容:", os.listdir(os.path.join(current_dir, 'widgets')))
-    sys.exit(1)
+log = logging.getLogger("main")
+
+def parse_args(argv=None):
+    """解析命令行参数，返回 (参数, 其余的参数)
+
+    其余的参数（例如 Qt 的 -style fusion）交给 QApplication。
+    """
+    parser = argparse.ArgumentParser(description="桌面便签")
+    parser.add_argument("--headless", action="store_true",
+                        help="无界面模式：只运行提醒调度，不创建窗口")
+    parser.add_argument("--notify", action="append", default=[], metavar="SINK",
+                        help="无界面模式的通知输出，可多次指定: "
+                             "stdout、log:文件路径、command:命令（默认 stdout）")
+    parser.add_argument("--record", metavar="PATH",
+                        help="把匿名的操作记录写入文件，用 tools/replay.py 回放测试性能")
+    return parser.parse_known_args(argv)
+
+# 进程池的工作进程（spawn，见 jobs.py）会以 __mp_main__ 的名义重新执行本模块的
+# 顶层代码；界面和笔记管理器（导入时加载笔记文件）只在主进程中导入
+if __name__ == "__main__":
+    # 打包后的程序启动工作进程时在这里转为执行任务，不再继续导入
+    multiprocessing.freeze_support()
+    
+    # 在导入其他模块之前解析参数：无界面模式不导入 PyQt5.QtWidgets，以减少
+    # 启动时间和内存占用
+    ARGS, QT_ARGS = parse_args()
+    HEADLESS = ARGS.headless
+    
+    if not HEADLESS:
+        from PyQt5.QtWidgets import QApplication, QMessageBox
+        from PyQt5.QtCore import Qt, QTimer
+        from PyQt5.QtGui import QFontDatabase
+    
+    # 现在导入其他模块
+    try:
+        from config import config
+        from logs import setup_logging, dump_recent
+        # 在加载笔记之前配置日志（日志写入 data/logs/，打包后的窗口程序没有控制台）
+        setup_logging()
+        from clock import get_clock
+        from note_manager import NoteManager, RepeatType, note_manager
+        if HEADLESS:
+            from headless import run_headless
+        else:
+            from ipc import IpcServer, send_commands
+            from boards import load_boards
+            from widgets.main_window import MainWindow
+            from widgets.board_manager import BoardManager
+            from widgets.note_widget import NoteWidget
+            from widgets.time_picker import TimePicker
+        log.debug("所有模块导入成功")
+    except ImportError as e:
+        # 日志可能还没有配置，此时 error 级别仍会输出到标准错误
+        log.error("导入错误: %s", e)
+        log.error("当前目录: %s", current_dir)
+        log.error("文件列表: %s", os.listdir(current_dir))
+        if os.path.exists(os.path.join(current_dir, 'widgets')):
+            log.error("widgets目录内容: %s", os.listdir(os.path.join(current_dir, 'widgets')))
+        sys.exit(1)
 
 def setup_environment():
     """设置应用环境"""
@@ -39,6 +87,24 @@ def setup_environment():
     os.makedirs("data", exist_ok=True)
     os.makedirs("assets/icons", exist_ok=True)
 
+def setup_clock(app):
+    """将时钟服务接入Qt事件循环"""
+    clock = get_clock()
+    # 同一轮事件循环内只读取一次系统时间
+    clock.set_tick_scheduler(lambda callback: QTimer.singleShot(0, callback))
+    
+    # 定时检查分钟/日期变化
+    app.clock_timer = QTimer()
+    app.clock_timer.timeout.connect(clock.tick)
+    app.clock_timer.start(config.CHECK_INTERVAL)
+
+def setup_startup_probe(app):
+    """第一轮事件循环（窗口已显示）后输出单调时钟时间并退出"""
+    def report():
+        print(f"STARTUP_SHOWN {time.monotonic():.6f}", flush=True)
+        app.quit()
+    QTimer.singleShot(0, report)
+
 def load_fonts():
     """加载字体（如果需要）"""
     pass
@@ -49,24 +115,44 @@ def handle_exception(exc_type, exc_value, exc_traceback):
         sys.__excepthook__(exc_type, exc_value, exc_traceback)
         return
     
-    print(f"未处理的异常: {exc_type.__name__}: {exc_value}")
+    log.critical("未处理的异常: %s: %s", exc_type.__name__, exc_value,
+                 exc_info=(exc_type, exc_value, exc_traceback))
+    # 保存出错之前的日志，事后可以查看
+    dump_path = dump_recent(f"{exc_type.__name__}: {exc_value}")
+    if HEADLESS:
+        return
     error_msg = f"发生了一个错误:\n\n{exc_type.__name__}: {exc_value}"
+    if dump_path:
+        error_msg += f"\n\n最近的日志已保存到 {os.path.abspath(dump_path)}"
     QMessageBox.critical(None, "应用程序错误", error_msg)
 
 def main():
     """主函数"""
+    args = ARGS
+    
     # 设置全局异常处理
     sys.excepthook = handle_exception
     
     # 设置环境
     setup_environment()
     
+    if args.headless:
+        return run_headless(args.notify)
+    
+    # 已有实例在运行时，通知它显示窗口后立即退出（启动时间测试时不检查）
+    if not STARTUP_PROBE and send_commands([{'cmd': 'show'}]) is not None:
+        log.info("桌面便签已在运行")
+        return 0
+    
     # 创建QApplication
-    app = QApplication(sys.argv)
+    app = QApplication(sys.argv[:1] + QT_ARGS)
     app.setApplicationName("桌面便签")
     app.setApplicationDisplayName("桌面便签")
     app.setQuitOnLastWindowClosed(False)
     
+    # 接入时钟服务
+    setup_clock(app)
+    
     # 加载字体
     load_fonts()
     
@@ -76,26 +162,46 @@ def main():
     if hasattr(Qt, 'AA_UseHighDpiPixmaps'):
         app.setAttribute(Qt.AA_UseHighDpiPixmaps, True)
     
+    # 环境变量 STICKYNOTES_PROFILE=sample/cprofile 时从启动开始性能分析
+    from profiler import profiler
+    if profiler.start_from_env():
+        app.aboutToQuit.connect(profiler.stop)
+    
     try:
-        # 创建并显示主窗口
-        print("正在创建主窗口...")
-        window = MainWindow()
-        window.show()
+        # 创建并显示所有便签板（共享存储、提醒调度和通知队列）
+        log.info("正在创建主窗口...")
+        board_manager = BoardManager(load_boards())
+        board_manager.show()
+        
+        if args.record:
+            from recorder import recorder
+            recorder.start(args.record)
+            app.aboutToQuit.connect(recorder.stop)
+        
+        # 启动本地IPC服务（单实例 + 命令行客户端），
+        # 命令造成的修改经存储的变化通知直接更新各个便签板
+        ipc_server = IpcServer(note_manager)
+        if not ipc_server.start():
+            log.warning("本地IPC服务启动失败")
+        ipc_server.show_requested.connect(board_manager.bring_to_front)
+        ipc_server.capture_requested.connect(board_manager.quick_capture.open)
+        
+        if STARTUP_PROBE:
+            setup_startup_probe(app)
         
-        print("桌面便签应用已启动！")
-        print("使用说明:")
-        print("- 点击标题栏的 '_' 按钮可以最小化窗口")
-        print("- 点击 '×' 按钮可以隐藏到系统托盘")
-        print("- 在系统托盘图标上双击可以显示/隐藏窗口")
-        print("- 右键点击系统托盘图标可以退出应用")
+        log.info("桌面便签应用已启动！")
+        log.info("使用说明:\n"
+                 "- 点击标题栏的 '_' 按钮可以最小化窗口\n"
+                 "- 点击 '×' 按钮可以隐藏到系统托盘\n"
+                 "- 在系统托盘图标上双击可以显示/隐藏窗口\n"
+                 "- 右键点击系统托盘图标可以退出应用")
         
         # 运行应用
         return app.exec_()
         
     except Exception as e:
-        print(f"启动应用时发生错误: {e}")
-        import traceback
-        traceback.print_exc()
+        log.exception("启动应用时发生错误")
+        dump_recent(f"启动应用时发生错误: {e}")
         QMessageBox.critical(None, "启动错误", f"无法启动应用:\n\n{str(e)}")
         return 1
 
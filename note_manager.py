@@ -1,185 +1,740 @@
 import json
-from datetime import datetime, timedelta
-from typing import List, Dict, Any, Optional
+import time
+import logging
+from bisect import bisect_left, bisect_right, insort
+from collections import OrderedDict, deque
+from contextlib import contextmanager
+from dataclasses import dataclass
+from datetime import datetime
+from itertools import accumulate
+from typing import List, Dict, Any, Callable, Iterable, Optional, Tuple
 from enum import Enum
 from config import config
+from clock import get_clock
+from events import Signal
+from recurrence import RepeatType, next_occurrence
+from rwlock import ReadWriteLock
+from blobs import blob_store, write_atomic
+import threading
+import queue
 import os
 
-class RepeatType(Enum):
-    """重复类型枚举"""
-    NONE = "不重复"
-    DAILY = "每天"
-    WEEKDAYS = "每个工作日"
-    WEEKLY = "每周"
-    MONTHLY = "每月"
-    YEARLY = "每年"
+log = logging.getLogger(__name__)
+
+class ChangeKind(Enum):
+    """数据变化类型"""
+    ADDED = "added"
+    UPDATED = "updated"
+    COMPLETED = "completed"
+    DELETED = "deleted"
+    RELOADED = "reloaded"  # 从文件重新加载，需要重新读取全部数据
+
+@dataclass(frozen=True)
+class ChangeEvent:
+    """一次数据变化"""
+    revision: int
+    kind: ChangeKind
+    note_ids: Tuple[int, ...]
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """转换为字典用于序列化"""
+        return {'revision': self.revision, 'kind': self.kind.value,
+                'note_ids': list(self.note_ids)}
+
+def _delta_encode(values: List[int]) -> List[int]:
+    """升序整数列表 -> 第一个值和之后的差值（连续的日期每项只占一两个字节）"""
+    return values[:1] + [b - a for a, b in zip(values, values[1:])]
 
 class Note:
-    """笔记数据类"""
+    """笔记数据类
+    
+    超过 BLOB_THRESHOLD 的长内容保存在长内容存储中，笔记只保留哈希
+    （content_hash）和预览（preview），读取 content 时才加载全文。
+    从文件加载长内容笔记时，content 参数为预览。
+    
+    重复笔记是一个系列：due_date 是当前这一次的到期时间，完成时原地推进
+    到下一次，不生成新笔记。cursor 是这一次按重复规则的时间（这一次被
+    改期时与 due_date 不同）；done_days 是已完成的各次的日期（toordinal，
+    升序），之前没有完成的各次视为跳过；overrides 是单独改期的各次
+    （按规则的时间 -> 改期后的时间）。每月/每年的系列在短的月份取月末时，
+    anchor_day 记下原本的日期（例如31日、2月29日），之后的各次由它推算；
+    与 cursor 的日期相同时为 None。
+    """
+    
+    # 没有历史和改期时共享的默认值，修改时替换为笔记自己的列表/字典
+    done_days = ()
+    overrides = {}
+    
     def __init__(self, 
                  content: str = "",
                  due_date: Optional[datetime] = None,
                  repeat_type: RepeatType = RepeatType.NONE,
                  note_id: Optional[int] = None,
                  created_at: Optional[datetime] = None,
-                 is_completed: bool = False):
+                 is_completed: bool = False,
+                 board: str = "",
+                 content_hash: Optional[str] = None,
+                 cursor: Optional[datetime] = None,
+                 done_days: Optional[List[int]] = None,
+                 overrides: Optional[Dict[datetime, datetime]] = None,
+                 anchor_day: Optional[int] = None):
         
         self.id = note_id
-        self.content = content
-        self.due_date = due_date or datetime.now().replace(second=0, microsecond=0)
+        if content_hash:
+            self.content_hash = content_hash
+            self.preview = content
+            self._content = None
+        else:
+            self.content = content
+        now = get_clock().now()
+        self.due_date = due_date or now.replace(second=0, microsecond=0)
         self.repeat_type = repeat_type
-        self.created_at = created_at or datetime.now()
+        self.created_at = created_at or now
         self.is_completed = is_completed
+        self.board = board  # 所属便签板，空字符串表示不属于特定便签板
+        self.cursor = cursor or self.due_date
+        self.anchor_day = anchor_day
+        if done_days:
+            self.done_days = done_days
+        if overrides:
+            self.overrides = overrides
+    
+    @property
+    def content(self) -> str:
+        """完整内容（长内容从长内容存储中读取）"""
+        if self._content is not None:
+            return self._content
+        try:
+            return blob_store.get(self.content_hash)
+        except OSError as e:
+            log.error("读取笔记内容失败: %s", e, extra={'note_id': self.id})
+            return self.preview
+    
+    @content.setter
+    def content(self, text: str):
+        if len(text) > config.BLOB_THRESHOLD:
+            self.content_hash = blob_store.put(text)
+            self.preview = text[:config.BLOB_PREVIEW_LENGTH]
+            self._content = None
+        else:
+            self.content_hash = None
+            self.preview = text
+            self._content = text
     
     def to_dict(self) -> Dict[str, Any]:
-        """转换为字典用于序列化"""
-        return {
+        """转换为字典用于序列化（长内容只保存预览和哈希）"""
+        data = {
             'id': self.id,
-            'content': self.content,
+            'content': self.preview,
             'due_date': self.due_date.isoformat(),
             'repeat_type': self.repeat_type.value,
             'created_at': self.created_at.isoformat(),
-            'is_completed': self.is_completed
+            'is_completed': self.is_completed,
+            'board': self.board
         }
+        if self.content_hash:
+            data['content_hash'] = self.content_hash
+        if self.cursor != self.due_date:
+            data['cursor'] = self.cursor.isoformat()
+        if self.anchor_day:
+            data['anchor'] = self.anchor_day
+        if self.done_days:
+            data['done'] = _delta_encode(self.done_days)
+        if self.overrides:
+            data['overrides'] = {rule.isoformat(): due.isoformat()
+                                 for rule, due in self.overrides.items()}
+        return data
     
     @classmethod
     def from_dict(cls, data: Dict[str, Any]) -> 'Note':
-        """从字典创建Note实例"""
+        """从字典创建Note实例（兼容没有系列字段的旧数据）"""
+        overrides = data.get('overrides')
         return cls(
             note_id=data['id'],
             content=data['content'],
             due_date=datetime.fromisoformat(data['due_date']),
             repeat_type=RepeatType(data['repeat_type']),
             created_at=datetime.fromisoformat(data['created_at']),
-            is_completed=data['is_completed']
+            is_completed=data['is_completed'],
+            board=data.get('board', ''),
+            content_hash=data.get('content_hash'),
+            cursor=datetime.fromisoformat(data['cursor']) if 'cursor' in data else None,
+            done_days=list(accumulate(data['done'])) if data.get('done') else None,
+            overrides={datetime.fromisoformat(rule): datetime.fromisoformat(due)
+                       for rule, due in overrides.items()} if overrides else None,
+            anchor_day=data.get('anchor')
         )
 
+def _check_due_date(due_date: datetime):
+    """到期时间必须是不带时区的本地时间，否则无法与其他笔记的时间比较和排序"""
+    if not isinstance(due_date, datetime) or due_date.tzinfo is not None:
+        raise ValueError(f"到期时间必须是不带时区的本地时间: {due_date!r}")
+
+def _remove_key(keys: List[Tuple[datetime, int]], key: Tuple[datetime, int]):
+    """从有序键列表中删除一个键（不存在时忽略）"""
+    index = bisect_left(keys, key)
+    if index < len(keys) and keys[index] == key:
+        del keys[index]
+
 class NoteManager:
-    """笔记管理器"""
+    """笔记管理器
     
-    def __init__(self):
+    可以在多个线程中使用：读取（查询、快照、变化记录）持有读锁，可以同时
+    进行；修改持有写锁，同一时间只有一个。写文件和发射变化信号在释放写锁
+    之后进行，读取不需要等待保存。changed 信号在修改数据的线程中发射；
+    设置了 set_dispatcher 时，其他线程的修改交给界面线程发射（视图只在
+    界面线程中更新）。
+    """
+    
+    def __init__(self, persistent: bool = True):
+        # persistent 为 False 时只在内存中保存，不读写文件（用于模拟和测试）
+        self.persistent = persistent
         self.notes: List[Note] = []
         self._next_id = 1
-        self.load_notes()
+        self._lock = ReadWriteLock()
+        self._batch_depth = 0  # 以下状态只在持有写锁时修改
+        self._save_pending = False
+        self._background_save = False
+        self._save_lock = threading.Lock()  # 保证按版本顺序写文件
+        self._saved_revision = -1
+        self._save_queue: 'queue.Queue[int]' = queue.Queue()  # 等待后台保存的版本号
+        self._save_worker: Optional[threading.Thread] = None
+        
+        # 存储版本号：每次修改加一，查询缓存以此判断是否失效
+        self.revision = 0
+        
+        # 数据变化信号，参数为 ChangeEvent 列表；批量修改期间合并，结束时发射一次
+        self.changed = Signal()
+        self._pending_changes: List[ChangeEvent] = []
+        self._dispatcher: Optional[Callable[[Callable], None]] = None
+        self._dispatch_thread: Optional[int] = None
+        
+        # 最近的变化记录，供 changes_since 查询；_log_base 之后的变化都在记录中
+        self.change_log: 'deque[ChangeEvent]' = deque(maxlen=config.CHANGE_LOG_SIZE)
+        self._log_base = 0
+        
+        # 索引：ID -> 笔记，按 (到期时间, ID) 排序的键（全部笔记 / 未完成笔记）
+        self._by_id: Dict[int, Note] = {}
+        self._due_keys: List[Tuple[datetime, int]] = []
+        self._open_keys: List[Tuple[datetime, int]] = []
+        
+        # 查询缓存（版本号变化时整体清空；多个读者同时查询时由 _cache_lock 保护）
+        self._cache_lock = threading.Lock()
+        self._cache_revision = -1
+        self._filter_cache: Dict[tuple, Tuple[List[Note], List[Tuple[datetime, int]]]] = {}
+        self._query_cache: 'OrderedDict[tuple, List[Note]]' = OrderedDict()
+        
+        if persistent:
+            self.load_notes()
+    
+    def _touch(self, kind: ChangeKind, *note_ids: int):
+        """标记数据已修改：分配新的版本号，记录并通知变化"""
+        self.revision += 1
+        event = ChangeEvent(self.revision, kind, note_ids)
+        if kind == ChangeKind.RELOADED:
+            # 重新加载之前的变化已无法增量应用
+            self.change_log.clear()
+            self._log_base = self.revision
+        else:
+            if len(self.change_log) == self.change_log.maxlen:
+                self._log_base = self.change_log[0].revision
+            self.change_log.append(event)
+        self._pending_changes.append(event)
+    
+    def changes_since(self, revision: int) -> Optional[List[ChangeEvent]]:
+        """获取某个版本号之后的变化
+        
+        落后太多（变化记录已被淘汰，或期间从文件重新加载过）时返回 None，
+        调用方应改用 snapshot() 重新读取全部数据。
+        """
+        with self.reading():
+            if revision < self._log_base or revision > self.revision:
+                return None
+            return [event for event in self.change_log if event.revision > revision]
+    
+    def snapshot(self) -> Tuple[int, List[Note]]:
+        """获取当前版本号和全部笔记"""
+        with self.reading():
+            return self.revision, list(self.notes)
+    
+    @contextmanager
+    def reading(self):
+        """持有读锁：期间的多次读取看到同一个版本"""
+        self._lock.acquire_read()
+        try:
+            yield self
+        finally:
+            self._lock.release_read()
+    
+    def _rebuild_indexes(self):
+        """重建所有索引"""
+        self._by_id = {note.id: note for note in self.notes}
+        self._due_keys = sorted((note.due_date, note.id) for note in self.notes)
+        self._open_keys = [key for key in self._due_keys
+                           if not self._by_id[key[1]].is_completed]
+    
+    def _index_note(self, note: Note):
+        """将笔记加入索引"""
+        self._by_id[note.id] = note
+        key = (note.due_date, note.id)
+        self._due_keys.insert(bisect_left(self._due_keys, key), key)
+        if not note.is_completed:
+            self._open_keys.insert(bisect_left(self._open_keys, key), key)
+    
+    def _unindex_note(self, note: Note):
+        """从索引中移除笔记（需在修改到期时间之前调用）"""
+        self._by_id.pop(note.id, None)
+        key = (note.due_date, note.id)
+        _remove_key(self._due_keys, key)
+        _remove_key(self._open_keys, key)
+    
+    def get_note(self, note_id: int) -> Optional[Note]:
+        """按ID获取笔记"""
+        with self.reading():
+            return self._by_id.get(note_id)
     
-    def add_note(self, content: str, due_date: datetime, repeat_type: RepeatType) -> Note:
+    def open_count(self) -> int:
+        """未完成笔记的数量"""
+        with self.reading():
+            return len(self._open_keys)
+    
+    def add_note(self, content: str, due_date: datetime, repeat_type: RepeatType,
+                 board: str = "") -> Note:
         """添加新笔记"""
+        _check_due_date(due_date)
         # 验证日期只能是今天或未来
-        from datetime import datetime as PyDateTime
-        if due_date.date() < PyDateTime.now().date():
+        if due_date.date() < get_clock().today():
             raise ValueError("只能记录今天和未来的事项")
         
-        note = Note(
+        return self._insert(Note(
             content=content,
             due_date=due_date,
             repeat_type=repeat_type,
-            note_id=self._next_id
-        )
-        
-        self.notes.append(note)
-        self._next_id += 1
-        self.save_notes()
+            board=board
+        ))
+    
+    def _insert(self, note: Note) -> Note:
+        """分配ID并保存新笔记"""
+        # 先检查再修改，加入索引时不会因为无法比较的时间失败而留下一半的修改
+        _check_due_date(note.due_date)
+        with self.batch():
+            note.id = self._next_id
+            self._next_id += 1
+            self.notes.append(note)
+            self._index_note(note)
+            self._touch(ChangeKind.ADDED, note.id)
+            self.save_notes()
         return note
     
+    def add_notes(self, notes: List[Note]) -> List[Note]:
+        """批量保存新笔记（例如导入），先检查所有笔记的日期再修改
+        
+        索引各合并一次，不需要逐条插入有序列表。
+        """
+        if not notes:
+            return notes
+        for note in notes:
+            _check_due_date(note.due_date)
+        with self.batch():
+            first_id = self._next_id
+            for offset, note in enumerate(notes):
+                note.id = first_id + offset
+            new_keys = sorted((note.due_date, note.id) for note in notes)
+            due_keys = sorted(self._due_keys + new_keys)
+            open_keys = sorted(self._open_keys + [
+                (note.due_date, note.id) for note in notes if not note.is_completed
+            ])
+            # 排好序后再一起提交，中途失败时不会留下一半的修改
+            self._next_id = first_id + len(notes)
+            self._by_id.update((note.id, note) for note in notes)
+            self.notes.extend(notes)
+            self._due_keys = due_keys
+            self._open_keys = open_keys
+            self._touch(ChangeKind.ADDED, *(note.id for note in notes))
+            self.save_notes()
+        return notes
+    
+    def update_note(self, note_id: int, content: Optional[str] = None,
+                    due_date: Optional[datetime] = None,
+                    repeat_type: Optional[RepeatType] = None) -> bool:
+        """修改笔记内容、提醒时间或重复规则"""
+        # 先检查再修改，加入索引时不会因为无法比较的时间失败而留下一半的修改
+        if due_date is not None:
+            _check_due_date(due_date)
+        with self.batch():
+            note = self._by_id.get(note_id)
+            if note is None:
+                return False
+            
+            if content is not None:
+                note.content = content
+            if repeat_type is not None and repeat_type != note.repeat_type:
+                note.repeat_type = repeat_type
+                note.anchor_day = None
+            if due_date is not None and due_date != note.due_date:
+                # 重复笔记从新的时间开始重复（之后的各次随之移动）
+                self._unindex_note(note)
+                if note.overrides:
+                    note.overrides = {rule: due for rule, due in note.overrides.items()
+                                      if rule != note.cursor}
+                note.due_date = note.cursor = due_date
+                note.anchor_day = None
+                self._index_note(note)
+            
+            self._touch(ChangeKind.UPDATED, note_id)
+            self.save_notes()
+        return True
+    
     def delete_note(self, note_id: int) -> bool:
         """删除笔记"""
-        initial_length = len(self.notes)
-        self.notes = [note for note in self.notes if note.id != note_id]
-        
-        if len(self.notes) != initial_length:
+        with self.batch():
+            note = self._by_id.get(note_id)
+            if note is None:
+                return False
+            
+            self.notes.remove(note)
+            self._unindex_note(note)
+            self._touch(ChangeKind.DELETED, note_id)
             self.save_notes()
-            return True
-        return False
+        return True
+    
+    def delete_notes(self, note_ids: Iterable[int], save: bool = True) -> int:
+        """批量删除笔记，返回删除的数量
+        
+        列表和索引各重建一次，删除大量笔记时不需要逐条在列表中查找。
+        save 为 False 时不保存，由调用方稍后保存（例如分多步删除后只保存一次）。
+        """
+        with self.batch():
+            removed = {note_id for note_id in note_ids if note_id in self._by_id}
+            if not removed:
+                return 0
+            
+            self.notes = [note for note in self.notes if note.id not in removed]
+            for note_id in removed:
+                del self._by_id[note_id]
+            self._due_keys = [key for key in self._due_keys if key[1] not in removed]
+            self._open_keys = [key for key in self._open_keys if key[1] not in removed]
+            self._touch(ChangeKind.DELETED, *sorted(removed))
+            if save:
+                self.save_notes()
+        return len(removed)
     
     def mark_completed(self, note_id: int) -> bool:
-        """标记笔记为完成"""
-        for note in self.notes:
-            if note.id == note_id:
+        """标记笔记为完成
+        
+        重复笔记只记下这一次的日期并推进到下一次，仍是同一条未完成的笔记；
+        已完成的笔记不能再次完成。
+        """
+        with self.batch():
+            note = self._by_id.get(note_id)
+            if note is None or note.is_completed:
+                return False
+            
+            if note.repeat_type == RepeatType.NONE:
+                _remove_key(self._open_keys, (note.due_date, note.id))
                 note.is_completed = True
-                
-                # 处理重复任务
-                if note.repeat_type != RepeatType.NONE:
-                    new_due_date = self._calculate_next_occurrence(
-                        note.due_date, note.repeat_type
-                    )
-                    self.add_note(note.content, new_due_date, note.repeat_type)
-                
-                self.save_notes()
-                return True
-        return False
+            else:
+                day = note.cursor.toordinal()
+                if not note.done_days:
+                    note.done_days = [day]
+                elif note.done_days[-1] < day:
+                    note.done_days.append(day)
+                elif day not in note.done_days:
+                    insort(note.done_days, day)
+                self._unindex_note(note)
+                self._advance(note)
+                self._index_note(note)
+            
+            self._touch(ChangeKind.COMPLETED, note_id)
+            self.save_notes()
+        return True
     
-    def get_pending_notes(self) -> List[Note]:
-        """获取待处理的笔记（今天和未来的未完成事项）"""
-        now = datetime.now()
-        pending_notes = []
+    def _advance(self, note: Note):
+        """把系列推进到下一次；过期后才完成时跳过已经过去的各次，从今天或以后的一次开始"""
+        anchor_day = note.anchor_day or note.cursor.day
+        cursor = self.next_occurrence(note.cursor, note.repeat_type, anchor_day)
+        today = get_clock().today()
+        while cursor.date() < today:
+            cursor = self.next_occurrence(cursor, note.repeat_type, anchor_day)
+        # 只有每月/每年的系列在短的月份取月末时与原本的日期不同
+        if note.repeat_type in (RepeatType.MONTHLY, RepeatType.YEARLY) and cursor.day != anchor_day:
+            note.anchor_day = anchor_day
+        else:
+            note.anchor_day = None
+        if note.overrides:
+            note.overrides = {rule: due for rule, due in note.overrides.items() if rule >= cursor}
+        note.cursor = cursor
+        note.due_date = note.overrides.get(cursor, cursor)
+    
+    def reschedule_occurrence(self, note_id: int, due_date: datetime) -> bool:
+        """只修改重复笔记当前这一次的时间，之后的各次不变"""
+        _check_due_date(due_date)
+        if due_date.date() < get_clock().today():
+            raise ValueError("只能记录今天和未来的事项")
+        with self.batch():
+            note = self._by_id.get(note_id)
+            if note is None or note.is_completed or note.repeat_type == RepeatType.NONE:
+                return False
+            
+            self._unindex_note(note)
+            overrides = dict(note.overrides)
+            if due_date == note.cursor:
+                overrides.pop(note.cursor, None)
+            else:
+                overrides[note.cursor] = due_date
+            note.overrides = overrides
+            note.due_date = due_date
+            self._index_note(note)
+            self._touch(ChangeKind.UPDATED, note_id)
+            self.save_notes()
+        return True
+    
+    def query(self,
+              start: Optional[datetime] = None,
+              end: Optional[datetime] = None,
+              repeat: Optional[RepeatType] = None,
+              completed: Optional[bool] = None,
+              text: Optional[str] = None,
+              limit: Optional[int] = None) -> List[Note]:
+        """组合查询笔记，结果按到期时间排序
         
-        for note in self.notes:
-            if not note.is_completed and note.due_date >= now:
-                pending_notes.append(note)
+        start/end 为到期时间范围（都包含），其余条件为 None 时不筛选，
+        text 不区分大小写匹配内容。结果按存储版本号缓存，数据不变时重复的
+        相同查询直接返回缓存；时间范围在缓存的筛选结果上二分查找。
+        返回的列表是共享的缓存，调用方不要修改。
+        只按完成状态和时间范围查询时直接在有序索引上二分，不需要筛选全部笔记。
+        """
+        self._lock.acquire_read()
+        try:
+            return self._query(start, end, repeat, completed, text, limit)
+        finally:
+            self._lock.release_read()
+    
+    def _query(self, start, end, repeat, completed, text, limit) -> List[Note]:
+        key = (start, end, repeat, completed, text, limit)
+        with self._cache_lock:
+            if self._cache_revision != self.revision:
+                self._cache_revision = self.revision
+                self._filter_cache.clear()
+                self._query_cache.clear()
+            result = self._query_cache.get(key)
+            if result is not None:
+                self._query_cache.move_to_end(key)
+                return result
+        
+        if repeat is None and text is None and completed is not True:
+            keys = self._open_keys if completed is False else self._due_keys
+            notes = None
+        else:
+            notes, keys = self._filtered(repeat, completed, text)
+        low = bisect_left(keys, (start,)) if start is not None else 0
+        high = bisect_right(keys, (end, float('inf'))) if end is not None else len(keys)
+        if limit is not None:
+            high = min(high, low + limit)
+        if notes is None:
+            result = [self._by_id[note_id] for _, note_id in keys[low:high]]
+        else:
+            result = notes[low:high] if (low, high) != (0, len(notes)) else notes
+        
+        with self._cache_lock:
+            self._query_cache[key] = result
+            if len(self._query_cache) > config.QUERY_CACHE_SIZE:
+                self._query_cache.popitem(last=False)
+        return result
+    
+    def _filtered(self, repeat: Optional[RepeatType], completed: Optional[bool],
+                  text: Optional[str]) -> Tuple[List[Note], List[Tuple[datetime, int]]]:
+        """按非时间条件筛选（按到期时间排序），同一版本内缓存"""
+        key = (repeat, completed, text)
+        with self._cache_lock:
+            cached = self._filter_cache.get(key)
+        if cached is not None:
+            return cached
+        
+        needle = text.lower() if text else None
+        notes, keys = [], []
+        for due_key in self._due_keys:
+            note = self._by_id[due_key[1]]
+            if repeat is not None and note.repeat_type != repeat:
+                continue
+            if completed is not None and note.is_completed != completed:
+                continue
+            if needle and needle not in note.content.lower():
+                continue
+            notes.append(note)
+            keys.append(due_key)
         
-        # 按时间排序
-        pending_notes.sort(key=lambda x: x.due_date)
-        return pending_notes
+        with self._cache_lock:
+            self._filter_cache[key] = (notes, keys)
+        return notes, keys
+    
+    def get_pending_notes(self) -> List[Note]:
+        """获取待处理的笔记（今天和未来的未完成事项）"""
+        return self.query(start=get_clock().now(), completed=False)
+    
+    def get_open_notes(self) -> List[Note]:
+        """获取所有未完成的笔记（包括已过期的事项）"""
+        return self.query(completed=False)
     
     def get_due_notes(self) -> List[Note]:
         """获取到期的笔记（需要提醒的）"""
-        now = datetime.now()
-        return [note for note in self.get_pending_notes() 
-                if note.due_date <= now]
-    
-    def _calculate_next_occurrence(self, due_date: datetime, repeat_type: RepeatType) -> datetime:
-        """计算下一次发生的时间"""
-        if repeat_type == RepeatType.DAILY:
-            return due_date + timedelta(days=1)
-        elif repeat_type == RepeatType.WEEKDAYS:
-            # 跳过周末
-            next_date = due_date + timedelta(days=1)
-            while next_date.weekday() >= 5:  # 5=周六, 6=周日
-                next_date += timedelta(days=1)
-            return next_date
-        elif repeat_type == RepeatType.WEEKLY:
-            return due_date + timedelta(weeks=1)
-        elif repeat_type == RepeatType.MONTHLY:
-            # 下个月的同一天
-            year = due_date.year + (due_date.month // 12)
-            month = due_date.month % 12 + 1
-            try:
-                return due_date.replace(year=year, month=month)
-            except ValueError:
-                # 如果下个月没有这一天，则取最后一天
-                return due_date.replace(year=year, month=month, day=1) - timedelta(days=1)
-        elif repeat_type == RepeatType.YEARLY:
-            return due_date.replace(year=due_date.year + 1)
+        now = get_clock().now()
+        return self.query(start=now, end=now, completed=False)
+    
+    def next_occurrence(self, due_date: datetime, repeat_type: RepeatType,
+                        anchor_day: Optional[int] = None) -> datetime:
+        """计算下一次发生的时间（见 recurrence.next_occurrence）"""
+        return next_occurrence(due_date, repeat_type, anchor_day)
+    
+    @contextmanager
+    def batch(self, background_save: bool = False):
+        """批量修改：期间独占写锁，多次保存和变化通知合并为结束时的一次
+        
+        在释放写锁之后才写文件和发射变化信号，其他线程的读取不需要等待。
+        background_save 为 True 时由后台线程读取数据并写文件，调用方不等待
+        保存（变化信号仍在当前线程中发射）；嵌套时任何一层要求即可。
+        """
+        self._lock.acquire_write()
+        self._batch_depth += 1
+        if background_save:
+            self._background_save = True
+        save_data = None
+        background_revision = None
+        events = None
+        try:
+            yield self
+        finally:
+            self._batch_depth -= 1
+            if self._batch_depth == 0:
+                if self._save_pending and self._background_save:
+                    background_revision = self.revision
+                elif self._save_pending:
+                    save_data = (self.revision, [note.to_dict() for note in self.notes])
+                self._save_pending = self._background_save = False
+                events, self._pending_changes = self._pending_changes, []
+            self._lock.release_write()
+            if save_data is not None:
+                self._write_file(*save_data)
+            elif background_revision is not None:
+                self._queue_save(background_revision)
+            if events:
+                self._emit_changes(events)
+    
+    def set_dispatcher(self, dispatcher: Optional[Callable[[Callable], None]]):
+        """设置把变化信号交给界面线程的函数（需在界面线程中调用）
+        
+        dispatcher(callback) 需在界面线程中调用 callback，例如通过排队连接的
+        Qt 信号。界面线程中的修改仍然直接发射。
+        """
+        self._dispatcher = dispatcher
+        self._dispatch_thread = threading.get_ident()
+    
+    def _emit_changes(self, events: List[ChangeEvent]):
+        """发射变化信号（其他线程的修改交给界面线程）"""
+        if self._dispatcher is not None and threading.get_ident() != self._dispatch_thread:
+            self._dispatcher(lambda: self.changed.emit(events))
         else:
-            return due_date
+            self.changed.emit(events)
     
     def load_notes(self):
-        """从文件加载笔记"""
+        """从文件加载笔记（读取和解析文件时不持有写锁）"""
+        started = time.perf_counter()
+        notes = self._read_file()
+        log.info("已加载 %d 条笔记 (%.0f ms)", len(notes), (time.perf_counter() - started) * 1000,
+                 extra={'notes': len(notes)})
+        with self.batch():
+            self._replace(notes)
+    
+    def replace_notes(self, notes: List[Note]):
+        """整体替换全部笔记并保存（例如恢复备份）
+        
+        经正常的保存流程写文件：新的版本号更大，之前排队或正在写入的旧版本
+        的保存不会覆盖新的文件。
+        """
+        with self.batch():
+            self._replace(notes)
+            self.save_notes()
+    
+    def _replace(self, notes: List[Note]):
+        """替换全部笔记并重建索引（需持有写锁）"""
+        self.notes = notes
+        # 更新下一个ID：只增不减，恢复较早的备份后新笔记也不会重用之前用过的ID
+        # （变化记录、提醒记录和外部客户端可能仍引用那些ID）
+        if notes:
+            self._next_id = max(self._next_id, max(note.id for note in notes) + 1)
+        self._rebuild_indexes()
+        self._touch(ChangeKind.RELOADED)
+    
+    def _read_file(self) -> List[Note]:
+        """读取笔记文件"""
+        if not os.path.exists(config.notes_file_path):
+            return []
         try:
-            if not os.path.exists(config.notes_file_path):
-                self.notes = []
-                return
-                
             with open(config.notes_file_path, 'r', encoding='utf-8') as f:
                 data = json.load(f)
-                self.notes = [Note.from_dict(note_data) for note_data in data]
-                
-                # 更新下一个ID
-                if self.notes:
-                    self._next_id = max(note.id for note in self.notes) + 1
-                    
+            return [Note.from_dict(note_data) for note_data in data]
         except (FileNotFoundError, json.JSONDecodeError, KeyError) as e:
-            print(f"加载笔记失败: {e}")
-            self.notes = []
+            log.error("加载笔记失败: %s", e)
+            return []
     
     def save_notes(self):
-        """保存笔记到文件"""
-        try:
-            notes_data = [note.to_dict() for note in self.notes]
-            with open(config.notes_file_path, 'w', encoding='utf-8') as f:
-                json.dump(notes_data, f, ensure_ascii=False, indent=2)
-        except Exception as e:
-            print(f"保存笔记失败: {e}")
+        """保存笔记到文件（在批量修改结束时写入）"""
+        if not self.persistent:
+            return
+        with self.batch():
+            self._save_pending = True
+    
+    def _queue_save(self, revision: int):
+        """交给后台线程保存"""
+        self._save_queue.put(revision)
+        if self._save_worker is None or not self._save_worker.is_alive():
+            self._save_worker = threading.Thread(target=self._save_loop, name="save", daemon=True)
+            self._save_worker.start()
+    
+    def _save_loop(self):
+        """后台线程：在读锁下读取最新的数据并写文件，积压的多次保存合并为一次"""
+        while True:
+            count = 1
+            revision = self._save_queue.get()
+            while True:
+                try:
+                    revision = max(revision, self._save_queue.get_nowait())
+                    count += 1
+                except queue.Empty:
+                    break
+            try:
+                if revision > self._saved_revision:
+                    with self.reading():
+                        save_data = (self.revision, [note.to_dict() for note in self.notes])
+                    self._write_file(*save_data)
+            finally:
+                for _ in range(count):
+                    self._save_queue.task_done()
+    
+    def wait_saved(self):
+        """等待后台保存全部完成（例如退出前）"""
+        self._save_queue.join()
+    
+    def _write_file(self, revision: int, notes_data: List[Dict[str, Any]]):
+        """写入笔记文件；其他线程已经写入了更新的版本时跳过"""
+        with self._save_lock:
+            if revision <= self._saved_revision:
+                return
+            started = time.perf_counter()
+            try:
+                # 先写临时文件再替换，写入中途出错不会损坏原文件
+                write_atomic(config.notes_file_path,
+                             json.dumps(notes_data, ensure_ascii=False, indent=2))
+                self._saved_revision = revision
+            except Exception:
+                log.exception("保存笔记失败", extra={'revision': revision})
+                return
+            elapsed = (time.perf_counter() - started) * 1000
+            fields = {'revision': revision, 'notes': len(notes_data), 'ms': round(elapsed, 1)}
+            if elapsed > config.SLOW_SAVE_MS:
+                log.warning("保存笔记较慢: %d 条 %.0f ms", len(notes_data), elapsed, extra=fields)
+            else:
+                log.debug("已保存笔记", extra=fields)
 
 # 全局笔记管理器实例
 note_manager = NoteManager()
\ No newline at end of file
@@ -0,0 +1,64 @@
+import os
+import shlex
+import subprocess
+import sys
+
+from note_manager import Note
+
+
+class NotificationSink:
+    """通知输出基类"""
+
+    def notify(self, note: Note):
+        raise NotImplementedError
+
+
+class StdoutSink(NotificationSink):
+    """输出到标准输出"""
+
+    def notify(self, note: Note):
+        print(f"[{note.due_date.strftime('%Y-%m-%d %H:%M')}] 便签提醒: {note.content}", flush=True)
+
+
+class LogFileSink(NotificationSink):
+    """追加写入日志文件"""
+
+    def __init__(self, path: str):
+        self.path = path
+
+    def notify(self, note: Note):
+        with open(self.path, 'a', encoding='utf-8') as f:
+            f.write(f"{note.due_date.isoformat()}\t{note.id}\t{note.content}\n")
+
+
+class CommandSink(NotificationSink):
+    """调用外部命令（例如 notify-send、推送脚本）
+
+    笔记信息通过环境变量 NOTE_ID、NOTE_CONTENT、NOTE_DUE 传入，
+    命令不经过shell解析，不会受笔记内容影响。
+    """
+
+    def __init__(self, command: str):
+        self.args = shlex.split(command, posix=sys.platform != "win32")
+
+    def notify(self, note: Note):
+        env = dict(os.environ)
+        env.update({
+            'NOTE_ID': str(note.id),
+            'NOTE_CONTENT': note.content,
+            'NOTE_DUE': note.due_date.isoformat(),
+        })
+        # 不等待命令结束，避免阻塞调度
+        subprocess.Popen(self.args, env=env)
+
+
+def create_sink(spec: str) -> NotificationSink:
+    """根据描述创建通知输出: stdout、log:路径、command:命令"""
+    kind, _, value = spec.partition(':')
+    if kind == 'stdout':
+        return StdoutSink()
+    if kind == 'log' and value:
+        return LogFileSink(value)
+    if kind == 'command' and value:
+        return CommandSink(value)
+    raise ValueError(f"未知的通知输出: {spec}")
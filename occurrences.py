@@ -0,0 +1,185 @@
+import json
+from bisect import bisect_left, bisect_right
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Dict, List, NamedTuple, Tuple
+
+from config import config
+from events import Signal
+from note_manager import ChangeEvent, ChangeKind, Note, NoteManager, RepeatType, note_manager
+from recurrence import Times, expand_series
+
+
+class Occurrence(NamedTuple):
+    """笔记在某个时间的一次发生"""
+    when: datetime
+    note: Note
+    completed: bool
+
+
+Window = Tuple[datetime, datetime]
+
+
+class OccurrenceCache:
+    """重复规则展开缓存
+
+    把笔记按重复规则展开为时间窗口 [start, end) 内的每一次发生（日历视图
+    的一个月或一周）。展开结果按窗口缓存，超过 OCCURRENCE_CACHE_SIZE 个
+    窗口时淘汰最久未使用的。笔记修改时只重新展开该笔记，其余笔记的结果
+    保留，翻页回到看过的月份时不需要重新计算。预先展开（prefetch）在系列
+    很多时交给进程池，不占用界面线程。
+
+    重复笔记（系列）包括已完成的各次和从当前这一次开始的以后各次，单独
+    改期的各次显示在改期后的时间；不重复的笔记只在到期时间发生一次。
+    """
+
+    def __init__(self, manager: NoteManager):
+        self.manager = manager
+        self.changed = Signal()  # 缓存已按存储的变化更新
+        # 窗口 -> 笔记ID -> 窗口内的发生时间
+        self._windows: 'OrderedDict[Window, Dict[int, Times]]' = OrderedDict()
+        self._sorted: Dict[Window, List[Occurrence]] = {}  # 窗口 -> 排序后的结果
+        self._prefetching: Dict[Window, object] = {}  # 正在进程池中展开的窗口 -> 任务
+        manager.changed.connect(self.on_changed)
+
+    def occurrences(self, start: datetime, end: datetime) -> List[Occurrence]:
+        """窗口内的全部发生，按时间排序（返回的列表是共享的缓存，不要修改）"""
+        window = (start, end)
+        per_note = self._windows.get(window)
+        if per_note is None:
+            per_note = self._expand_window(start, end)
+            self._store(window, per_note)
+        else:
+            self._windows.move_to_end(window)
+
+        result = self._sorted.get(window)
+        if result is None:
+            result = []
+            for note_id, times in per_note.items():
+                note = self.manager.get_note(note_id)
+                result.extend(Occurrence(when, note, completed) for when, completed in times)
+            result.sort(key=lambda occurrence: (occurrence.when, occurrence.note.id))
+            self._sorted[window] = result
+        return result
+
+    def _store(self, window: Window, per_note: Dict[int, Times]):
+        """缓存一个窗口的展开结果，超过 OCCURRENCE_CACHE_SIZE 个窗口时淘汰最久未使用的"""
+        self._windows[window] = per_note
+        if len(self._windows) > config.OCCURRENCE_CACHE_SIZE:
+            evicted, _ = self._windows.popitem(last=False)
+            self._sorted.pop(evicted, None)
+
+    def _candidates(self, start: datetime, end: datetime) -> List[Note]:
+        """可能在窗口内发生的笔记：到期时间在窗口内的笔记，以及所有的系列
+        （以前完成的各次或以后的各次可能在窗口内）；调用方持有读锁"""
+        candidates = {note.id: note for note in self.manager.query(start=start, end=end)}
+        for repeat_type in RepeatType:
+            if repeat_type != RepeatType.NONE:
+                candidates.update((note.id, note) for note in
+                                  self.manager.query(repeat=repeat_type, completed=False))
+        return list(candidates.values())
+
+    def _expand_window(self, start: datetime, end: datetime) -> Dict[int, Times]:
+        """展开窗口内的所有笔记"""
+        with self.manager.reading():
+            per_note = {}
+            for note in self._candidates(start, end):
+                times = self._expand(note, start, end)
+                if times:
+                    per_note[note.id] = times
+        return per_note
+
+    def _expand(self, note: Note, start: datetime, end: datetime) -> Times:
+        """展开一条笔记在窗口内的 (发生时间, 是否已完成)"""
+        if note.repeat_type == RepeatType.NONE or note.is_completed:
+            when = note.due_date
+            return [(when, note.is_completed)] if start <= when < end else []
+        return expand_series(note.repeat_type, note.cursor, note.done_days, note.overrides,
+                             note.anchor_day, start, end)
+
+    def prefetch(self, start: datetime, end: datetime):
+        """预先展开一个窗口（已缓存或正在展开时不做任何事）
+
+        系列不少于 OCCURRENCE_OFFLOAD_SERIES 个时交给进程池展开：界面线程只
+        打包各系列在窗口内需要的数据，结果回到界面线程后放入缓存。展开期间
+        存储有变化时丢弃结果，之后用到这个窗口时再直接展开。
+        """
+        window = (start, end)
+        if window in self._windows or window in self._prefetching:
+            return
+        from jobs import ProcessJob, expand_occurrence_batch
+
+        with self.manager.reading():
+            revision = self.manager.revision
+            per_note, rows = {}, []
+            for note in self._candidates(start, end):
+                if note.repeat_type == RepeatType.NONE or note.is_completed:
+                    times = self._expand(note, start, end)
+                    if times:
+                        per_note[note.id] = times
+                    continue
+                first = bisect_left(note.done_days, start.toordinal())
+                last = bisect_right(note.done_days, end.toordinal())
+                rows.append([note.id, note.repeat_type.value, note.cursor.isoformat(),
+                             list(note.done_days[first:last]),
+                             [[rule.isoformat(), due.isoformat()]
+                              for rule, due in note.overrides.items()],
+                             note.anchor_day])
+        if len(rows) < config.OCCURRENCE_OFFLOAD_SERIES:
+            self.occurrences(start, end)
+            return
+
+        size = config.OCCURRENCE_BATCH_SERIES
+        batches = [json.dumps(rows[index:index + size], ensure_ascii=False,
+                              separators=(',', ':')).encode('utf-8')
+                   for index in range(0, len(rows), size)]
+
+        def merge(results: List[bytes]):
+            self._prefetching.pop(window, None)
+            if self.manager.revision != revision or window in self._windows:
+                return  # 展开期间有变化，或者这个窗口已经直接展开过
+            unit = timedelta(microseconds=1)
+            for result in results:
+                for note_id, done, *offsets in json.loads(result):
+                    per_note[note_id] = [(start + offset * unit, index < done)
+                                         for index, offset in enumerate(offsets)]
+            self._store(window, per_note)
+
+        job = ProcessJob(expand_occurrence_batch, batches, merge,
+                         args=(start.isoformat(), end.isoformat()))
+        job.failed.connect(lambda error: self._prefetching.pop(window, None))
+        self._prefetching[window] = job
+        job.start()
+
+    def on_changed(self, events: List[ChangeEvent]):
+        """存储变化时只重新展开变化的笔记"""
+        if any(event.kind == ChangeKind.RELOADED for event in events):
+            self.clear()
+        else:
+            note_ids = dict.fromkeys(note_id for event in events for note_id in event.note_ids)
+            for (start, end), per_note in self._windows.items():
+                touched = False
+                for note_id in note_ids:
+                    note = self.manager.get_note(note_id)
+                    times = self._expand(note, start, end) if note is not None else []
+                    if times:
+                        per_note[note_id] = times
+                        touched = True
+                    elif per_note.pop(note_id, None) is not None:
+                        touched = True
+                if touched:
+                    self._sorted.pop((start, end), None)
+        self.changed.emit()
+
+    def clear(self):
+        """清空缓存"""
+        self._windows.clear()
+        self._sorted.clear()
+
+    def cached_windows(self) -> List[Window]:
+        """已缓存的窗口（从最久未使用到最近使用）"""
+        return list(self._windows)
+
+
+# 全局展开缓存实例
+occurrence_cache = OccurrenceCache(note_manager)
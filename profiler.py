@@ -0,0 +1,284 @@
+"""运行中的性能分析
+
+在用户的机器上觉得卡顿时，不需要外部工具，从托盘菜单（或环境变量
+STICKYNOTES_PROFILE）开始分析，重现卡顿后停止，结果写入 data/profiles/：
+
+- profile-时间.folded  折叠栈（每行 "帧;帧;帧 权重"），可以直接交给
+  flamegraph.pl、speedscope 等生成火焰图；
+- profile-时间.txt     按模块汇总的主要耗时（PROFILE_MODULES 中的模块）。
+
+两种模式：
+- sample   后台线程每隔 PROFILE_SAMPLE_INTERVAL 毫秒读取 sys._current_frames()
+           记录所有线程的调用栈，开销很小，权重为采样次数；
+- cprofile 标准库的确定性分析，只记录开始分析的线程（界面线程），开销较大，
+           另外保存 profile-时间.prof 供 pstats 查看。cProfile 只记录直接的
+           调用关系，折叠栈中更深的调用路径按调用方的耗时比例估算，权重为微秒。
+"""
+import cProfile
+import logging
+import os
+import pstats
+import sys
+import threading
+from collections import Counter
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from blobs import create_unique
+from config import config
+
+log = logging.getLogger(__name__)
+
+MODES = ("sample", "cprofile")
+ENV_VAR = "STICKYNOTES_PROFILE"  # 值为模式名，启动时开始分析，退出时保存
+
+Stack = Tuple[str, ...]  # 从外到内的帧，每帧为 "模块:函数"
+
+
+def _module_of(filename: str, modules: Dict[str, str]) -> str:
+    """源文件 -> 模块名（找不到时用文件名）"""
+    return modules.get(filename) or os.path.splitext(os.path.basename(filename))[0]
+
+
+def _loaded_modules() -> Dict[str, str]:
+    """已加载模块的源文件 -> 模块名"""
+    modules = {}
+    for name, module in list(sys.modules.items()):
+        filename = getattr(module, '__file__', None)
+        if filename:
+            modules[os.path.normcase(os.path.abspath(filename))] = name
+    return modules
+
+
+class Profiler:
+    """性能分析器（同一时间只运行一个分析）"""
+
+    def __init__(self):
+        self.mode: Optional[str] = None
+        self._started: Optional[datetime] = None
+        self._profile: Optional[cProfile.Profile] = None
+        self._sampler: Optional[threading.Thread] = None
+        self._stop_sampling = threading.Event()
+        self._samples: 'Counter[Stack]' = Counter()
+        self._sample_count = 0
+
+    @property
+    def active(self) -> bool:
+        return self.mode is not None
+
+    def start(self, mode: str = "sample"):
+        """开始分析"""
+        if mode not in MODES:
+            raise ValueError(f"未知的分析模式: {mode}")
+        if self.active:
+            raise RuntimeError("性能分析已在进行中")
+        if mode == "cprofile":
+            self._profile = cProfile.Profile()
+            self._profile.enable()
+        else:
+            self._samples = Counter()
+            self._sample_count = 0
+            self._stop_sampling.clear()
+            self._sampler = threading.Thread(target=self._sample_loop, name="profiler",
+                                             daemon=True)
+            self._sampler.start()
+        self.mode = mode
+        self._started = datetime.now()
+        log.info("开始性能分析", extra={'mode': mode})
+
+    def start_from_env(self) -> bool:
+        """环境变量 STICKYNOTES_PROFILE 指定了模式时开始分析（"1" 表示 sample）"""
+        mode = os.environ.get(ENV_VAR, "").strip().lower()
+        if not mode or mode in ("0", "off"):
+            return False
+        if mode in ("1", "on"):
+            mode = "sample"
+        try:
+            self.start(mode)
+        except (ValueError, RuntimeError) as e:
+            log.warning("无法开始性能分析: %s", e)
+            return False
+        return True
+
+    def stop(self) -> Optional[str]:
+        """停止分析并保存结果，返回汇总文件的路径（没有在分析时返回 None）"""
+        if not self.active:
+            return None
+        mode, self.mode = self.mode, None
+        # 同一秒内结束的多次分析不会互相覆盖
+        summary_file = create_unique(profile_dir(), f"profile-{self._started:%Y%m%d-%H%M%S}", ".txt")
+        stem = summary_file.name[:-len(".txt")]
+        seconds = (datetime.now() - self._started).total_seconds()
+
+        if mode == "cprofile":
+            self._profile.disable()
+            self._profile.dump_stats(stem + ".prof")
+            stats = pstats.Stats(self._profile).stats
+            self._profile = None
+            modules = _loaded_modules()
+            stacks = _estimate_stacks(stats, modules)
+            functions = _function_costs(stats, modules)
+            unit = "微秒"
+        else:
+            self._stop_sampling.set()
+            self._sampler.join()
+            self._sampler = None
+            stacks = self._samples
+            functions = _stack_costs(stacks)
+            unit = f"次采样（每 {config.PROFILE_SAMPLE_INTERVAL} 毫秒）"
+
+        write_folded(stem + ".folded", stacks)
+        header = (f"性能分析 {mode}，{self._started:%Y-%m-%d %H:%M:%S} 开始，共 {seconds:.1f} 秒，"
+                  f"权重单位: {unit}")
+        if mode == "sample":
+            header += f"，采样 {self._sample_count} 次"
+        with summary_file:
+            summary_file.write(summarize(stacks, functions, header))
+        log.info("性能分析已保存", extra={'mode': mode, 'path': stem + ".folded",
+                                           'seconds': round(seconds, 1)})
+        return stem + ".txt"
+
+    def _sample_loop(self):
+        """采样线程：定期记录其他线程的调用栈"""
+        interval = config.PROFILE_SAMPLE_INTERVAL / 1000
+        me = threading.get_ident()
+        labels: Dict[object, str] = {}  # 代码对象 -> 帧名（缓存，避免每次拼接字符串）
+        while not self._stop_sampling.wait(interval):
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == me:
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    label = labels.get(code)
+                    if label is None:
+                        module = frame.f_globals.get('__name__', '?')
+                        label = labels[code] = f"{module}:{code.co_name}"
+                    stack.append(label)
+                    frame = frame.f_back
+                stack.append(names.get(ident, f"thread-{ident}"))
+                stack.reverse()
+                self._samples[tuple(stack)] += 1
+            self._sample_count += 1
+
+
+def profile_dir() -> str:
+    return os.path.join(config.DATA_DIR, config.PROFILE_DIR_NAME)
+
+
+def _label(func: Tuple[str, int, str], modules: Dict[str, str]) -> str:
+    """pstats 的函数 (文件, 行号, 名称) -> "模块:函数"（内置函数只有名称）"""
+    filename, _, name = func
+    if filename == '~':
+        return name
+    return f"{_module_of(os.path.normcase(os.path.abspath(filename)), modules)}:{name}"
+
+
+def _estimate_stacks(stats, modules: Dict[str, str]) -> 'Counter[Stack]':
+    """由 cProfile 的调用关系估算折叠栈
+
+    每个函数的自身耗时按各调用方调用它时的自身耗时分配给直接调用方，
+    再往上按调用方被调用时的累计耗时比例分配；递归的调用方不再展开，
+    很小的分支（低于总耗时的万分之一）直接在当前位置截断。
+    """
+    stacks: 'Counter[Stack]' = Counter()
+    total = sum(entry[2] for entry in stats.values())
+    if total <= 0:
+        return stacks
+    cutoff = total * 1e-4
+
+    def walk(path: List, weight: float, first: bool):
+        func = path[-1]
+        callers = stats[func][4] if func in stats else {}
+        # 调用方调用它的 (调用次数, 原始调用次数, 自身耗时, 累计耗时)
+        shares = {caller: entry[2] if first else entry[3]
+                  for caller, entry in callers.items() if caller not in path}
+        share_total = sum(shares.values())
+        if weight < cutoff or share_total <= 0 or len(path) >= 64:
+            stacks[tuple(_label(f, modules) for f in reversed(path))] += weight
+            return
+        for caller, share in shares.items():
+            if share > 0:
+                walk(path + [caller], weight * share / share_total, False)
+
+    for func, (_, _, tottime, _, _) in stats.items():
+        if tottime > 0:
+            walk([func], tottime, True)
+    return Counter({stack: round(weight * 1e6) for stack, weight in stacks.items()
+                    if weight * 1e6 >= 0.5})
+
+
+def _function_costs(stats, modules: Dict[str, str]) -> Dict[str, List[float]]:
+    """cProfile 的每个函数 -> [自身, 累计(微秒), 调用次数]"""
+    costs: Dict[str, List[float]] = {}
+    for func, (_, calls, tottime, cumtime, _) in stats.items():
+        cost = costs.setdefault(_label(func, modules), [0, 0, 0])
+        cost[0] += tottime * 1e6
+        cost[1] += cumtime * 1e6
+        cost[2] += calls
+    return costs
+
+
+def _stack_costs(stacks: 'Counter[Stack]') -> Dict[str, List[float]]:
+    """由折叠栈统计每个函数 -> [自身, 累计, 调用次数(未知为0)]"""
+    costs: Dict[str, List[float]] = {}
+    for stack, weight in stacks.items():
+        costs.setdefault(stack[-1], [0, 0, 0])[0] += weight
+        for label in set(stack):
+            costs.setdefault(label, [0, 0, 0])[1] += weight
+    return costs
+
+
+def write_folded(path: str, stacks: 'Counter[Stack]'):
+    """写入折叠栈（flamegraph.pl 的输入格式）"""
+    with open(path, 'w', encoding='utf-8') as f:
+        for stack, weight in sorted(stacks.items()):
+            if weight > 0:
+                # 分号是格式中的分隔符，空格用于分隔权重
+                frames = (frame.replace(';', ',').replace(' ', '_') for frame in stack)
+                f.write(f"{';'.join(frames)} {weight}\n")
+
+
+def _in_module(label: str, module: str) -> bool:
+    return label.split(':', 1)[0] == module
+
+
+def summarize(stacks: 'Counter[Stack]', functions: Dict[str, List[float]],
+              header: str, top: int = None) -> str:
+    """按 PROFILE_MODULES 汇总的主要耗时
+
+    每个模块给出自身耗时（栈顶在该模块中）和包含耗时（栈中有该模块的
+    函数），以及该模块中累计耗时最多的函数。
+    """
+    top = top or config.PROFILE_TOP_FUNCTIONS
+    total = sum(stacks.values()) or 1
+    lines = [header, f"总权重 {sum(stacks.values())}", ""]
+
+    for module in config.PROFILE_MODULES:
+        own = sum(weight for stack, weight in stacks.items()
+                  if _in_module(stack[-1], module))
+        inclusive = sum(weight for stack, weight in stacks.items()
+                        if any(_in_module(label, module) for label in stack))
+        lines.append(f"== {module}: 自身 {own} ({own * 100 / total:.1f}%)，"
+                     f"包含 {inclusive} ({inclusive * 100 / total:.1f}%)")
+        rows = sorted(((label, cost) for label, cost in functions.items()
+                       if _in_module(label, module)),
+                      key=lambda row: row[1][1], reverse=True)[:top]
+        if not rows:
+            lines.append("   （没有记录）")
+        for label, (own_cost, cumulative, calls) in rows:
+            calls_text = f"  调用 {int(calls)} 次" if calls else ""
+            lines.append(f"   {label:<48} 自身 {own_cost:>10.0f}  累计 {cumulative:>10.0f}"
+                         f"{calls_text}")
+        lines.append("")
+
+    lines.append(f"== 全部模块中自身耗时最多的 {top} 个函数")
+    for label, (own_cost, cumulative, _) in sorted(
+            functions.items(), key=lambda row: row[1][0], reverse=True)[:top]:
+        lines.append(f"   {label:<48} 自身 {own_cost:>10.0f}  累计 {cumulative:>10.0f}")
+    return "\n".join(lines) + "\n"
+
+
+# 全局性能分析器实例
+profiler = Profiler()
@@ -0,0 +1,154 @@
+"""操作记录（用于真实负载的性能测试）
+
+开启后（python main.py --record trace.jsonl）把笔记的增删改、完成以及界面
+上的输入（编辑时的连续按键、鼠标悬停、滚动）连同时间写入记录文件，供
+tools/replay.py 回放并统计各操作的延迟。
+
+记录是匿名的：不保存内容，只保存长度和行数；到期时间保存为相对于开始
+记录时的分钟数；笔记和便签板用记录内的编号代替。
+
+文件每行一个紧凑的JSON：
+    第一行  {"version": 1, "started": "2024-01-15T09:00", "notes": 2}
+    初始笔记 ["note", 编号, 长度, 行数, 到期分钟, 重复, 便签板, 是否完成]
+    操作    [毫秒, "add", 编号, 长度, 行数, 到期分钟, 重复, 便签板]
+            [毫秒, "edit", 编号, 长度, 行数, 到期分钟, 重复]
+            [毫秒, "complete", 编号, null]    旧的记录中是完成重复笔记时生成的下一次的编号
+            [毫秒, "delete", 编号]
+            [毫秒, "type", 编号, 按键数]      一次连续输入
+            [毫秒, "hover", 编号]
+            [毫秒, "scroll", 滚轮角度]
+"""
+import json
+import threading
+import time
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from clock import get_clock
+from note_manager import ChangeEvent, ChangeKind, Note, NoteManager, note_manager
+
+TRACE_VERSION = 1
+TYPE_BURST_GAP = 1.0  # 两次按键间隔超过此时间(秒)时算作新的一次输入
+
+
+class Recorder:
+    """操作记录器"""
+
+    def __init__(self, manager: NoteManager):
+        self.manager = manager
+        self._file = None
+        self._lock = threading.Lock()  # 存储可能在其他线程中修改
+        self._started: Optional[datetime] = None
+        self._started_at = 0.0  # 开始时的单调时钟
+        self._refs: Dict[int, int] = {}  # 笔记ID -> 记录内编号
+        self._boards: Dict[str, int] = {}  # 便签板名 -> 记录内编号
+        self._burst: Optional[List] = None  # 进行中的连续输入
+
+    @property
+    def active(self) -> bool:
+        return self._file is not None
+
+    def start(self, path: str):
+        """开始记录：写入文件头和当前的全部笔记"""
+        self._file = open(path, 'w', encoding='utf-8')
+        self._started = get_clock().now().replace(second=0, microsecond=0)
+        self._started_at = time.monotonic()
+        _, notes = self.manager.snapshot()
+        self._write({'version': TRACE_VERSION, 'started': self._started.isoformat(),
+                     'notes': len(notes)})
+        for note in notes:
+            self._write(["note", self._ref(note.id), *self._describe(note),
+                         self._board(note.board), note.is_completed])
+        self.manager.changed.connect(self.on_changed)
+        self._file.flush()
+
+    def stop(self):
+        """结束记录"""
+        if self._file is None:
+            return
+        self.manager.changed.disconnect(self.on_changed)
+        with self._lock:
+            self._flush_burst()
+            self._file.close()
+            self._file = None
+
+    def _write(self, record):
+        self._file.write(json.dumps(record, ensure_ascii=False, separators=(',', ':')) + "\n")
+
+    def _now(self) -> int:
+        return int((time.monotonic() - self._started_at) * 1000)
+
+    def _ref(self, note_id: int) -> int:
+        """笔记的记录内编号"""
+        ref = self._refs.get(note_id)
+        if ref is None:
+            ref = self._refs[note_id] = len(self._refs) + 1
+        return ref
+
+    def _board(self, board: str) -> int:
+        """便签板的记录内编号（0 表示不属于特定便签板）"""
+        if not board:
+            return 0
+        return self._boards.setdefault(board, len(self._boards) + 1)
+
+    def _describe(self, note: Note) -> list:
+        """匿名的笔记状态: 长度, 行数, 到期分钟, 重复"""
+        text = note.content
+        due = int((note.due_date - self._started).total_seconds() // 60)
+        return [len(text), text.count("\n") + 1, due, note.repeat_type.value]
+
+    def _flush_burst(self):
+        if self._burst is not None:
+            self._write(self._burst[:4])
+            self._burst = None
+
+    def on_changed(self, events: List[ChangeEvent]):
+        """记录存储的变化"""
+        with self._lock:
+            if self._file is None:
+                return
+            self._flush_burst()
+            now = self._now()
+            for event in events:
+                if event.kind == ChangeKind.COMPLETED:
+                    self._write([now, "complete", self._ref(event.note_ids[0]), None])
+                    continue
+                for note_id in event.note_ids:
+                    if event.kind == ChangeKind.DELETED:
+                        self._write([now, "delete", self._ref(note_id)])
+                        continue
+                    note = self.manager.get_note(note_id)
+                    if note is None:
+                        continue
+                    if event.kind == ChangeKind.ADDED:
+                        self._write([now, "add", self._ref(note_id), *self._describe(note),
+                                     self._board(note.board)])
+                    elif event.kind == ChangeKind.UPDATED:
+                        self._write([now, "edit", self._ref(note_id), *self._describe(note)])
+            self._file.flush()
+
+    def record_ui(self, op: str, note_id: Optional[int] = None, value: int = 0):
+        """记录界面输入: key（编辑框按键）、hover（鼠标进入便签）、scroll（滚轮）"""
+        with self._lock:
+            if self._file is None:
+                return
+            now = self._now()
+            if op == "key":
+                ref = self._ref(note_id)
+                burst = self._burst
+                if burst is not None and burst[2] == ref and now - burst[4] <= TYPE_BURST_GAP * 1000:
+                    burst[3] += 1
+                    burst[4] = now
+                    return
+                self._flush_burst()
+                self._burst = [now, "type", ref, 1, now]  # 最后一项是最后一次按键的时间
+                return
+            self._flush_burst()
+            if op == "hover":
+                self._write([now, "hover", self._ref(note_id)])
+            elif op == "scroll":
+                self._write([now, "scroll", value])
+
+
+# 全局记录器实例（默认不记录）
+recorder = Recorder(note_manager)
@@ -0,0 +1,86 @@
+"""重复规则
+
+按重复规则计算下一次发生的时间，把系列展开为时间窗口内的各次发生。
+本模块不导入笔记管理器（导入时会加载笔记文件），进程池的工作进程也可以
+直接使用。
+"""
+import calendar
+from bisect import bisect_left, bisect_right
+from datetime import date, datetime, timedelta
+from enum import Enum
+from typing import Dict, List, Optional, Sequence, Tuple
+
+Times = List[Tuple[datetime, bool]]  # (发生时间, 是否已完成)
+
+
+class RepeatType(Enum):
+    """重复类型枚举"""
+    NONE = "不重复"
+    DAILY = "每天"
+    WEEKDAYS = "每个工作日"
+    WEEKLY = "每周"
+    MONTHLY = "每月"
+    YEARLY = "每年"
+
+
+def next_occurrence(due_date: datetime, repeat_type: RepeatType,
+                    anchor_day: Optional[int] = None) -> datetime:
+    """计算下一次发生的时间
+
+    anchor_day 是每月/每年重复原本的日期（默认为 due_date 的日期）：
+    31日的笔记在短的月份取月末，之后仍回到31日，不会停在30日或28日。
+    """
+    if repeat_type == RepeatType.DAILY:
+        return due_date + timedelta(days=1)
+    elif repeat_type == RepeatType.WEEKDAYS:
+        # 跳过周末
+        next_date = due_date + timedelta(days=1)
+        while next_date.weekday() >= 5:  # 5=周六, 6=周日
+            next_date += timedelta(days=1)
+        return next_date
+    elif repeat_type == RepeatType.WEEKLY:
+        return due_date + timedelta(weeks=1)
+    elif repeat_type == RepeatType.MONTHLY:
+        # 下个月的同一天
+        year = due_date.year + (due_date.month // 12)
+        month = due_date.month % 12 + 1
+        # 如果下个月没有这一天，则取最后一天
+        day = min(anchor_day or due_date.day, calendar.monthrange(year, month)[1])
+        return due_date.replace(year=year, month=month, day=day)
+    elif repeat_type == RepeatType.YEARLY:
+        # 2月29日在非闰年取2月28日
+        year = due_date.year + 1
+        day = min(anchor_day or due_date.day, calendar.monthrange(year, due_date.month)[1])
+        return due_date.replace(year=year, day=day)
+    else:
+        return due_date
+
+
+def expand_series(repeat_type: RepeatType, cursor: datetime, done_days: Sequence[int],
+                  overrides: Dict[datetime, datetime], anchor_day: Optional[int],
+                  start: datetime, end: datetime) -> Times:
+    """展开一个未完成的系列在窗口 [start, end) 内的 (发生时间, 是否已完成)
+
+    已完成的各次排在前面。它们只记录了日期，时间与当前这一次按规则的时间
+    （cursor）相同；从 cursor 开始的以后各次按规则计算，单独改期的显示在
+    改期后的时间。
+    """
+    times = []
+    first = bisect_left(done_days, start.toordinal())
+    last = bisect_right(done_days, end.toordinal())
+    for day in done_days[first:last]:
+        when = datetime.combine(date.fromordinal(day), cursor.time())
+        if start <= when < end:
+            times.append((when, True))
+
+    rule = cursor
+    anchor_day = anchor_day or rule.day
+    while rule < end:
+        when = overrides.get(rule, rule)
+        if start <= when < end:
+            times.append((when, False))
+        rule = next_occurrence(rule, repeat_type, anchor_day)
+    for rule, when in overrides.items():
+        if rule >= end and start <= when < end:
+            times.append((when, False))
+    return times
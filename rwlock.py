@@ -0,0 +1,91 @@
+import threading
+from contextlib import contextmanager
+
+
+class ReadWriteLock:
+    """读写锁
+
+    多个读者可以同时持有读锁，写者独占。同一线程可以重复获取；持有写锁的
+    线程也可以获取读锁（反过来不行，升级会死锁）。有写者在等待时，新的读者
+    需要等待写者完成，避免写者一直等不到锁。
+    """
+
+    def __init__(self):
+        self._cond = threading.Condition(threading.Lock())
+        self._readers = {}  # 线程ID -> 读锁重入次数
+        self._writer = None  # 持有写锁的线程ID
+        self._writer_depth = 0
+        self._writers_waiting = 0
+
+    def acquire_read(self):
+        me = threading.get_ident()
+        if self._writer == me:
+            # 持有写锁时的读取按写锁重入处理（只有持有者会修改这些状态，不需要加锁）
+            self._writer_depth += 1
+            return
+        with self._cond:
+            if me in self._readers:
+                self._readers[me] = self._readers.get(me, 0) + 1
+                return
+            while self._writer is not None or self._writers_waiting:
+                self._cond.wait()
+            self._readers[me] = 1
+
+    def release_read(self):
+        me = threading.get_ident()
+        if self._writer == me:
+            self.release_write()
+            return
+        with self._cond:
+            count = self._readers[me] - 1
+            if count:
+                self._readers[me] = count
+            else:
+                del self._readers[me]
+                if not self._readers:
+                    self._cond.notify_all()
+
+    def acquire_write(self):
+        me = threading.get_ident()
+        if self._writer == me:
+            self._writer_depth += 1
+            return
+        with self._cond:
+            if me in self._readers:
+                raise RuntimeError("持有读锁时不能获取写锁")
+            self._writers_waiting += 1
+            try:
+                while self._writer is not None or self._readers:
+                    self._cond.wait()
+            finally:
+                self._writers_waiting -= 1
+            self._writer = me
+            self._writer_depth = 1
+
+    def release_write(self):
+        if self._writer_depth > 1:
+            self._writer_depth -= 1
+            return
+        with self._cond:
+            self._writer_depth -= 1
+            if self._writer_depth == 0:
+                self._writer = None
+                self._cond.notify_all()
+
+    @contextmanager
+    def read(self):
+        """持有读锁"""
+        self.acquire_read()
+        try:
+            yield
+        finally:
+            self.release_read()
+
+    @contextmanager
+    def write(self):
+        """持有写锁"""
+        self.acquire_write()
+        try:
+            yield
+        finally:
+            self.release_write()
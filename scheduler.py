@@ -0,0 +1,86 @@
+import logging
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+
+from config import config
+from clock import get_clock
+from events import Signal
+from note_manager import Note, NoteManager, note_manager
+
+log = logging.getLogger(__name__)
+
+
+class ReminderScheduler:
+    """提醒调度器
+
+    负责到期检测和通知分发，图形界面和无界面模式共用。每条笔记的每个
+    到期时间只提醒一次；启动时已过期太久的笔记不再补发提醒。
+    """
+
+    def __init__(self, manager: NoteManager):
+        self.manager = manager
+        self.reminder = Signal()  # 参数: Note
+        self.sinks = []
+        self._fired: Dict[int, datetime] = {}  # 笔记ID -> 已提醒的到期时间
+        self._started = False
+
+    def add_sink(self, sink):
+        """添加通知输出（需实现 notify(note) 方法）"""
+        self.sinks.append(sink)
+
+    def _is_fired(self, note: Note) -> bool:
+        return self._fired.get(note.id) == note.due_date
+
+    def _is_open(self, note_id: int) -> bool:
+        note = self.manager.get_note(note_id)
+        return note is not None and not note.is_completed
+
+    def check(self) -> List[Note]:
+        """检查到期笔记并分发通知，返回本次提醒的笔记"""
+        now = get_clock().now()
+        due_notes = [note for note in self.manager.query(end=now, completed=False)
+                     if not self._is_fired(note)]
+
+        # 清理已完成/已删除笔记的提醒记录，避免长时间运行后不断增长
+        if len(self._fired) > self.manager.open_count():
+            self._fired = {note_id: due_date for note_id, due_date in self._fired.items()
+                           if self._is_open(note_id)}
+
+        # 首次检查时，跳过错过太久的提醒
+        if not self._started:
+            self._started = True
+            missed_before = now - timedelta(minutes=config.MISSED_REMINDER_WINDOW)
+            for note in due_notes:
+                if note.due_date < missed_before:
+                    self._fired[note.id] = note.due_date
+            due_notes = [note for note in due_notes if not self._is_fired(note)]
+
+        for note in due_notes:
+            self._fired[note.id] = note.due_date
+            self.dispatch(note)
+        return due_notes
+
+    def dispatch(self, note: Note):
+        """将提醒发送到所有通知输出"""
+        self.reminder.emit(note)
+        for sink in self.sinks:
+            try:
+                sink.notify(note)
+            except Exception:
+                log.exception("发送提醒失败", extra={'note_id': note.id})
+
+    def next_due_time(self) -> Optional[datetime]:
+        """下一个尚未提醒的到期时间"""
+        # 查询结果已按到期时间排序；已到期的笔记通常都已提醒过
+        now = get_clock().now()
+        for note in self.manager.query(end=now, completed=False):
+            if not self._is_fired(note):
+                return note.due_date
+        # 提醒只发给已到期的笔记，之后到期的都还没有提醒
+        upcoming = self.manager.query(start=now + timedelta(microseconds=1),
+                                      completed=False, limit=1)
+        return upcoming[0].due_date if upcoming else None
+
+
+# 全局提醒调度器实例
+reminder_scheduler = ReminderScheduler(note_manager)
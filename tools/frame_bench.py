@@ -0,0 +1,170 @@
+"""拖动和滚动的帧时间测试
+
+在 offscreen 模式下创建 200 条便签的主窗口，模拟高频鼠标拖动和逐帧滚动。
+每一帧先投递这一帧内到达的输入事件，再处理事件并同步重绘整个窗口，记录
+每帧耗时，输出 p50/p95/最大值以及超出帧预算的比例。p95 超出预算时以非零
+状态退出。
+
+--uncached 每帧丢弃窗口外观缓存，用于和缓存前的绘制开销对比。
+
+用法:
+    python tools/frame_bench.py --notes 200 --frames 240
+"""
+import os
+import sys
+import time
+import argparse
+import tempfile
+from datetime import datetime, timedelta
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+# 添加项目目录到Python路径
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+sys.path.insert(0, parent_dir)
+
+# 使用临时数据目录，必须在导入笔记管理器之前设置
+from config import config
+config.DATA_DIR = tempfile.mkdtemp(prefix="stickynotes-frames-")
+
+from clock import FakeClock, set_clock
+
+clock = FakeClock(datetime(2024, 1, 15, 8, 0))
+set_clock(clock)
+
+from PyQt5.QtWidgets import QApplication
+from PyQt5.QtCore import Qt, QPoint, QEvent, QCoreApplication
+from PyQt5.QtGui import QMouseEvent
+
+
+def parse_args(argv=None):
+    """解析命令行参数"""
+    parser = argparse.ArgumentParser(description="桌面便签拖动和滚动帧时间测试")
+    parser.add_argument("--notes", type=int, default=200, help="便签数量")
+    parser.add_argument("--frames", type=int, default=240, help="每个场景测量的帧数")
+    parser.add_argument("--fps", type=float, default=60.0, help="模拟的屏幕刷新率")
+    parser.add_argument("--mouse-rate", type=float, default=1000.0, help="模拟的鼠标事件频率(Hz)")
+    parser.add_argument("--background", help="背景图路径，例如 assets/background.png")
+    parser.add_argument("--uncached", action="store_true", help="每帧丢弃窗口外观缓存")
+    return parser.parse_args(argv)
+
+
+def percentile(values, fraction):
+    """计算分位数"""
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+def render_frame(window, args):
+    """处理挂起事件并同步重绘整个窗口，返回耗时（毫秒）"""
+    start = time.perf_counter()
+    if args.uncached:
+        window.centralWidget().invalidate()
+    QCoreApplication.processEvents()
+    window.repaint()
+    return (time.perf_counter() - start) * 1000
+
+
+def mouse_event(kind, pos: QPoint, buttons):
+    """构造鼠标事件"""
+    button = Qt.LeftButton if kind != QEvent.MouseMove else Qt.NoButton
+    return QMouseEvent(kind, QPoint(10, 10), pos, button, buttons, Qt.NoModifier)
+
+
+def bench_drag(window, args):
+    """模拟拖动：每帧投递这一帧内的全部鼠标移动事件"""
+    moves = {'count': 0}
+    original_move = window.move
+
+    def counting_move(*position):
+        moves['count'] += 1
+        original_move(*position)
+
+    window.move = counting_move
+    start = window.pos() + QPoint(10, 10)
+    QApplication.sendEvent(window, mouse_event(QEvent.MouseButtonPress, start, Qt.LeftButton))
+
+    events_per_frame = max(1, round(args.mouse_rate / args.fps))
+    frame_seconds = 1 / args.fps
+    times, offset = [], 0
+    for _ in range(args.frames):
+        frame_start = time.perf_counter()
+        for _ in range(events_per_frame):
+            offset += 1
+            QApplication.sendEvent(window, mouse_event(
+                QEvent.MouseMove, start + QPoint(offset % 200, offset % 120), Qt.LeftButton))
+        times.append(render_frame(window, args))
+        # 等到下一帧，让帧定时器按真实时间触发
+        remaining = frame_seconds - (time.perf_counter() - frame_start)
+        if remaining > 0:
+            time.sleep(remaining)
+
+    QApplication.sendEvent(window, mouse_event(QEvent.MouseButtonRelease, start, Qt.NoButton))
+    del window.move
+    return times, moves['count'], events_per_frame * args.frames
+
+
+def bench_scroll(window, args):
+    """模拟滚动：每帧把列表滚动一段距离，到底后反向"""
+    scroll_bar = window.scroll_area.verticalScrollBar()
+    step, times = 24, []
+    for _ in range(args.frames):
+        value = scroll_bar.value() + step
+        if not scroll_bar.minimum() <= value <= scroll_bar.maximum():
+            step = -step
+            value = scroll_bar.value() + step
+        scroll_bar.setValue(value)
+        times.append(render_frame(window, args))
+    return times, scroll_bar.maximum()
+
+
+def report(name, times, budget):
+    """输出帧时间统计，返回 p95 是否在预算内"""
+    over = sum(1 for t in times if t > budget) / len(times)
+    p95 = percentile(times, 0.95)
+    print(f"  {name}: p50 {percentile(times, 0.5):.2f} ms, p95 {p95:.2f} ms, "
+          f"最大 {max(times):.2f} ms, 超出帧预算 {over:.0%}")
+    return p95 <= budget
+
+
+def main():
+    args = parse_args()
+    if args.background:
+        config.BACKGROUND_IMAGE = args.background
+    app = QApplication(sys.argv)
+
+    from note_manager import note_manager, RepeatType
+    from widgets.main_window import MainWindow
+
+    with note_manager.batch():
+        for i in range(args.notes):
+            note_manager.add_note(f"便签 {i}\n第二行内容", clock.now() + timedelta(hours=i * 3),
+                                  RepeatType.NONE)
+    # 不折叠分组，让所有便签都参与绘制
+    config.LATER_COLLAPSE_THRESHOLD = args.notes + 1
+
+    window = MainWindow()
+    window.show()
+    while window.pending_notes:
+        QCoreApplication.processEvents()
+    QCoreApplication.processEvents()
+    print(f"便签 {len(window.note_widgets)} 条，窗口外观缓存: {'关闭' if args.uncached else '开启'}，"
+          f"背景图: {config.BACKGROUND_IMAGE or '无'}")
+
+    budget = 1000 / args.fps
+    drag_times, move_calls, mouse_events = bench_drag(window, args)
+    scroll_times, scroll_range = bench_scroll(window, args)
+
+    print(f"\n帧预算 {budget:.1f} ms ({args.fps:g} fps):")
+    ok = report("拖动", drag_times, budget)
+    print(f"        {mouse_events} 个鼠标事件，窗口移动 {move_calls} 次")
+    ok = report("滚动", scroll_times, budget) and ok
+    print(f"        滚动范围 {scroll_range} 像素")
+
+    window.close()
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
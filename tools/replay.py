@@ -0,0 +1,269 @@
+"""回放操作记录，统计各操作的延迟
+
+读取 python main.py --record 录制的记录文件（见 recorder.py），在临时数据
+目录和 offscreen 的主窗口中按顺序全速回放：先载入记录开始时的全部笔记，
+再依次执行增删改、完成、编辑框按键、鼠标悬停和滚动。每个操作的耗时包括
+处理由它引起的事件和同步重绘窗口。
+
+时钟按记录中的时间推进（不实际等待），到期时间和日程分组与录制时一致。
+输出每种操作的次数和 p50/p95/p99/最大耗时；回放出错或 p95 超出预算时以
+非零状态退出。
+
+用法:
+    python tools/replay.py trace.jsonl --budget-ms 50
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+from collections import defaultdict
+from datetime import datetime, timedelta
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+# 添加项目目录到Python路径
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+sys.path.insert(0, parent_dir)
+
+# 使用临时数据目录，必须在导入笔记管理器之前设置
+from config import config
+config.DATA_DIR = tempfile.mkdtemp(prefix="stickynotes-replay-")
+
+from clock import FakeClock, set_clock
+
+clock = FakeClock()
+set_clock(clock)
+
+from PyQt5.QtWidgets import QApplication
+from PyQt5.QtCore import Qt, QEvent, QPoint, QPointF, QCoreApplication
+from PyQt5.QtGui import QKeyEvent, QWheelEvent
+
+FILLER = "回放用的便签内容"
+
+
+def parse_args(argv=None):
+    """解析命令行参数"""
+    parser = argparse.ArgumentParser(description="回放操作记录并统计延迟")
+    parser.add_argument("trace", help="记录文件（python main.py --record 生成）")
+    parser.add_argument("--budget-ms", type=float, default=50.0,
+                        help="每种操作 p95 耗时的预算(毫秒)")
+    return parser.parse_args(argv)
+
+
+def percentile(values, fraction):
+    """计算分位数"""
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+def filler_text(length: int, lines: int) -> str:
+    """生成指定长度和行数的内容"""
+    text = (FILLER * (length // len(FILLER) + 1))[:length]
+    if lines <= 1 or length < lines:
+        return text
+    step = length // lines
+    parts = [text[i * step:(i + 1) * step] for i in range(lines - 1)]
+    return "\n".join(parts + [text[(lines - 1) * step:]])
+
+
+def read_trace(path):
+    """读取记录文件，返回 (文件头, 初始笔记, 操作)"""
+    with open(path, 'r', encoding='utf-8') as f:
+        header = json.loads(f.readline())
+        if header.get('version') != 1:
+            raise ValueError(f"不支持的记录版本: {header.get('version')}")
+        notes, ops = [], []
+        for line in f:
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            (notes if record[0] == "note" else ops).append(record)
+    return header, notes, ops
+
+
+class Replayer:
+    """在笔记管理器和主窗口上执行记录中的操作"""
+
+    def __init__(self, manager, window, started: datetime):
+        self.manager = manager
+        self.window = window
+        self.started = started
+        self.ids = {}  # 记录内编号 -> 回放中的笔记ID
+        self.boards = {}  # 记录内编号 -> 便签板名
+        self.hovered = None
+
+    def board(self, ref: int) -> str:
+        if not ref:
+            return ""
+        return self.boards.setdefault(ref, f"便签板{ref}")
+
+    def load(self, notes):
+        """载入记录开始时的笔记（可以早于今天，不经过日期检查）"""
+        from note_manager import Note, RepeatType
+        created = []
+        for _, ref, length, lines, due, repeat, board, completed in notes:
+            created.append(Note(content=filler_text(length, lines),
+                                due_date=self.started + timedelta(minutes=due),
+                                repeat_type=RepeatType(repeat), board=self.board(board),
+                                is_completed=completed))
+        self.manager.add_notes(created)
+        for (_, ref, *_), note in zip(notes, created):
+            self.ids[ref] = note.id
+
+    def note_widget(self, ref):
+        return self.window.note_widgets.get(self.ids.get(ref))
+
+    def run(self, op, args):
+        """执行一个操作，返回实际执行的次数（找不到对象时为 0）"""
+        from note_manager import RepeatType
+        if op == "add":
+            ref, length, lines, due, repeat, board = args
+            note = self.manager.add_note(filler_text(length, lines),
+                                         self.started + timedelta(minutes=due),
+                                         RepeatType(repeat), self.board(board))
+            self.ids[ref] = note.id
+            return 1
+        if op == "edit":
+            ref, length, lines, due, repeat = args
+            if ref not in self.ids:
+                return 0
+            return int(self.manager.update_note(
+                self.ids[ref], content=filler_text(length, lines),
+                due_date=self.started + timedelta(minutes=due), repeat_type=RepeatType(repeat)
+            ))
+        if op == "complete":
+            ref, spawned = args
+            if ref not in self.ids or not self.manager.mark_completed(self.ids[ref]):
+                return 0
+            if spawned is not None:
+                # 旧的记录：完成重复笔记时生成了下一次，现在是同一条笔记
+                self.ids[spawned] = self.ids[ref]
+            return 1
+        if op == "delete":
+            ref, = args
+            return int(ref in self.ids and self.manager.delete_note(self.ids[ref]))
+        if op == "hover":
+            ref, = args
+            widget = self.note_widget(ref)
+            if widget is None:
+                return 0
+            if self.hovered is not None and self.hovered is not widget:
+                try:
+                    QApplication.sendEvent(self.hovered, QEvent(QEvent.Leave))
+                except RuntimeError:
+                    pass  # 组件已被销毁
+            QApplication.sendEvent(widget, QEvent(QEvent.Enter))
+            self.hovered = widget
+            return 1
+        if op == "scroll":
+            delta, = args
+            viewport = self.window.scroll_area.viewport()
+            center = QPointF(viewport.width() / 2, viewport.height() / 2)
+            QApplication.sendEvent(viewport, QWheelEvent(
+                center, QPointF(viewport.mapToGlobal(center.toPoint())), QPoint(0, 0),
+                QPoint(0, delta), Qt.NoButton, Qt.NoModifier, Qt.NoScrollPhase, False))
+            return 1
+        raise ValueError(f"未知的操作: {op}")
+
+    def type_keys(self, ref, count, render):
+        """在编辑框中逐个按键，每次按键单独计时"""
+        widget = self.note_widget(ref)
+        if widget is None:
+            return []
+        editor = widget.content_edit
+        editor.setFocus()
+        times = []
+        for _ in range(count):
+            times.append(render(lambda: (
+                QApplication.sendEvent(editor, QKeyEvent(QEvent.KeyPress, Qt.Key_A,
+                                                         Qt.NoModifier, "a")),
+                QApplication.sendEvent(editor, QKeyEvent(QEvent.KeyRelease, Qt.Key_A,
+                                                         Qt.NoModifier, "a")),
+            )))
+        return times
+
+
+def main():
+    args = parse_args()
+    header, notes, ops = read_trace(args.trace)
+    started = datetime.fromisoformat(header['started'])
+    clock.set(started)
+
+    app = QApplication(sys.argv)
+
+    from note_manager import note_manager
+    from widgets.main_window import MainWindow
+
+    # 不折叠分组，让所有便签都参与绘制
+    config.LATER_COLLAPSE_THRESHOLD = len(notes) + len(ops) + 1
+    window = MainWindow()
+    replayer = Replayer(note_manager, window, started)
+    replayer.load(notes)
+    window.show()
+    while window.pending_notes:
+        QCoreApplication.processEvents()
+    QCoreApplication.processEvents()
+
+    def render(action):
+        """执行操作、处理由它引起的事件并同步重绘，返回耗时（毫秒）"""
+        began = time.perf_counter()
+        action()
+        QCoreApplication.processEvents()
+        window.repaint()
+        return (time.perf_counter() - began) * 1000
+
+    latencies = defaultdict(list)
+    skipped = defaultdict(int)
+    errors = []
+    replay_start = time.perf_counter()
+    for record in ops:
+        offset, op, *op_args = record
+        moment = started + timedelta(milliseconds=offset)
+        if moment > clock.now():
+            clock.set(moment)
+        try:
+            if op == "type":
+                times = replayer.type_keys(op_args[0], op_args[1], render)
+                latencies["type"].extend(times)
+                if not times:
+                    skipped[op] += 1
+                continue
+            result = {}
+            elapsed = render(lambda: result.setdefault('count', replayer.run(op, op_args)))
+            if result['count']:
+                latencies[op].append(elapsed)
+            else:
+                skipped[op] += 1
+        except Exception as e:
+            errors.append(f"{record}: {type(e).__name__}: {e}")
+    total = time.perf_counter() - replay_start
+
+    print(f"回放 {args.trace}: 初始 {len(notes)} 条便签，{len(ops)} 个操作，"
+          f"耗时 {total:.2f} 秒，最终 {len(note_manager.notes)} 条便签")
+    print(f"{'操作':<10}{'次数':>8}{'p50':>10}{'p95':>10}{'p99':>10}{'最大':>10}  (毫秒)")
+    over_budget = []
+    for op in sorted(latencies):
+        times = latencies[op]
+        p95 = percentile(times, 0.95)
+        print(f"{op:<10}{len(times):>8}{percentile(times, 0.5):>10.2f}{p95:>10.2f}"
+              f"{percentile(times, 0.99):>10.2f}{max(times):>10.2f}")
+        if p95 > args.budget_ms:
+            over_budget.append(op)
+    for op, count in sorted(skipped.items()):
+        print(f"跳过 {count} 个 {op}（便签不在列表中或已删除）")
+
+    for error in errors[:10]:
+        print(f"错误: {error}")
+    if over_budget:
+        print(f"p95 超出预算 {args.budget_ms} ms: {', '.join(over_budget)}")
+    ok = not errors and not over_budget
+    print("通过" if ok else "未通过")
+    window.close()
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,267 @@
+"""提醒流程的时间模拟测试
+
+用假时钟在几秒钟内模拟很长一段时间的使用：创建大量重复便签（每天、每个
+工作日、每月、每年），时间直接跳到下一个到期时间，由提醒调度器检测到期并
+分发通知，收到提醒后立即标记完成（重复便签随之推进到下一次）。
+
+按独立实现的重复规则算出期间每个系列应当提醒的全部时间，与实际提醒比较:
+漏掉的、重复的和多余的提醒都算作错误。同时报告吞吐量、提醒延迟和存储
+增长：重复便签按系列保存，完成时笔记数不变，只在系列中记下完成的日期。
+有错误、延迟或存储增长超出预算时以非零状态退出，可以在持续集成中运行。
+吞吐量按实际时间计算，随机器和负载变化，默认只报告；指定 --min-rate 时
+才作为预算检查（在性能稳定的机器上使用）。
+
+模拟前先逐次检查月末（31日、30日）和2月29日的系列（经过保存和重新读取，
+在临时数据目录中进行）；模拟的笔记只保存在内存中，不读写数据文件。
+
+用法:
+    python tools/simulate.py --notes 10000 --days 365
+"""
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import calendar
+import itertools
+import tempfile
+from datetime import datetime, timedelta
+
+# 添加项目目录到Python路径
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+sys.path.insert(0, parent_dir)
+
+# 使用临时数据目录，必须在导入笔记管理器之前设置（全局实例会读取数据文件）
+from config import config
+config.DATA_DIR = tempfile.mkdtemp(prefix="stickynotes-simulate-")
+
+from clock import FakeClock, set_clock
+from note_manager import NoteManager, RepeatType
+from scheduler import ReminderScheduler
+
+REPEAT_TYPES = [RepeatType.DAILY, RepeatType.WEEKDAYS, RepeatType.MONTHLY, RepeatType.YEARLY]
+
+# 月末和2月29日的系列：(第一次, 重复规则, 检查的次数)
+ANCHOR_CASES = [
+    (datetime(2024, 1, 31, 9, 0), RepeatType.MONTHLY, 25),
+    (datetime(2024, 3, 30, 9, 0), RepeatType.MONTHLY, 25),
+    (datetime(2024, 2, 29, 9, 0), RepeatType.YEARLY, 9),
+]
+
+
+def parse_args(argv=None):
+    """解析命令行参数"""
+    parser = argparse.ArgumentParser(description="桌面便签提醒时间模拟测试")
+    parser.add_argument("--notes", type=int, default=10000, help="重复便签系列的数量")
+    parser.add_argument("--days", type=int, default=365, help="模拟的天数")
+    parser.add_argument("--start", default="2024-01-01T00:00", help="模拟开始时间")
+    parser.add_argument("--tick", type=int, default=config.CHECK_INTERVAL // 1000,
+                        help="提醒检查的间隔(秒)，时间按此间隔对齐")
+    parser.add_argument("--seed", type=int, default=1, help="随机种子")
+    parser.add_argument("--min-rate", type=float, default=0.0,
+                        help="每秒(实际时间)至少处理的提醒数，默认 0 表示只报告不检查")
+    parser.add_argument("--max-errors", type=int, default=1000,
+                        help="错误提醒达到此数量时提前停止（例如重复规则出错导致不断提醒）")
+    parser.add_argument("--max-growth", type=float, default=1.0,
+                        help="存储笔记数允许增长的倍数（完成重复便签不应增加笔记）")
+    return parser.parse_args(argv)
+
+
+def first_due(rng, repeat_type, start):
+    """随机生成系列的第一次到期时间（不早于开始时间）"""
+    day = start.replace(hour=0, minute=0, second=0, microsecond=0)
+    if repeat_type == RepeatType.WEEKDAYS:
+        while day.weekday() >= 5:
+            day += timedelta(days=1)
+    elif repeat_type == RepeatType.MONTHLY:
+        # 包括月末的日期（下个月没有这一天时取最后一天）
+        day = day.replace(day=rng.randint(day.day, calendar.monthrange(day.year, day.month)[1]))
+    elif repeat_type == RepeatType.YEARLY:
+        day += timedelta(days=rng.randrange(366))
+    due = day + timedelta(minutes=rng.randrange(24 * 60))
+    return max(due, start.replace(second=0, microsecond=0) + timedelta(minutes=1))
+
+
+def expected_occurrences(first, repeat_type):
+    """按重复规则依次生成各次到期时间（与笔记管理器独立实现）
+
+    每天/每个工作日从上一次推算；每月/每年的第 n 次直接由第一次推算（该月
+    没有这一天时取最后一天），31日的系列经过短的月份后仍回到31日。
+    """
+    if repeat_type in (RepeatType.MONTHLY, RepeatType.YEARLY):
+        step = 1 if repeat_type == RepeatType.MONTHLY else 12
+        for n in itertools.count():
+            year, month = divmod(first.month - 1 + n * step, 12)
+            year, month = first.year + year, month + 1
+            yield first.replace(year=year, month=month,
+                                day=min(first.day, calendar.monthrange(year, month)[1]))
+    due = first
+    while True:
+        yield due
+        due += timedelta(days=1)
+        while repeat_type == RepeatType.WEEKDAYS and due.weekday() >= 5:
+            due += timedelta(days=1)
+
+
+def check_anchors():
+    """月末和2月29日的系列逐次完成，每次完成后保存并重新读取文件，与独立
+    实现的重复规则比较（取月末之后应回到原本的日期），返回不一致的描述"""
+    failures = []
+    for first, repeat_type, count in ANCHOR_CASES:
+        clock = FakeClock(first - timedelta(days=1))
+        set_clock(clock)
+        if os.path.exists(config.notes_file_path):
+            os.remove(config.notes_file_path)
+        manager = NoteManager()
+        note_id = manager.add_note("月末", first, repeat_type).id
+        for expected in itertools.islice(expected_occurrences(first, repeat_type), count):
+            due = manager.get_note(note_id).due_date
+            if due != expected:
+                failures.append(f"{first:%Y-%m-%d} {repeat_type.value}: "
+                                f"应为 {expected:%Y-%m-%d}，实际 {due:%Y-%m-%d}")
+                break
+            clock.set(due)
+            manager.mark_completed(note_id)
+            manager.load_notes()
+    os.remove(config.notes_file_path)
+    return failures
+
+
+def store_size(manager):
+    """保存全部笔记需要的字节数（逐条序列化，避免生成整个文件的字符串）"""
+    return sum(len(json.dumps(note.to_dict(), ensure_ascii=False)) + 4 for note in manager.notes)
+
+
+class Series:
+    """一个重复便签系列应当提醒的时间"""
+
+    def __init__(self, first, repeat_type):
+        self.occurrences = expected_occurrences(first, repeat_type)
+        self.expected = next(self.occurrences)
+        self.last_fired = None
+
+
+class CheckingSink:
+    """通知输出：每次提醒时与系列的下一次应提醒时间比较"""
+
+    def __init__(self, clock):
+        self.clock = clock
+        self.series = {}  # 笔记内容 -> Series
+        self.firings = 0
+        self.missed = 0
+        self.duplicates = 0
+        self.unexpected = 0
+        self.max_latency = timedelta(0)
+
+    def notify(self, note):
+        self.firings += 1
+        self.max_latency = max(self.max_latency, self.clock.now() - note.due_date)
+        series = self.series[note.content]
+        while series.expected < note.due_date:
+            self.missed += 1
+            series.expected = next(series.occurrences)
+        if series.expected == note.due_date:
+            series.last_fired = note.due_date
+            series.expected = next(series.occurrences)
+        elif series.last_fired == note.due_date:
+            self.duplicates += 1
+        else:
+            self.unexpected += 1
+
+    @property
+    def errors(self):
+        return self.missed + self.duplicates + self.unexpected
+
+    def finish(self, end):
+        """模拟结束：统计到结束时间为止还没有提醒的"""
+        for series in self.series.values():
+            while series.expected <= end:
+                self.missed += 1
+                series.expected = next(series.occurrences)
+
+
+def main():
+    args = parse_args()
+    rng = random.Random(args.seed)
+    anchor_failures = check_anchors()
+    start = datetime.fromisoformat(args.start)
+    end = start + timedelta(days=args.days)
+    tick = timedelta(seconds=max(1, args.tick))
+
+    clock = FakeClock(start)
+    set_clock(clock)
+    manager = NoteManager(persistent=False)
+    scheduler = ReminderScheduler(manager)
+    sink = CheckingSink(clock)
+    scheduler.add_sink(sink)
+
+    # 创建便签系列，内容作为系列标识
+    with manager.batch():
+        for index in range(args.notes):
+            repeat_type = REPEAT_TYPES[index % len(REPEAT_TYPES)]
+            due = first_due(rng, repeat_type, start)
+            content = f"系列 {index} {repeat_type.value}"
+            manager.add_note(content, due, repeat_type)
+            sink.series[content] = Series(due, repeat_type)
+    initial_count = len(manager.notes)
+    initial_size = store_size(manager)
+
+    steps = 0
+    stopped = False
+    began = time.perf_counter()
+    while True:
+        if sink.errors >= args.max_errors:
+            stopped = True
+            break
+        next_due = scheduler.next_due_time()
+        if next_due is None or next_due > end:
+            break
+        # 定时检查只在检查间隔上发生
+        ticks = -((start - next_due) // tick)
+        clock.set(max(clock.now(), start + ticks * tick))
+        fired = scheduler.check()
+        with manager.batch():
+            for note in fired:
+                manager.mark_completed(note.id)
+        steps += 1
+    elapsed = time.perf_counter() - began
+    if not stopped:
+        sink.finish(end)
+
+    rate = sink.firings / elapsed if elapsed > 0 else float('inf')
+    final_count = len(manager.notes)
+    final_size = store_size(manager)
+    growth = final_count / initial_count if initial_count else 1.0
+
+    print(f"模拟 {args.days} 天（{start:%Y-%m-%d} 至 {end:%Y-%m-%d}），"
+          f"{args.notes} 个系列，检查间隔 {tick.total_seconds():.0f} 秒")
+    print(f"耗时 {elapsed:.2f} 秒，{steps} 次检查，{sink.firings} 次提醒，"
+          f"{rate:.0f} 次提醒/秒，最大延迟 {sink.max_latency.total_seconds():.0f} 秒")
+    print(f"漏掉 {sink.missed} 次，重复 {sink.duplicates} 次，多余 {sink.unexpected} 次")
+    print(f"月末和2月29日的系列: {'不一致' if anchor_failures else '一致'}")
+    per_completion = (final_size - initial_size) / sink.firings if sink.firings else 0.0
+    print(f"存储: {initial_count} -> {final_count} 条笔记（{growth:.1f} 倍），"
+          f"{initial_size / 1024:.0f} KiB -> {final_size / 1024:.0f} KiB，"
+          f"每次完成 {per_completion:.1f} 字节")
+
+    failures = list(anchor_failures)
+    if stopped:
+        failures.append(f"错误达到 {args.max_errors} 次，在 {clock.now():%Y-%m-%d %H:%M} 提前停止")
+    if sink.missed or sink.duplicates or sink.unexpected:
+        failures.append("提醒与重复规则不一致")
+    if sink.max_latency > tick:
+        failures.append("提醒延迟超过检查间隔")
+    if args.min_rate and rate < args.min_rate:
+        failures.append(f"吞吐量低于预算 {args.min_rate:.0f} 次/秒")
+    if growth > args.max_growth:
+        failures.append(f"存储增长超过预算 {args.max_growth} 倍")
+    for failure in failures:
+        print(f"失败: {failure}")
+    print("通过" if not failures else "未通过")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,247 @@
+"""长时间运行内存测试（soak test）
+
+在 offscreen 模式下运行主窗口，用假时钟模拟数小时的使用：悬停、添加、完成、
+删除便签并重新加载列表。定期记录 tracemalloc 快照、Qt 对象数量和常驻内存，
+每个循环的增长超过预算时以非零状态退出，并按子系统列出增长最多的分配位置。
+
+有上限的缓存（例如变化记录）在写满之前一直增长，这不是泄漏：预热至少
+--warmup 个循环，并且一直到变化记录写满为止。tracemalloc 在预热之前开始
+记录，缓存中预热时的对象被新对象替换不会显示为增长。增长按采样点的线性回归估计，
+测量期间的总增长超过"每循环预算 × 循环数 + 噪声容差"时才算超出预算，
+内存分配器按块增长造成的跳变不会让较短的运行失败。
+
+用法:
+    python tools/soak.py --cycles 2000 --minutes-per-cycle 1
+"""
+import os
+import sys
+import argparse
+import tempfile
+import tracemalloc
+from collections import defaultdict
+from datetime import datetime, timedelta
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+# 添加项目目录到Python路径
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+sys.path.insert(0, parent_dir)
+
+# 使用临时数据目录，必须在导入笔记管理器之前设置
+from config import config
+config.DATA_DIR = tempfile.mkdtemp(prefix="stickynotes-soak-")
+
+from clock import FakeClock, set_clock
+
+clock = FakeClock(datetime(2024, 1, 15, 8, 0))
+set_clock(clock)
+
+from PyQt5.QtWidgets import QApplication
+from PyQt5.QtCore import QObject, QEvent, QCoreApplication
+
+MIN_SAMPLES = 5  # 测量期间至少的采样次数（不含起点）
+
+# 按文件路径归类分配位置
+SUBSYSTEMS = [
+    ("note_manager", os.path.join(parent_dir, "note_manager.py")),
+    ("widgets.main_window", os.path.join(parent_dir, "widgets", "main_window.py")),
+    ("widgets.note_widget", os.path.join(parent_dir, "widgets", "note_widget.py")),
+    ("widgets", os.path.join(parent_dir, "widgets")),
+    ("app", parent_dir),
+]
+
+
+def parse_args(argv=None):
+    """解析命令行参数"""
+    parser = argparse.ArgumentParser(description="桌面便签长时间运行内存测试")
+    parser.add_argument("--cycles", type=int, default=1000, help="模拟的操作循环数")
+    parser.add_argument("--warmup", type=int, default=50, help="不计入预算的预热循环数")
+    parser.add_argument("--notes", type=int, default=30, help="保持的未完成便签数量")
+    parser.add_argument("--minutes-per-cycle", type=int, default=1, help="每个循环推进的模拟时间")
+    parser.add_argument("--sample-every", type=int, default=50, help="每隔多少循环采样一次")
+    parser.add_argument("--max-bytes-per-cycle", type=float, default=512.0,
+                        help="Python 堆每循环允许的增长（字节）")
+    parser.add_argument("--max-objects-per-cycle", type=float, default=0.05,
+                        help="Qt 对象每循环允许的增长（个）")
+    parser.add_argument("--max-rss-per-cycle", type=float, default=4096.0,
+                        help="常驻内存每循环允许的增长（字节），无法读取时跳过")
+    parser.add_argument("--heap-noise", type=float, default=64 * 1024,
+                        help="Python 堆在整个测量期间允许的额外增长（字节）")
+    parser.add_argument("--rss-noise", type=float, default=2 * 1024 * 1024,
+                        help="常驻内存在整个测量期间允许的额外增长（字节，分配器按块增长）")
+    parser.add_argument("--reload-every", type=int, default=200, help="每隔多少循环整体重新加载列表")
+    parser.add_argument("--max-stylesheet-per-cycle", type=float, default=1.0,
+                        help="样式表总长度每循环允许的增长（字符）")
+    parser.add_argument("--top", type=int, default=5, help="每个子系统列出的分配位置数量")
+    args = parser.parse_args(argv)
+    if args.cycles < MIN_SAMPLES:
+        parser.error(f"--cycles 至少为 {MIN_SAMPLES}")
+    # 采样点太少时回归的结果主要是噪声
+    args.sample_every = max(1, min(args.sample_every, args.cycles // MIN_SAMPLES))
+    return args
+
+
+def read_rss() -> int:
+    """读取当前常驻内存（字节），不支持的平台返回 0"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        return 0
+
+
+def count_qt_objects(app, window) -> int:
+    """统计 Qt 对象数量（所有顶层组件及主窗口下的全部子对象）"""
+    return len(app.allWidgets()) + len(window.findChildren(QObject))
+
+
+def count_stylesheet_chars(app) -> int:
+    """统计所有组件样式表的总长度（样式表保存在 Qt 侧，tracemalloc 看不到）"""
+    return sum(len(widget.styleSheet()) for widget in app.allWidgets())
+
+
+def flush_events():
+    """处理挂起事件，包括 deleteLater 的延迟删除"""
+    QCoreApplication.processEvents()
+    QCoreApplication.sendPostedEvents(None, QEvent.DeferredDelete)
+    QCoreApplication.processEvents()
+
+
+def subsystem_of(filename: str) -> str:
+    """根据文件路径判断所属子系统"""
+    if "PyQt5" in filename:
+        return "PyQt5"
+    for name, prefix in SUBSYSTEMS:
+        if filename.startswith(prefix):
+            return name
+    return "other"
+
+
+def slope(samples):
+    """最小二乘法计算每循环增长量"""
+    n = len(samples)
+    if n < 2:
+        return 0.0
+    mean_x = sum(x for x, _ in samples) / n
+    mean_y = sum(y for _, y in samples) / n
+    denominator = sum((x - mean_x) ** 2 for x, _ in samples)
+    if not denominator:
+        return 0.0
+    return sum((x - mean_x) * (y - mean_y) for x, y in samples) / denominator
+
+
+def run_cycle(window, note_manager, cycle: int, args):
+    """一个操作循环：悬停所有卡片、添加、完成、删除，定期整体重新加载"""
+    for note_widget in list(window.note_widgets.values()):
+        QApplication.sendEvent(note_widget, QEvent(QEvent.Enter))
+        QApplication.sendEvent(note_widget, QEvent(QEvent.Leave))
+
+    window.add_new_note()
+    window.add_new_note()
+
+    open_notes = note_manager.get_open_notes()
+    if len(open_notes) > args.notes:
+        completed = open_notes[-1]
+        window.on_note_completed(completed.id)
+        # 已完成的便签会一直留在存储中，清理掉以免把数据增长算作泄漏
+        note_manager.delete_note(completed.id)
+        window.on_note_deleted(open_notes[-2].id)
+
+    if cycle % args.reload_every == 0:
+        window.load_notes()
+
+    clock.advance(minutes=args.minutes_per_cycle)
+    flush_events()
+    # 分批创建的卡片全部创建完再进入下一个循环，采样时界面处于稳定状态
+    while window.pending_notes:
+        flush_events()
+
+
+def main():
+    args = parse_args()
+    app = QApplication(sys.argv)
+
+    from note_manager import note_manager
+    from widgets.main_window import MainWindow
+
+    window = MainWindow()
+    window.show()
+    flush_events()
+
+    tracemalloc.start(25)
+    warmup = 0
+    while warmup < args.warmup or len(note_manager.change_log) < note_manager.change_log.maxlen:
+        run_cycle(window, note_manager, warmup, args)
+        warmup += 1
+    print(f"预热 {warmup} 个循环")
+    # 预热阶段也做一次整体重新加载，首次重新加载的一次性开销不计入增长
+    window.load_notes()
+    flush_events()
+
+    while window.pending_notes:
+        flush_events()
+
+    # 先统计一次，让统计时创建的 Python 包装对象不计入增长
+    count_qt_objects(app, window)
+    count_stylesheet_chars(app)
+    # 排除测试脚本自身的分配
+    harness_filter = tracemalloc.Filter(False, os.path.abspath(__file__))
+    baseline = tracemalloc.take_snapshot().filter_traces([harness_filter])
+    heap_samples, object_samples, rss_samples, style_samples = [], [], [], []
+
+    for cycle in range(0, args.cycles + 1):
+        if cycle:
+            run_cycle(window, note_manager, cycle, args)
+        if cycle % args.sample_every == 0 or cycle == args.cycles:
+            heap_samples.append((cycle, tracemalloc.get_traced_memory()[0]))
+            object_samples.append((cycle, count_qt_objects(app, window)))
+            rss_samples.append((cycle, read_rss()))
+            style_samples.append((cycle, count_stylesheet_chars(app)))
+            print(f"循环 {cycle}: Python堆 {heap_samples[-1][1] / 1024:.0f} KiB, "
+                  f"Qt对象 {object_samples[-1][1]}, 样式表 {style_samples[-1][1]} 字符, "
+                  f"常驻内存 {rss_samples[-1][1] / 1048576:.1f} MiB, 便签 {len(note_manager.notes)}")
+
+    snapshot = tracemalloc.take_snapshot().filter_traces([harness_filter])
+    tracemalloc.stop()
+
+    # 按子系统列出增长最多的分配位置
+    by_subsystem = defaultdict(list)
+    for stat in snapshot.compare_to(baseline, "lineno"):
+        if stat.size_diff > 0:
+            frame = stat.traceback[0]
+            by_subsystem[subsystem_of(frame.filename)].append(stat)
+    print(f"\n模拟时长 {timedelta(minutes=args.cycles * args.minutes_per_cycle)}，"
+          f"增长最多的分配位置:")
+    for name, stats in sorted(by_subsystem.items(),
+                              key=lambda item: -sum(s.size_diff for s in item[1])):
+        total = sum(s.size_diff for s in stats)
+        print(f"  [{name}] +{total / 1024:.1f} KiB")
+        for stat in stats[:args.top]:
+            frame = stat.traceback[0]
+            print(f"      +{stat.size_diff:>8} B  {stat.count_diff:+6} 块  "
+                  f"{os.path.relpath(frame.filename, parent_dir)}:{frame.lineno}")
+
+    # 检查预算：回归估计的总增长不超过每循环预算乘以循环数再加上噪声容差
+    results = [
+        ("Python堆", slope(heap_samples), args.max_bytes_per_cycle, args.heap_noise, "B"),
+        ("Qt对象", slope(object_samples), args.max_objects_per_cycle, 0, "个"),
+        ("样式表", slope(style_samples), args.max_stylesheet_per_cycle, 0, "字符"),
+    ]
+    if all(rss for _, rss in rss_samples):
+        results.append(("常驻内存", slope(rss_samples), args.max_rss_per_cycle, args.rss_noise, "B"))
+
+    failed = False
+    print(f"\n每循环增长（{args.cycles} 个循环）:")
+    for name, growth, budget, noise, unit in results:
+        exceeded = growth * args.cycles > budget * args.cycles + noise
+        failed = failed or exceeded
+        print(f"  {name}: {growth:.2f} {unit}/循环，共 {growth * args.cycles:.0f} {unit} "
+              f"(预算 {budget} {unit}/循环 + {noise:.0f} {unit}) {'超出预算' if exceeded else '通过'}")
+
+    window.close()
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,94 @@
+"""启动时间测试（Linux）
+
+比较不同打包方式从启动进程到窗口显示的时间。被测程序在环境变量
+STICKYNOTES_STARTUP_PROBE 下运行：窗口显示后的第一轮事件循环输出单调时钟
+时间并退出。Linux 上各进程的单调时钟相同，可以直接与启动时刻相减。
+
+每次运行都在新的临时目录中进行（数据目录相对于当前目录），不受已有数据影响。
+
+用法:
+    pyinstaller DesktopStickyNotes.spec        # 单文件 + UPX
+    pyinstaller DesktopStickyNotes-fast.spec   # 目录模式，启动优化
+    python tools/startup_bench.py --runs 10 [--drop-caches]
+
+--drop-caches 在每次运行前清空页缓存，测量冷启动（需要 root 权限）。
+"""
+import os
+import sys
+import time
+import shutil
+import argparse
+import tempfile
+import subprocess
+import statistics
+
+# 项目目录
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+
+PROFILES = [
+    ("源码", [sys.executable, os.path.join(parent_dir, "main.py")]),
+    ("单文件", [os.path.join(parent_dir, "dist", "DesktopStickyNotes")]),
+    ("目录模式", [os.path.join(parent_dir, "dist", "DesktopStickyNotes-fast",
+                           "DesktopStickyNotes-fast")]),
+]
+
+
+def parse_args(argv=None):
+    """解析命令行参数"""
+    parser = argparse.ArgumentParser(description="桌面便签启动时间测试")
+    parser.add_argument("--runs", type=int, default=10, help="每种打包方式的运行次数")
+    parser.add_argument("--timeout", type=float, default=60.0, help="单次运行的超时时间(秒)")
+    parser.add_argument("--drop-caches", action="store_true", help="每次运行前清空页缓存（冷启动）")
+    parser.add_argument("--offscreen", action="store_true", help="使用 offscreen 平台（无显示环境）")
+    return parser.parse_args(argv)
+
+
+def drop_caches():
+    """清空页缓存"""
+    subprocess.run(["sync"], check=True)
+    with open("/proc/sys/vm/drop_caches", "w") as f:
+        f.write("3\n")
+
+
+def measure(command, args) -> float:
+    """运行一次，返回启动到窗口显示的时间（秒）"""
+    env = dict(os.environ, STICKYNOTES_STARTUP_PROBE="1")
+    if args.offscreen:
+        env["QT_QPA_PLATFORM"] = "offscreen"
+    work_dir = tempfile.mkdtemp(prefix="stickynotes-startup-")
+    try:
+        start = time.monotonic()
+        result = subprocess.run(command, cwd=work_dir, env=env, capture_output=True,
+                                text=True, timeout=args.timeout)
+        for line in result.stdout.splitlines():
+            if line.startswith("STARTUP_SHOWN "):
+                return float(line.split()[1]) - start
+        raise RuntimeError(f"没有输出启动时间（退出码 {result.returncode}）:\n{result.stderr[-2000:]}")
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+def main():
+    args = parse_args()
+    if not sys.platform.startswith("linux"):
+        print("启动时间测试只支持 Linux", file=sys.stderr)
+        return 1
+
+    print(f"{'打包方式':<8} {'最小':>8} {'中位数':>8} {'平均':>8}   (毫秒, {args.runs} 次)")
+    for name, command in PROFILES:
+        if not os.path.exists(command[-1]):
+            print(f"{name:<8} 未找到 {os.path.relpath(command[-1], parent_dir)}，跳过")
+            continue
+        times = []
+        for _ in range(args.runs):
+            if args.drop_caches:
+                drop_caches()
+            times.append(measure(command, args) * 1000)
+        print(f"{name:<8} {min(times):>8.0f} {statistics.median(times):>8.0f} "
+              f"{statistics.mean(times):>8.0f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,254 @@
+"""笔记管理器并发压力测试
+
+线程池中的多个线程同时随机查询和修改同一个笔记管理器，主线程（相当于
+界面线程）持续查询并记录每次查询的耗时。可以用 --slow-save 模拟很慢的
+磁盘，检查查询不会等待保存。
+
+结束后检查查询结果与笔记列表一致、文件内容与内存一致；另外检查恢复备份时
+排队中的后台保存不会覆盖恢复的数据。有异常、不一致或主线程查询耗时超过
+预算时以非零状态退出。
+
+用法:
+    python tools/stress.py --threads 8 --seconds 10 --slow-save 200
+"""
+import os
+import sys
+import time
+import random
+import argparse
+import tempfile
+import statistics
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+# 添加项目目录到Python路径
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+sys.path.insert(0, parent_dir)
+
+# 使用临时数据目录，必须在导入笔记管理器之前设置
+from config import config
+config.DATA_DIR = tempfile.mkdtemp(prefix="stickynotes-stress-")
+
+import note_manager as note_manager_module
+from clock import get_clock
+from note_manager import NoteManager, RepeatType
+from backup import BackupManager
+
+WORDS = ["会议", "报告", "买菜", "健身", "读书", "电话", "review", "Deploy"]
+
+
+def parse_args(argv=None):
+    """解析命令行参数"""
+    parser = argparse.ArgumentParser(description="笔记管理器并发压力测试")
+    parser.add_argument("--threads", type=int, default=8, help="线程池中的线程数")
+    parser.add_argument("--seconds", type=float, default=5.0, help="运行时间(秒)")
+    parser.add_argument("--notes", type=int, default=300, help="初始笔记数量")
+    parser.add_argument("--write-ratio", type=float, default=0.2, help="线程池中修改操作的比例")
+    parser.add_argument("--slow-save", type=float, default=0.0,
+                        help="每次写文件额外等待的时间(毫秒)，模拟慢速磁盘")
+    parser.add_argument("--max-read-ms", type=float, default=50.0,
+                        help="主线程查询耗时 p99 的预算(毫秒)")
+    parser.add_argument("--seed", type=int, default=1, help="随机种子")
+    return parser.parse_args(argv)
+
+
+def slow_writes(delay: float):
+    """让笔记管理器写文件时额外等待（模拟慢速磁盘），返回原来的写文件函数"""
+    write_atomic = note_manager_module.write_atomic
+
+    def slow_write_atomic(path, text):
+        time.sleep(delay)
+        write_atomic(path, text)
+
+    note_manager_module.write_atomic = slow_write_atomic
+    return write_atomic
+
+
+def random_due(rng):
+    return get_clock().now() + timedelta(minutes=rng.randrange(1, 60 * 24 * 30))
+
+
+def random_query(manager, rng):
+    """随机组合条件查询"""
+    start = random_due(rng) if rng.random() < 0.5 else None
+    end = start + timedelta(days=rng.randrange(1, 10)) if start and rng.random() < 0.5 else None
+    return manager.query(
+        start=start,
+        end=end,
+        repeat=rng.choice([None, None, RepeatType.DAILY, RepeatType.NONE]),
+        completed=rng.choice([None, False, False, True]),
+        text=rng.choice([None, None, None] + WORDS),
+        limit=rng.choice([None, 20]),
+    )
+
+
+def read_op(manager, rng):
+    """随机读取，返回操作名"""
+    choice = rng.random()
+    if choice < 0.6:
+        random_query(manager, rng)
+        return "query"
+    if choice < 0.75:
+        manager.snapshot()
+        return "snapshot"
+    if choice < 0.9:
+        manager.changes_since(max(0, manager.revision - rng.randrange(50)))
+        return "changes_since"
+    manager.get_note(rng.randrange(1, manager.revision + 2))
+    return "get_note"
+
+
+def write_op(manager, rng, max_id):
+    """随机修改，返回操作名"""
+    choice = rng.random()
+    note_id = rng.randrange(1, max_id + 1)
+    if choice < 0.4:
+        manager.add_note(f"{rng.choice(WORDS)} {rng.randrange(10000)}", random_due(rng),
+                         rng.choice(list(RepeatType)))
+        return "add_note"
+    if choice < 0.7:
+        if rng.random() < 0.5:
+            manager.update_note(note_id, content=f"{rng.choice(WORDS)} 已修改")
+        else:
+            manager.update_note(note_id, due_date=random_due(rng))
+        return "update_note"
+    if choice < 0.9:
+        manager.mark_completed(note_id)
+        return "mark_completed"
+    manager.delete_note(note_id)
+    return "delete_note"
+
+
+def worker(manager, seed, deadline, args):
+    """线程池中的线程：随机读写直到截止时间"""
+    rng = random.Random(seed)
+    counts = Counter()
+    while time.monotonic() < deadline:
+        if rng.random() < args.write_ratio:
+            counts[write_op(manager, rng, manager.revision + args.notes)] += 1
+        else:
+            counts[read_op(manager, rng)] += 1
+    return counts
+
+
+def check_consistency(manager):
+    """检查查询结果、索引与笔记列表一致，返回发现的问题"""
+    problems = []
+    _, notes = manager.snapshot()
+    ids = [note.id for note in notes]
+    if len(ids) != len(set(ids)):
+        problems.append("笔记ID重复")
+    ordered = sorted(notes, key=lambda note: (note.due_date, note.id))
+    if manager.query() != ordered:
+        problems.append("全部笔记的查询结果与笔记列表不一致")
+    if manager.query(completed=False) != [note for note in ordered if not note.is_completed]:
+        problems.append("未完成笔记的查询结果不一致")
+    if manager.open_count() != sum(not note.is_completed for note in notes):
+        problems.append("未完成笔记数量不一致")
+    if any(manager.get_note(note.id) is not note for note in notes):
+        problems.append("按ID查找的结果不一致")
+
+    # 文件应与内存中的最终状态相同
+    reloaded = NoteManager()
+    if [note.to_dict() for note in reloaded.notes] != [note.to_dict() for note in notes]:
+        problems.append("保存的文件与内存中的笔记不一致")
+    return problems
+
+
+def check_restore():
+    """保存还在后台进行时恢复备份：文件和内存都应是恢复的数据，返回发现的问题"""
+    problems = []
+    manager = NoteManager()
+    backups = BackupManager(manager)
+    with manager.batch():
+        for note in manager.query():
+            manager.delete_note(note.id)
+        manager.add_note("恢复的笔记", get_clock().now() + timedelta(hours=1), RepeatType.NONE)
+    backups.backup_if_due(force=True)
+    backups.wait()
+    name = backups.list_generations()[-1]
+
+    write_atomic = slow_writes(0.2)
+    try:
+        with manager.batch(background_save=True):
+            manager.add_note("恢复时撤销的笔记", get_clock().now() + timedelta(hours=2),
+                             RepeatType.NONE)
+        backups.restore(name)
+        manager.wait_saved()
+    finally:
+        note_manager_module.write_atomic = write_atomic
+
+    expected = ["恢复的笔记"]
+    if [note.content for note in manager.query()] != expected:
+        problems.append("恢复后内存中的笔记与备份不一致")
+    if [note.content for note in NoteManager().query()] != expected:
+        problems.append("恢复后排队的保存覆盖了恢复的文件")
+    return problems
+
+
+def main():
+    args = parse_args()
+    rng = random.Random(args.seed)
+    # 更频繁地切换线程，更容易暴露竞争
+    sys.setswitchinterval(1e-5)
+    if args.slow_save > 0:
+        slow_writes(args.slow_save / 1000)
+
+    manager = NoteManager()
+    with manager.batch():
+        for index in range(args.notes):
+            manager.add_note(f"{rng.choice(WORDS)} {index}", random_due(rng),
+                             rng.choice(list(RepeatType)))
+
+    counts = Counter()
+    latencies = []
+    errors = []
+    deadline = time.monotonic() + args.seconds
+    with ThreadPoolExecutor(max_workers=args.threads) as pool:
+        futures = [pool.submit(worker, manager, args.seed + index + 1, deadline, args)
+                   for index in range(args.threads)]
+
+        # 主线程相当于界面线程：持续查询并记录耗时
+        while time.monotonic() < deadline:
+            began = time.perf_counter()
+            if rng.random() < 0.5:
+                manager.get_open_notes()
+            else:
+                random_query(manager, rng)
+            latencies.append((time.perf_counter() - began) * 1000)
+
+        for future in futures:
+            try:
+                counts.update(future.result())
+            except Exception as e:
+                errors.append(f"{type(e).__name__}: {e}")
+
+    problems = check_consistency(manager)
+    manager.wait_saved()
+    problems += check_restore()
+
+    latencies.sort()
+    p99 = latencies[int(len(latencies) * 0.99)] if latencies else 0.0
+    total = sum(counts.values())
+    print(f"{args.threads} 个线程运行 {args.seconds:.0f} 秒，共 {total} 次操作 "
+          f"({total / args.seconds:.0f} 次/秒)，最终 {len(manager.notes)} 条笔记，"
+          f"版本 {manager.revision}")
+    for name, count in sorted(counts.items()):
+        print(f"  {name:<15} {count}")
+    if latencies:
+        print(f"主线程查询 {len(latencies)} 次: p50 {statistics.median(latencies):.2f} ms, "
+              f"p99 {p99:.2f} ms, 最大 {latencies[-1]:.2f} ms (预算 p99 {args.max_read_ms} ms)")
+
+    failures = errors + problems
+    if p99 > args.max_read_ms:
+        failures.append("主线程查询耗时超过预算")
+    for failure in failures:
+        print(f"失败: {failure}")
+    print("通过" if not failures else "未通过")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
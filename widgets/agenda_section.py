@@ -0,0 +1,112 @@
+from PyQt5.QtWidgets import QWidget, QVBoxLayout, QPushButton
+from PyQt5.QtCore import pyqtSignal
+from bisect import bisect_left
+import sys
+import os
+
+# 添加父目录到路径以便导入其他模块
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+sys.path.insert(0, parent_dir)
+
+from config import config
+from agenda import AgendaBucket
+
+class AgendaSection(QWidget):
+    """日程分组（可折叠的分组标题 + 笔记列表）"""
+
+    toggled = pyqtSignal(object, bool)  # 分组, 是否折叠
+
+    def __init__(self, bucket: AgendaBucket, collapsed: bool = False, parent=None):
+        super().__init__(parent)
+        self.bucket = bucket
+        self.collapsed = collapsed
+        self.count = 0
+        self.note_widgets = []  # 已创建的笔记组件，按 (到期时间, ID) 排序
+        self.setup_ui()
+        self.apply_styles()
+        self.update_header()
+
+    def setup_ui(self):
+        """设置界面"""
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(0, 0, 0, 0)
+        layout.setSpacing(4)
+
+        self.header_btn = QPushButton()
+        self.header_btn.setObjectName("SectionHeader")
+        self.header_btn.clicked.connect(self.toggle_collapsed)
+
+        # 笔记容器，折叠时不创建其中的笔记组件
+        self.body = QWidget()
+        self.body_layout = QVBoxLayout(self.body)
+        self.body_layout.setContentsMargins(0, 0, 0, 0)
+        self.body_layout.setSpacing(6)
+
+        self.body.setVisible(not self.collapsed)
+
+        layout.addWidget(self.header_btn)
+        layout.addWidget(self.body)
+
+    def apply_styles(self):
+        """应用样式"""
+        style_sheet = f"""
+            QPushButton#SectionHeader {{
+                background: transparent;
+                border: none;
+                text-align: left;
+                padding: 2px 0px;
+                font-family: {config.FONT_FAMILY};
+                font-size: 11px;
+                font-weight: bold;
+                color: #888888;
+            }}
+        """
+        self.setStyleSheet(style_sheet)
+
+    def update_header(self):
+        """更新分组标题"""
+        arrow = "▸" if self.collapsed else "▾"
+        self.header_btn.setText(f"{arrow} {self.bucket.value} ({self.count})")
+        # 空分组不显示
+        self.setVisible(self.count > 0)
+
+    def set_count(self, count: int):
+        """设置分组内笔记数量"""
+        if count != self.count:
+            self.count = count
+            self.update_header()
+
+    def set_collapsed(self, collapsed: bool):
+        """设置折叠状态（不发射信号）"""
+        self.collapsed = collapsed
+        self.body.setVisible(not collapsed)
+        self.update_header()
+
+    def toggle_collapsed(self):
+        """切换折叠状态"""
+        self.set_collapsed(not self.collapsed)
+        self.toggled.emit(self.bucket, self.collapsed)
+
+    def insert_note_widget(self, widget: QWidget):
+        """按到期时间顺序插入笔记组件
+
+        分组内的组件可能是分批创建的，因此按已创建组件的顺序定位，而不是
+        按笔记在日程中的位置。
+        """
+        key = (widget.note.due_date, widget.note.id)
+        if not self.note_widgets or key > self._key_of(self.note_widgets[-1]):
+            index = len(self.note_widgets)
+        else:
+            index = bisect_left([self._key_of(w) for w in self.note_widgets], key)
+        self.note_widgets.insert(index, widget)
+        self.body_layout.insertWidget(index, widget)
+
+    def take_note_widget(self, widget: QWidget):
+        """从分组中移除笔记组件"""
+        self.note_widgets.remove(widget)
+        self.body_layout.removeWidget(widget)
+
+    @staticmethod
+    def _key_of(widget: QWidget):
+        return (widget.note.due_date, widget.note.id)
@@ -0,0 +1,346 @@
+from PyQt5.QtWidgets import (QApplication, QSystemTrayIcon, QMenu, QAction, QMessageBox,
+                             QFileDialog, QTextEdit)
+from PyQt5.QtCore import Qt, QObject, QTimer, QEvent, pyqtSignal
+from collections import deque
+from typing import List
+import logging
+import sys
+import os
+
+# 添加父目录到路径以便导入其他模块
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+sys.path.insert(0, parent_dir)
+
+from config import config
+from note_manager import note_manager
+from scheduler import reminder_scheduler
+from backup import backup_manager
+from housekeeping import housekeeper
+from jobs import import_notes, shutdown_pool
+from recorder import recorder
+from profiler import profiler
+from boards import Board
+from widgets.main_window import MainWindow
+from widgets.note_widget import NoteWidget
+from widgets.quick_capture import QuickCapture
+
+log = logging.getLogger(__name__)
+
+# 表示用户正在使用的输入事件（空闲整理据此暂停）
+INPUT_EVENTS = frozenset({
+    QEvent.MouseButtonPress, QEvent.MouseButtonRelease, QEvent.MouseButtonDblClick,
+    QEvent.MouseMove, QEvent.Wheel, QEvent.KeyPress, QEvent.KeyRelease,
+    QEvent.InputMethod, QEvent.TouchBegin, QEvent.TouchUpdate,
+})
+
+class BoardManager(QObject):
+    """管理所有便签板窗口
+
+    所有便签板共享同一个笔记存储、一个提醒检查定时器、一个托盘图标和一个
+    通知队列：同时到期的多条提醒依次显示，不会互相覆盖，也不会因为多个
+    窗口而重复提醒。
+    """
+
+    # 在界面线程中执行的函数（其他线程修改存储时，变化通知经此交给界面线程）
+    dispatch = pyqtSignal(object)
+
+    def __init__(self, boards: List[Board], parent=None):
+        super().__init__(parent)
+        self.dispatch.connect(self.run_dispatched, Qt.QueuedConnection)
+        note_manager.set_dispatcher(self.dispatch.emit)
+        self.windows = [MainWindow(board) for board in boards]
+        self.notifications = deque()
+        self.import_job = None  # 进行中的导入
+        # 快速添加弹窗启动时创建好并隐藏，打开时不需要再构建界面
+        self.quick_capture = QuickCapture([window.board for window in self.windows])
+        self.quick_capture.prewarm()
+        self.setup_tray()
+        self.setup_timer()
+
+    def run_dispatched(self, callback):
+        callback()
+
+    def setup_tray(self):
+        """设置系统托盘"""
+        self.tray_icon = None
+        if not QSystemTrayIcon.isSystemTrayAvailable():
+            # 无显示环境（例如 offscreen 下的性能测试）不弹出模态对话框
+            if QApplication.platformName() != "offscreen":
+                QMessageBox.critical(None, "系统托盘", "系统不支持托盘功能")
+            return
+
+        self.tray_icon = QSystemTrayIcon(self)
+        # 这里可以设置托盘图标
+        # self.tray_icon.setIcon(QIcon("assets/icons/app.png"))
+
+        self.tray_menu = QMenu()
+
+        capture_action = QAction("快速添加...", self)
+        capture_action.triggered.connect(self.quick_capture.open)
+        self.tray_menu.addAction(capture_action)
+
+        show_action = QAction("显示/隐藏", self)
+        show_action.triggered.connect(self.toggle_visibility)
+        self.tray_menu.addAction(show_action)
+
+        # 多个便签板时，每个便签板单独显示/隐藏
+        if len(self.windows) > 1:
+            self.tray_menu.addSeparator()
+            for window in self.windows:
+                board_action = QAction(window.board.name, self)
+                board_action.triggered.connect(window.toggle_visibility)
+                self.tray_menu.addAction(board_action)
+            self.tray_menu.addSeparator()
+
+        # 导入（进行中时变为取消）
+        self.import_action = QAction("导入便签...", self)
+        self.import_action.triggered.connect(self.toggle_import)
+        self.tray_menu.addAction(self.import_action)
+
+        # 恢复备份（打开菜单时再列出备份）
+        self.restore_menu = self.tray_menu.addMenu("恢复备份")
+        self.restore_menu.aboutToShow.connect(self.update_restore_menu)
+
+        # 性能分析（结果写入 data/profiles/）
+        self.profile_menu = self.tray_menu.addMenu("性能分析")
+        self.profile_menu.aboutToShow.connect(self.update_profile_menu)
+
+        quit_action = QAction("退出", self)
+        quit_action.triggered.connect(self.quit_application)
+        self.tray_menu.addAction(quit_action)
+
+        self.tray_icon.setContextMenu(self.tray_menu)
+        self.tray_icon.activated.connect(self.tray_icon_activated)
+        self.tray_icon.show()
+
+    def setup_timer(self):
+        """设置共享的提醒检查定时器和通知队列"""
+        reminder_scheduler.reminder.connect(self.queue_notification)
+
+        self.check_timer = QTimer(self)
+        self.check_timer.timeout.connect(self.check_reminders)
+        self.check_timer.start(config.CHECK_INTERVAL)
+
+        # 上一条通知显示完之后再显示下一条
+        self.notification_timer = QTimer(self)
+        self.notification_timer.setSingleShot(True)
+        self.notification_timer.timeout.connect(self.show_next_notification)
+
+        # 定期备份（是否到了备份间隔由备份管理器判断，写入在后台线程）
+        self.backup_timer = QTimer(self)
+        self.backup_timer.timeout.connect(backup_manager.backup_if_due)
+        self.backup_timer.start(60 * 1000)
+
+        # 空闲时分片整理：有输入时暂停，每个时间片之间返回事件循环处理输入
+        QApplication.instance().installEventFilter(self)
+        housekeeper.finished.connect(self.on_housekeeping_finished)
+        self.housekeeping_timer = QTimer(self)
+        self.housekeeping_timer.timeout.connect(self.run_housekeeping)
+        self.housekeeping_timer.start(config.HOUSEKEEPING_CHECK_INTERVAL)
+
+    def eventFilter(self, obj, event):
+        """记录用户输入（所有窗口的事件都会经过这里，只做最少的工作）"""
+        if event.type() in INPUT_EVENTS:
+            housekeeper.note_activity()
+        if recorder.active:
+            self.record_event(obj, event)
+        return False
+
+    def record_event(self, obj, event):
+        """操作记录：编辑框按键、鼠标进入便签、列表滚动"""
+        kind = event.type()
+        if kind == QEvent.KeyPress and isinstance(obj, QTextEdit):
+            if isinstance(obj.parentWidget(), NoteWidget):
+                recorder.record_ui("key", obj.parentWidget().note.id)
+        elif kind == QEvent.Enter and isinstance(obj, NoteWidget):
+            recorder.record_ui("hover", obj.note.id)
+        elif kind == QEvent.Wheel and any(obj is window.scroll_area.viewport()
+                                          for window in self.windows):
+            recorder.record_ui("scroll", value=event.angleDelta().y())
+
+    def run_housekeeping(self):
+        """执行一个整理时间片，进行中时缩短间隔"""
+        busy = housekeeper.run_slice(config.HOUSEKEEPING_SLICE / 1000)
+        self.housekeeping_timer.setInterval(
+            config.HOUSEKEEPING_TICK if busy else config.HOUSEKEEPING_CHECK_INTERVAL
+        )
+
+    def on_housekeeping_finished(self, reports):
+        """报告一轮整理的结果"""
+        for report in reports:
+            log.info("空闲整理 - %s: %s (%d 步, %.0f ms)", report.name, report.summary,
+                     report.steps, report.seconds * 1000,
+                     extra={'job': report.name, 'steps': report.steps,
+                            'ms': round(report.seconds * 1000, 1)})
+
+    def show(self):
+        """显示所有便签板，多个时并排摆放"""
+        for index, window in enumerate(self.windows):
+            if index > 0:
+                previous = self.windows[index - 1]
+                window.move(previous.x() + previous.width() + 10, previous.y())
+            window.show()
+
+    def bring_to_front(self):
+        """显示并激活所有便签板"""
+        for window in self.windows:
+            window.bring_to_front()
+
+    def toggle_visibility(self):
+        """切换所有便签板的显示/隐藏"""
+        if any(window.isVisible() for window in self.windows):
+            for window in self.windows:
+                window.hide()
+        else:
+            self.bring_to_front()
+
+    def tray_icon_activated(self, reason):
+        """托盘图标激活事件"""
+        if reason == QSystemTrayIcon.DoubleClick:
+            self.toggle_visibility()
+
+    def check_reminders(self):
+        """检查提醒（到期检测由共享的提醒调度器完成）"""
+        reminder_scheduler.check()
+
+    def queue_notification(self, note):
+        """将提醒加入通知队列"""
+        self.notifications.append(note)
+        if not self.notification_timer.isActive():
+            self.show_next_notification()
+
+    def show_next_notification(self):
+        """显示通知队列中的下一条提醒"""
+        if not self.notifications:
+            return
+        note = self.notifications.popleft()
+        if self.tray_icon is not None:
+            self.tray_icon.showMessage(
+                "便签提醒",
+                note.content,
+                QSystemTrayIcon.Information,
+                config.NOTIFICATION_DURATION
+            )
+        self.notification_timer.start(config.NOTIFICATION_DURATION)
+
+    def update_restore_menu(self):
+        """列出最近的备份"""
+        self.restore_menu.clear()
+        generations = backup_manager.list_generations()[-config.RESTORE_MENU_SIZE:]
+        if not generations:
+            self.restore_menu.addAction("没有备份").setEnabled(False)
+        for name in reversed(generations):
+            action = self.restore_menu.addAction(name)
+            action.triggered.connect(lambda checked=False, name=name: self.restore_backup(name))
+
+    def restore_backup(self, name):
+        """确认后恢复到指定的备份"""
+        answer = QMessageBox.question(
+            None, "恢复备份",
+            f"恢复到备份 {name}？\n\n当前数据会先备份，可以再恢复回来。"
+        )
+        if answer != QMessageBox.Yes:
+            return
+        for window in self.windows:
+            window.commit_edits()
+        count = backup_manager.restore(name)
+        if self.tray_icon is not None:
+            self.tray_icon.showMessage("恢复备份", f"已恢复 {count} 条便签",
+                                       QSystemTrayIcon.Information, config.NOTIFICATION_DURATION)
+
+    def update_profile_menu(self):
+        """根据是否正在分析列出开始或停止"""
+        self.profile_menu.clear()
+        if profiler.active:
+            self.profile_menu.addAction(f"停止并保存（{profiler.mode}）", self.stop_profiling)
+        else:
+            self.profile_menu.addAction("开始采样分析（开销小）",
+                                        lambda: self.start_profiling("sample"))
+            self.profile_menu.addAction("开始完整分析（cProfile）",
+                                        lambda: self.start_profiling("cprofile"))
+
+    def start_profiling(self, mode):
+        """开始性能分析"""
+        try:
+            profiler.start(mode)
+        except (ValueError, RuntimeError) as e:
+            self.show_tray_message("性能分析", f"无法开始: {e}")
+            return
+        self.show_tray_message("性能分析", "已开始，重现卡顿后从托盘菜单停止")
+
+    def stop_profiling(self):
+        """停止性能分析并提示结果位置"""
+        path = profiler.stop()
+        if path:
+            self.show_tray_message("性能分析", f"结果已保存到 {os.path.dirname(os.path.abspath(path))}")
+
+    def toggle_import(self):
+        """选择文件开始导入；导入进行中时取消"""
+        if self.import_job is not None:
+            self.import_job.cancel()
+            return
+        path, _ = QFileDialog.getOpenFileName(
+            None, "导入便签", "", "便签数据 (*.jsonl *.txt);;所有文件 (*)"
+        )
+        if not path:
+            return
+        try:
+            job = import_notes(path, note_manager, self)
+        except OSError as e:
+            self.show_tray_message("导入便签", f"无法读取文件: {e}")
+            return
+        job.progress.connect(self.on_import_progress)
+        job.finished.connect(self.on_import_finished)
+        job.failed.connect(lambda error: self.end_import(f"导入失败: {error}"))
+        job.cancelled.connect(lambda: self.end_import("已取消导入"))
+        self.import_job = job
+        self.import_action.setText("取消导入")
+        job.start()
+
+    def on_import_progress(self, done, total):
+        """在托盘菜单中显示导入进度"""
+        self.import_action.setText(f"取消导入 ({done * 100 // total}%)")
+
+    def on_import_finished(self, result):
+        """导入完成"""
+        message = f"已导入 {result.added} 条便签"
+        if result.errors:
+            line, error = result.errors[0]
+            message += f"，{len(result.errors)} 行有错误（第 {line} 行: {error}）"
+        self.end_import(message)
+
+    def end_import(self, message):
+        """导入结束（完成、失败或取消）"""
+        self.import_job.deleteLater()
+        self.import_job = None
+        self.import_action.setText("导入便签...")
+        log.info("导入便签: %s", message)
+        self.show_tray_message("导入便签", message)
+
+    def show_tray_message(self, title, message):
+        """在托盘显示消息"""
+        if self.tray_icon is not None:
+            self.tray_icon.showMessage(title, message, QSystemTrayIcon.Information,
+                                       config.NOTIFICATION_DURATION)
+        else:
+            log.info("%s: %s", title, message)
+
+    def quit_application(self):
+        """退出应用"""
+        # 保存尚未写入的编辑内容，并等待后台保存（快速添加）完成
+        with note_manager.batch():
+            for window in self.windows:
+                window.commit_edits()
+        note_manager.wait_saved()
+        # 退出前备份最后的修改
+        backup_manager.backup_if_due(force=True)
+        backup_manager.wait()
+        # 删除编辑过程中留下的、已不再引用的长内容
+        backup_manager.collect_blobs()
+        # 通过环境变量开始、没有手动停止的分析在退出时保存
+        profiler.stop()
+        shutdown_pool()
+        if self.tray_icon is not None:
+            self.tray_icon.hide()
+        QApplication.quit()
@@ -0,0 +1,296 @@
+from PyQt5.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QGridLayout, QPushButton,
+                             QLabel, QFrame, QSizePolicy)
+from PyQt5.QtCore import Qt, QDate, QTimer
+from PyQt5.QtGui import QFont
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+import html
+import sys
+import os
+
+# 添加父目录到路径以便导入其他模块
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+sys.path.insert(0, parent_dir)
+
+from config import config
+from clock import get_clock
+from boards import Board
+from occurrences import occurrence_cache
+from widgets.time_picker import weekday_text, SHORT_WEEKDAY_NAMES
+
+MONTH_VIEW = "month"
+WEEK_VIEW = "week"
+TOOLTIP_ITEMS = 20  # 悬停提示中最多列出的事项数
+
+
+def to_qdate(day: date) -> QDate:
+    return QDate(day.year, day.month, day.day)
+
+
+class DayCell(QFrame):
+    """日历中的一天"""
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setObjectName("DayCell")
+        self.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Expanding)
+
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(4, 2, 4, 2)
+        layout.setSpacing(1)
+
+        self.day_label = QLabel()
+        self.day_label.setFont(QFont(config.FONT_FAMILY, 9, QFont.Bold))
+
+        self.items_label = QLabel()
+        self.items_label.setFont(QFont(config.FONT_FAMILY, 8))
+        self.items_label.setTextFormat(Qt.RichText)
+        self.items_label.setAlignment(Qt.AlignLeft | Qt.AlignTop)
+        self.items_label.setSizePolicy(QSizePolicy.Ignored, QSizePolicy.Ignored)
+
+        layout.addWidget(self.day_label)
+        layout.addWidget(self.items_label, 1)
+
+    def set_day(self, day: date, today: QDate, in_range: bool, occurrences, max_items: int):
+        """显示一天的事项（今天/明天与时间选择器使用相同的标识）"""
+        label = weekday_text(to_qdate(day), today, short=True)
+        self.day_label.setText(f"{day.day} {label}" if label in ("今天", "明天") else str(day.day))
+        self.setProperty("today", to_qdate(day) == today)
+        self.setProperty("outside", not in_range)
+        self.style().unpolish(self)
+        self.style().polish(self)
+
+        # 重复便签多时一天可能有上百项，只格式化会显示出来的部分
+        lines = [self.format_occurrence(occurrence)
+                 for occurrence in occurrences[:max(max_items, TOOLTIP_ITEMS)]]
+        shown = lines[:max_items]
+        if len(occurrences) > max_items:
+            shown.append(f"还有 {len(occurrences) - max_items} 项…")
+        self.items_label.setText("<br>".join(shown))
+        tooltip = lines[:TOOLTIP_ITEMS]
+        if len(occurrences) > TOOLTIP_ITEMS:
+            tooltip.append(f"还有 {len(occurrences) - TOOLTIP_ITEMS} 项…")
+        self.setToolTip("<br>".join(tooltip))
+
+    @staticmethod
+    def format_occurrence(occurrence) -> str:
+        """一次发生的显示文本（只使用预览，不读取长内容的全文）"""
+        first_line = occurrence.note.preview.strip().split("\n", 1)[0][:40]
+        text = f"{occurrence.when:%H:%M} {html.escape(first_line)}"
+        if occurrence.completed:
+            text = f"<s style='color:#999999'>{text}</s>"
+        return text
+
+
+class CalendarView(QWidget):
+    """月/周日历视图
+
+    显示便签板中每条笔记（包括重复笔记的每一次）在可见月份或一周内的
+    发生时间。展开结果由 occurrence_cache 按窗口缓存，翻页到看过的月份时
+    不需要重新计算；打开某个月后在空闲时预先展开前后两页。
+    """
+
+    ROWS = 6
+
+    def __init__(self, board: Board = None, parent=None):
+        super().__init__(parent)
+        self.board = board or Board(config.WINDOW_TITLE)
+        self.mode = MONTH_VIEW
+        self.anchor = get_clock().today()  # 当前显示的月份/周中的某一天
+
+        # 存储变化可能连续到来，合并为一次刷新
+        self.refresh_timer = QTimer(self)
+        self.refresh_timer.setSingleShot(True)
+        self.refresh_timer.setInterval(0)
+        self.refresh_timer.timeout.connect(self.refresh)
+
+        self.setup_ui()
+        self.apply_styles()
+        occurrence_cache.changed.connect(self.schedule_refresh)
+        get_clock().day_changed.connect(self.on_day_changed)
+
+    def setup_ui(self):
+        """设置界面"""
+        self.setWindowTitle(f"{self.board.name} - 日历")
+        self.resize(*config.CALENDAR_SIZE)
+
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(8, 8, 8, 8)
+        layout.setSpacing(6)
+
+        # 导航栏
+        nav_layout = QHBoxLayout()
+        self.prev_btn = QPushButton("‹")
+        self.prev_btn.setFixedWidth(32)
+        self.prev_btn.clicked.connect(lambda: self.page(-1))
+        self.next_btn = QPushButton("›")
+        self.next_btn.setFixedWidth(32)
+        self.next_btn.clicked.connect(lambda: self.page(1))
+        self.title_label = QLabel()
+        self.title_label.setFont(QFont(config.FONT_FAMILY, 11, QFont.Bold))
+        self.today_btn = QPushButton("今天")
+        self.today_btn.clicked.connect(self.go_today)
+        self.mode_btn = QPushButton()
+        self.mode_btn.clicked.connect(self.toggle_mode)
+
+        nav_layout.addWidget(self.prev_btn)
+        nav_layout.addWidget(self.title_label)
+        nav_layout.addWidget(self.next_btn)
+        nav_layout.addStretch()
+        nav_layout.addWidget(self.today_btn)
+        nav_layout.addWidget(self.mode_btn)
+        layout.addLayout(nav_layout)
+
+        # 星期标题 + 日期格
+        grid = QGridLayout()
+        grid.setSpacing(2)
+        self.weekday_labels = []
+        for column in range(7):
+            label = QLabel()
+            label.setAlignment(Qt.AlignCenter)
+            label.setFont(QFont(config.FONT_FAMILY, 9))
+            grid.addWidget(label, 0, column)
+            self.weekday_labels.append(label)
+        self.cells = []
+        for row in range(self.ROWS):
+            for column in range(7):
+                cell = DayCell()
+                grid.addWidget(cell, row + 1, column)
+                self.cells.append(cell)
+        for row in range(self.ROWS):
+            grid.setRowStretch(row + 1, 1)
+        layout.addLayout(grid, 1)
+
+    def apply_styles(self):
+        """应用样式"""
+        self.setStyleSheet(f"""
+            CalendarView {{
+                background: rgb(255, 253, 231);
+            }}
+            QLabel {{
+                font-family: {config.FONT_FAMILY};
+                color: #444444;
+            }}
+            QPushButton {{
+                font-family: {config.FONT_FAMILY};
+                font-size: 12px;
+            }}
+            #DayCell {{
+                background: rgba(255, 255, 255, 200);
+                border: 1px solid #E0E0E0;
+                border-radius: 3px;
+            }}
+            #DayCell[outside="true"] {{
+                background: rgba(255, 255, 255, 90);
+            }}
+            #DayCell[today="true"] {{
+                border: 1px solid #4A90E2;
+            }}
+        """)
+
+    def visible_range(self):
+        """当前页显示的日期范围 [first_day, last_day)，以及所属月份/周的范围"""
+        if self.mode == WEEK_VIEW:
+            first_day = self.anchor - timedelta(days=self.anchor.weekday())
+            return first_day, first_day + timedelta(days=7), first_day, first_day + timedelta(days=7)
+        month_start = self.anchor.replace(day=1)
+        month_end = (month_start + timedelta(days=32)).replace(day=1)
+        first_day = month_start - timedelta(days=month_start.weekday())
+        return first_day, first_day + timedelta(days=7 * self.ROWS), month_start, month_end
+
+    @staticmethod
+    def window_of(first_day: date, last_day: date):
+        return (datetime.combine(first_day, datetime.min.time()),
+                datetime.combine(last_day, datetime.min.time()))
+
+    def refresh(self):
+        """按当前页重新填充日期格"""
+        self.refresh_timer.stop()
+        first_day, last_day, range_start, range_end = self.visible_range()
+        now = get_clock().now()
+        today = to_qdate(now.date())
+
+        by_day = defaultdict(list)
+        matches = {}  # 笔记ID -> 是否属于本便签板（每条笔记只判断一次）
+        for occurrence in occurrence_cache.occurrences(*self.window_of(first_day, last_day)):
+            note = occurrence.note
+            matched = matches.get(note.id)
+            if matched is None:
+                matched = matches[note.id] = self.board.matches(note, now)
+            if matched:
+                by_day[occurrence.when.date()].append(occurrence)
+
+        if self.mode == WEEK_VIEW:
+            self.title_label.setText(f"{first_day:%Y-%m-%d} 至 {last_day - timedelta(days=1):%m-%d}")
+            self.mode_btn.setText("月视图")
+            for column, label in enumerate(self.weekday_labels):
+                day = first_day + timedelta(days=column)
+                label.setText(f"{weekday_text(to_qdate(day), today, short=True)} {day:%m-%d}")
+            max_items = config.CALENDAR_CELL_ITEMS * self.ROWS
+        else:
+            self.title_label.setText(f"{range_start.year}年{range_start.month}月")
+            self.mode_btn.setText("周视图")
+            for column, label in enumerate(self.weekday_labels):
+                label.setText(SHORT_WEEKDAY_NAMES[column + 1])
+            max_items = config.CALENDAR_CELL_ITEMS
+
+        days = (last_day - first_day).days
+        for index, cell in enumerate(self.cells):
+            cell.setVisible(index < days)
+            if index < days:
+                day = first_day + timedelta(days=index)
+                cell.set_day(day, today, range_start <= day < range_end, by_day.get(day, []),
+                             max_items)
+
+        # 空闲时预先展开前后两页，翻页时直接使用缓存
+        QTimer.singleShot(0, self.prefetch)
+
+    def prefetch(self):
+        """预先展开前后两页（系列很多时在进程池中展开）"""
+        for step in (1, -1):
+            first_day, last_day, _, _ = self.visible_range_at(self.shifted_anchor(step))
+            occurrence_cache.prefetch(*self.window_of(first_day, last_day))
+
+    def visible_range_at(self, anchor: date):
+        current, self.anchor = self.anchor, anchor
+        try:
+            return self.visible_range()
+        finally:
+            self.anchor = current
+
+    def shifted_anchor(self, step: int) -> date:
+        """前后翻页后的锚定日期"""
+        if self.mode == WEEK_VIEW:
+            return self.anchor + timedelta(weeks=step)
+        month = self.anchor.month - 1 + step
+        return date(self.anchor.year + month // 12, month % 12 + 1, 1)
+
+    def page(self, step: int):
+        """向前/向后翻页"""
+        self.anchor = self.shifted_anchor(step)
+        self.refresh()
+
+    def go_today(self):
+        """回到今天所在的月份/周"""
+        self.anchor = get_clock().today()
+        self.refresh()
+
+    def toggle_mode(self):
+        """切换月视图/周视图"""
+        self.mode = WEEK_VIEW if self.mode == MONTH_VIEW else MONTH_VIEW
+        self.refresh()
+
+    def schedule_refresh(self):
+        """存储变化后刷新（不可见时等显示时再刷新）"""
+        if self.isVisible():
+            self.refresh_timer.start()
+
+    def on_day_changed(self, today):
+        """日期变化时更新今天/明天标识"""
+        self.schedule_refresh()
+
+    def showEvent(self, event):
+        """显示时刷新"""
+        super().showEvent(event)
+        self.refresh()
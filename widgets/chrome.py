@@ -0,0 +1,112 @@
+from PyQt5.QtWidgets import QWidget
+from PyQt5.QtCore import Qt, QRect, QRectF
+from PyQt5.QtGui import QPainter, QPainterPath, QPixmap, QImage, QColor, QPen
+import re
+import sys
+import os
+
+# 添加父目录到路径以便导入其他模块
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+sys.path.insert(0, parent_dir)
+
+from config import config
+
+_RGBA_PATTERN = re.compile(r"rgba?\(\s*(\d+)\s*,\s*(\d+)\s*,\s*(\d+)\s*(?:,\s*([\d.]+)\s*)?\)")
+
+
+def parse_color(value: str) -> QColor:
+    """解析样式表中的颜色（支持 rgba(...)，Qt5 的 QColor 不能直接解析）"""
+    match = _RGBA_PATTERN.fullmatch(value.strip())
+    if not match:
+        return QColor(value)
+    red, green, blue, alpha = match.groups()
+    color = QColor(int(red), int(green), int(blue))
+    if alpha is not None:
+        # 与样式表一致：带小数点的按 0~1 解释，否则按 0~255 解释
+        if "." in alpha:
+            color.setAlphaF(float(alpha))
+        else:
+            color.setAlpha(int(alpha))
+    return color
+
+
+def resolve_asset(path: str) -> str:
+    """将相对路径解析为相对于程序目录的路径"""
+    if not path or os.path.isabs(path):
+        return path
+    return os.path.join(parent_dir, path)
+
+
+class ChromeWidget(QWidget):
+    """绘制窗口外观（圆角背景、可选背景图、边框）的中央部件
+
+    外观只随窗口大小和设备像素比变化，因此绘制一次缓存为位图，之后每次
+    重绘（拖动、滚动、悬停时透明窗口都要重新合成）只需复制对应区域，
+    不再逐次做抗锯齿圆角和样式表背景绘制。背景图在生成缓存时按物理像素
+    缩放一次，原图不常驻内存。
+    """
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._pixmap = None
+        self._pixmap_key = None
+
+    def invalidate(self):
+        """丢弃缓存，下次绘制时重新生成"""
+        self._pixmap = None
+        self._pixmap_key = None
+        self.update()
+
+    def chrome_pixmap(self) -> QPixmap:
+        """获取当前大小和设备像素比下的外观缓存"""
+        ratio = self.devicePixelRatioF()
+        key = (self.width(), self.height(), ratio)
+        if self._pixmap_key != key:
+            self._pixmap = self.render_chrome(ratio)
+            self._pixmap_key = key
+        return self._pixmap
+
+    def render_chrome(self, ratio: float) -> QPixmap:
+        """绘制外观位图"""
+        pixmap = QPixmap(round(self.width() * ratio), round(self.height() * ratio))
+        pixmap.setDevicePixelRatio(ratio)
+        pixmap.fill(Qt.transparent)
+
+        painter = QPainter(pixmap)
+        painter.setRenderHint(QPainter.Antialiasing)
+        rect = QRectF(self.rect()).adjusted(0.5, 0.5, -0.5, -0.5)
+        path = QPainterPath()
+        path.addRoundedRect(rect, config.BORDER_RADIUS, config.BORDER_RADIUS)
+        painter.fillPath(path, parse_color(config.BACKGROUND_COLOR))
+
+        image_path = resolve_asset(config.BACKGROUND_IMAGE)
+        if image_path and os.path.exists(image_path):
+            image = QImage(image_path)
+            if not image.isNull():
+                # 按物理像素预先缩放（铺满并居中裁剪）
+                image = image.scaled(pixmap.size(), Qt.KeepAspectRatioByExpanding,
+                                     Qt.SmoothTransformation)
+                source = QRect((image.width() - pixmap.width()) // 2,
+                               (image.height() - pixmap.height()) // 2,
+                               pixmap.width(), pixmap.height())
+                painter.setClipPath(path)
+                painter.setOpacity(config.BACKGROUND_IMAGE_OPACITY)
+                painter.drawImage(QRectF(self.rect()), image, QRectF(source))
+                painter.setOpacity(1.0)
+                painter.setClipping(False)
+
+        painter.setPen(QPen(QColor(config.BORDER_COLOR), 1))
+        painter.drawPath(path)
+        painter.end()
+        return pixmap
+
+    def paintEvent(self, event):
+        """只复制需要重绘的区域"""
+        pixmap = self.chrome_pixmap()
+        ratio = pixmap.devicePixelRatio()
+        target = event.rect()
+        source = QRectF(target.x() * ratio, target.y() * ratio,
+                        target.width() * ratio, target.height() * ratio)
+        painter = QPainter(self)
+        painter.drawPixmap(QRectF(target), pixmap, source)
@@ -1,8 +1,7 @@
 import sys
 import os
-from PyQt5.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout, 
-                             QHBoxLayout, QPushButton, QScrollArea, QLabel,
-                             QSystemTrayIcon, QMenu, QAction, QMessageBox)
+from PyQt5.QtWidgets import (QMainWindow, QWidget, QVBoxLayout, 
+                             QHBoxLayout, QPushButton, QScrollArea, QLabel)
 from PyQt5.QtCore import Qt, QTimer, pyqtSignal
 from PyQt5.QtGui import QIcon, QFont, QPalette, QColor
 
@@ -11,32 +10,47 @@ current_dir = os.path.dirname(os.path.abspath(__file__))
 parent_dir = os.path.dirname(current_dir)
 sys.path.insert(0, parent_dir)
 
+from collections import deque
+from datetime import timedelta
+
 from config import config
+from clock import get_clock
 from note_manager import note_manager, RepeatType
+from boards import Board, board_router
+from agenda import Agenda, AgendaBucket, BUCKET_ORDER, BUCKET_SHORT_LABELS
 from widgets.note_widget import NoteWidget
+from widgets.agenda_section import AgendaSection
+from widgets.chrome import ChromeWidget
 
 class MainWindow(QMainWindow):
-    """主窗口"""
+    """主窗口（一个便签板）
+
+    每个窗口显示一个便签板筛选出的笔记。存储、提醒调度和托盘通知由所有
+    便签板共享（见 BoardManager），存储变化经 board_router 只转发给受影响
+    的便签板。
+    """
     
-    def __init__(self):
+    def __init__(self, board: Board = None):
         super().__init__()
+        self.board = board or Board(config.WINDOW_TITLE)
         self.is_minimized = False
+        self.calendar_view = None  # 日历视图，第一次打开时创建
         self.setup_ui()
-        self.setup_tray()
         self.setup_timer()
         self.apply_styles()
+        board_router.register(self)
         
     def setup_ui(self):
         """设置界面"""
-        self.setWindowTitle(config.WINDOW_TITLE)
+        self.setWindowTitle(self.board.name)
         self.setFixedSize(*config.WINDOW_SIZE)
         
         # 设置窗口属性
         self.setWindowFlags(Qt.WindowStaysOnTopHint | Qt.FramelessWindowHint | Qt.Tool)
         self.setAttribute(Qt.WA_TranslucentBackground)
         
-        # 中央部件
-        central_widget = QWidget()
+        # 中央部件（圆角背景缓存为位图绘制）
+        central_widget = ChromeWidget()
         central_widget.setObjectName("CentralWidget")
         self.setCentralWidget(central_widget)
         
@@ -72,9 +86,47 @@ class MainWindow(QMainWindow):
         self.notes_layout.setContentsMargins(0, 0, 0, 0)
         self.notes_layout.setSpacing(6)
         
+        # 日程分组：已过期 / 今天 / 明天 / 本周 / 以后
+        self.agenda = Agenda()
+        self.agenda_loaded = False
+        self.note_widgets = {}  # 笔记ID -> NoteWidget
+        self.widget_sections = {}  # 笔记ID -> 所在的 AgendaSection
+        self.sections = {}
+        for bucket in BUCKET_ORDER:
+            section = AgendaSection(bucket)
+            section.toggled.connect(self.on_section_toggled)
+            self.sections[bucket] = section
+            self.notes_layout.addWidget(section)
+        self.notes_layout.addStretch()
+        
+        # 分组边界定时器（笔记到期、午夜、新的一周时重新归类）
+        self.agenda_timer = QTimer(self)
+        self.agenda_timer.setSingleShot(True)
+        self.agenda_timer.timeout.connect(self.on_agenda_boundary)
+        
+        # 拖动帧定时器：把拖动中的窗口移动合并到每帧一次
+        self.drag_target = None
+        self.drag_timer = QTimer(self)
+        self.drag_timer.setTimerType(Qt.PreciseTimer)
+        self.drag_timer.timeout.connect(self.apply_drag)
+        
+        # 分批创建笔记组件：首屏同步创建，其余在事件间隙用零延时定时器逐批创建
+        self.pending_notes = deque()
+        self.build_timer = QTimer(self)
+        self.build_timer.setSingleShot(True)
+        self.build_timer.setInterval(0)
+        self.build_timer.timeout.connect(self.build_pending_batch)
+        
         self.scroll_area.setWidget(self.notes_container)
         content_layout.addWidget(self.scroll_area)
         
+        # 加载提示
+        self.loading_label = QLabel()
+        self.loading_label.setObjectName("LoadingLabel")
+        self.loading_label.setFont(QFont(config.FONT_FAMILY, 8))
+        self.loading_label.hide()
+        content_layout.addWidget(self.loading_label)
+        
         layout.addWidget(self.content_area)
         
         # 加载现有笔记
@@ -90,10 +142,19 @@ class MainWindow(QMainWindow):
         layout.setContentsMargins(5, 0, 5, 0)
         
         # 标题
-        title_label = QLabel(config.WINDOW_TITLE)
+        title_label = QLabel(self.board.name)
         title_label.setFont(QFont(config.FONT_FAMILY, 10, QFont.Bold))
         
+        # 分组计数
+        self.counts_label = QLabel()
+        self.counts_label.setFont(QFont(config.FONT_FAMILY, 8))
+        
         # 按钮
+        calendar_btn = QPushButton("📅")
+        calendar_btn.setFixedSize(20, 20)
+        calendar_btn.setToolTip("日历视图")
+        calendar_btn.clicked.connect(self.show_calendar)
+        
         self.minimize_btn = QPushButton("_")
         self.minimize_btn.setFixedSize(20, 20)
         self.minimize_btn.clicked.connect(self.toggle_minimize)
@@ -103,51 +164,37 @@ class MainWindow(QMainWindow):
         close_btn.clicked.connect(self.hide_to_tray)
         
         layout.addWidget(title_label)
+        layout.addWidget(self.counts_label)
         layout.addStretch()
+        layout.addWidget(calendar_btn)
         layout.addWidget(self.minimize_btn)
         layout.addWidget(close_btn)
         
         return title_bar
     
-    def setup_tray(self):
-        """设置系统托盘"""
-        if not QSystemTrayIcon.isSystemTrayAvailable():
-            QMessageBox.critical(None, "系统托盘", "系统不支持托盘功能")
-            return
-        
-        self.tray_icon = QSystemTrayIcon(self)
-        # 这里可以设置托盘图标
-        # self.tray_icon.setIcon(QIcon("assets/icons/app.png"))
-        
-        tray_menu = QMenu()
-        
-        show_action = QAction("显示/隐藏", self)
-        show_action.triggered.connect(self.toggle_visibility)
-        
-        quit_action = QAction("退出", self)
-        quit_action.triggered.connect(self.quit_application)
-        
-        tray_menu.addAction(show_action)
-        tray_menu.addAction(quit_action)
-        
-        self.tray_icon.setContextMenu(tray_menu)
-        self.tray_icon.activated.connect(self.tray_icon_activated)
-        self.tray_icon.show()
-    
     def setup_timer(self):
-        """设置定时器检查提醒"""
-        self.check_timer = QTimer()
-        self.check_timer.timeout.connect(self.check_reminders)
-        self.check_timer.start(config.CHECK_INTERVAL)
+        """订阅时钟事件（提醒检查由所有便签板共享，见 BoardManager）"""
+        clock = get_clock()
+        clock.minute_changed.connect(self.on_minute_changed)
+        clock.day_changed.connect(self.on_day_changed)
+    
+    def on_minute_changed(self, now):
+        """每分钟刷新状态标签，并兜底检查分组边界（例如系统休眠后）"""
+        for note_widget in self.note_widgets.values():
+            note_widget.update_status_label()
+        if now >= self.agenda.next_boundary():
+            self.on_agenda_boundary()
+    
+    def on_day_changed(self, today):
+        """日期变化时重新归类分组，按天数筛选的便签板重新加载"""
+        if self.board.days is not None:
+            self.load_notes()
+        else:
+            self.on_agenda_boundary()
     
     def apply_styles(self):
         """应用样式"""
         style_sheet = f"""
-            #CentralWidget {{
-                background: {config.BACKGROUND_COLOR};
-                border-radius: {config.BORDER_RADIUS}px;
-                border: 1px solid #E0E0E0;
-            }}
             #TitleBar {{
                 background: transparent;
                 border-bottom: 1px solid #DDDDDD;
@@ -155,6 +202,9 @@ class MainWindow(QMainWindow):
             #ContentArea {{
                 background: transparent;
             }}
+            #LoadingLabel {{
+                color: #999999;
+            }}
             QPushButton {{
                 font-family: {config.FONT_FAMILY};
                 font-size: 12px;
@@ -192,45 +242,204 @@ class MainWindow(QMainWindow):
     
     def load_notes(self):
         """加载并显示笔记"""
-        # 清空现有笔记组件
-        for i in reversed(range(self.notes_layout.count())):
-            widget = self.notes_layout.itemAt(i).widget()
-            if widget:
-                widget.deleteLater()
-        
-        # 添加待处理笔记
-        pending_notes = note_manager.get_pending_notes()
-        for note in pending_notes:
-            note_widget = NoteWidget(note)
-            note_widget.deleted.connect(self.on_note_deleted)
-            note_widget.completed.connect(self.on_note_completed)
-            self.notes_layout.addWidget(note_widget)
+        # 取消仍在进行的分批创建，清空现有笔记组件
+        self.pending_notes.clear()
+        for note_id in list(self.note_widgets):
+            self.remove_note_widget(note_id)
+        
+        now = get_clock().now()
+        self.agenda.rebuild([note for note in note_manager.get_open_notes()
+                             if self.board.matches(note, now)], now)
+        
+        # 首次加载时，"以后"分组笔记过多则默认折叠
+        if not self.agenda_loaded:
+            later_count = self.agenda.count(AgendaBucket.LATER)
+            if later_count > config.LATER_COLLAPSE_THRESHOLD:
+                self.sections[AgendaBucket.LATER].set_collapsed(True)
+            self.agenda_loaded = True
+        
+        # 只为展开的分组创建笔记组件，首屏同步创建，其余分批创建
+        notes = [note for bucket in BUCKET_ORDER if not self.sections[bucket].collapsed
+                 for note in self.agenda.notes_in(bucket)]
+        for note in notes[:config.FIRST_PAINT_COUNT]:
+            self.show_note_widget(note)
+        self.queue_note_widgets(notes[config.FIRST_PAINT_COUNT:])
+        
+        self.update_agenda_counts()
+        self.schedule_agenda_boundary()
+    
+    def queue_note_widgets(self, notes):
+        """将笔记加入分批创建队列"""
+        self.pending_notes.extend(notes)
+        if self.pending_notes and not self.build_timer.isActive():
+            self.build_timer.start()
+        self.update_loading_label()
+    
+    def build_pending_batch(self):
+        """创建一批笔记组件，每批之间把控制权交还给事件循环"""
+        built = 0
+        while self.pending_notes and built < config.LOAD_BATCH_SIZE:
+            note = self.pending_notes.popleft()
+            # 排队期间笔记可能已被删除、完成、已创建或所在分组被折叠
+            if note.id not in self.agenda or note.id in self.note_widgets:
+                continue
+            if self.sections[self.agenda.bucket_of(note.id)].collapsed:
+                continue
+            self.show_note_widget(note)
+            built += 1
+        
+        if self.pending_notes:
+            self.build_timer.start()
+        self.update_loading_label()
+    
+    def update_loading_label(self):
+        """更新加载提示"""
+        if self.pending_notes:
+            self.loading_label.setText(f"正在加载便签… 还剩 {len(self.pending_notes)} 条")
+            self.loading_label.show()
+        else:
+            self.loading_label.hide()
+    
+    def create_note_widget(self, note, parent=None):
+        """创建笔记组件并连接信号"""
+        note_widget = NoteWidget(note, parent)
+        note_widget.deleted.connect(self.on_note_deleted)
+        note_widget.completed.connect(self.on_note_completed)
+        return note_widget
+    
+    def show_note_widget(self, note):
+        """将笔记组件放入所属分组（分组折叠时不创建）"""
+        section = self.sections[self.agenda.bucket_of(note.id)]
+        if section.collapsed:
+            self.remove_note_widget(note.id)
+            return
+        
+        note_widget = self.note_widgets.get(note.id)
+        if note_widget is None:
+            # 直接创建在分组容器中，避免插入时再次改变父组件引起重新应用样式
+            note_widget = self.create_note_widget(note, section.body)
+            self.note_widgets[note.id] = note_widget
+        else:
+            self.widget_sections[note.id].take_note_widget(note_widget)
+            note_widget.update_status_label()
+        section.insert_note_widget(note_widget)
+        self.widget_sections[note.id] = section
+    
+    def remove_note_widget(self, note_id):
+        """移除并销毁笔记组件"""
+        note_widget = self.note_widgets.pop(note_id, None)
+        if note_widget is not None:
+            note_widget.commit_content()
+            self.widget_sections.pop(note_id).take_note_widget(note_widget)
+            note_widget.deleteLater()
+    
+    def contains(self, note_id) -> bool:
+        """笔记是否在该便签板中"""
+        return note_id in self.agenda
+    
+    def reload(self):
+        """存储整体重新加载时重建列表"""
+        self.load_notes()
+    
+    def apply_changes(self, note_ids):
+        """应用存储中发生变化的笔记（只处理这些笔记，不重新扫描）"""
+        now = get_clock().now()
+        new_notes = []
+        for note_id in note_ids:
+            note = note_manager.get_note(note_id)
+            visible = (note is not None and not note.is_completed
+                       and self.board.matches(note, now))
+            if note_id in self.agenda:
+                if visible and self.agenda.due_date_of(note_id) == note.due_date:
+                    # 到期时间不变（例如只修改了内容），位置也不变，只刷新显示
+                    note_widget = self.note_widgets.get(note_id)
+                    if note_widget is not None:
+                        note_widget.sync_from_note()
+                    continue
+                self.agenda.remove(note_id)
+            if not visible:
+                self.remove_note_widget(note_id)
+                continue
+            
+            self.agenda.insert(note)
+            if note_id in self.note_widgets:
+                self.show_note_widget(note)
+            else:
+                new_notes.append(note)
+        
+        # 少量新笔记（例如点击添加）立即显示，大量的（例如命令行批量添加）分批创建
+        if len(new_notes) <= config.FIRST_PAINT_COUNT:
+            for note in new_notes:
+                self.show_note_widget(note)
+        else:
+            self.queue_note_widgets(new_notes)
+        
+        self.update_agenda_counts()
+        self.schedule_agenda_boundary()
+    
+    def update_agenda_counts(self):
+        """更新分组计数及标题栏计数"""
+        counts = self.agenda.counts()
+        for bucket, count in counts.items():
+            self.sections[bucket].set_count(count)
+        
+        self.counts_label.setText(" ".join(
+            f"{BUCKET_SHORT_LABELS[bucket]}{count}" for bucket, count in counts.items() if count
+        ))
+        self.counts_label.setToolTip("\n".join(
+            f"{bucket.value}: {count}" for bucket, count in counts.items()
+        ))
+    
+    def schedule_agenda_boundary(self):
+        """安排下一次分组边界事件"""
+        delay = (self.agenda.next_boundary() - get_clock().now()).total_seconds()
+        # 稍微延后，确保触发时已越过边界
+        self.agenda_timer.start(max(0, int(delay * 1000)) + 50)
+    
+    def on_agenda_boundary(self):
+        """到达分组边界时，只移动跨越边界的笔记"""
+        for note, old_bucket, new_bucket in self.agenda.advance(get_clock().now()):
+            self.show_note_widget(note)
+        
+        self.update_agenda_counts()
+        self.schedule_agenda_boundary()
+    
+    def on_section_toggled(self, bucket, collapsed):
+        """分组折叠/展开"""
+        if collapsed:
+            for note in self.agenda.notes_in(bucket):
+                self.remove_note_widget(note.id)
+        else:
+            self.queue_note_widgets(self.agenda.notes_in(bucket))
     
     def add_new_note(self):
         """添加新笔记"""
-        from datetime import datetime, timedelta
-        default_time = datetime.now().replace(second=0, microsecond=0) + timedelta(hours=1)
+        default_time = get_clock().now().replace(second=0, microsecond=0) + timedelta(hours=1)
         
-        new_note = note_manager.add_note(
+        # 新笔记归属于当前便签板，列表由存储的变化通知更新
+        note_manager.add_note(
             content="新提醒...",
             due_date=default_time,
-            repeat_type=RepeatType.NONE
+            repeat_type=RepeatType.NONE,
+            board=self.board.tag or ""
         )
-        
-        note_widget = NoteWidget(new_note)
-        note_widget.deleted.connect(self.on_note_deleted)
-        note_widget.completed.connect(self.on_note_completed)
-        self.notes_layout.addWidget(note_widget)
     
     def on_note_deleted(self, note_id):
         """处理笔记删除"""
         note_manager.delete_note(note_id)
-        self.load_notes()  # 重新加载
     
     def on_note_completed(self, note_id):
         """处理笔记完成"""
         note_manager.mark_completed(note_id)
-        self.load_notes()  # 重新加载
+    
+    def show_calendar(self):
+        """打开本便签板的日历视图"""
+        if self.calendar_view is None:
+            from widgets.calendar_view import CalendarView
+            self.calendar_view = CalendarView(self.board)
+        self.calendar_view.show()
+        self.calendar_view.raise_()
+        self.calendar_view.activateWindow()
     
     def toggle_minimize(self):
         """切换最小化模式"""
@@ -250,44 +459,62 @@ class MainWindow(QMainWindow):
         if self.isVisible():
             self.hide()
         else:
-            self.show()
-            self.raise_()
-            self.activateWindow()
+            self.bring_to_front()
+    
+    def bring_to_front(self):
+        """显示并激活窗口"""
+        self.show()
+        self.raise_()
+        self.activateWindow()
     
     def hide_to_tray(self):
         """隐藏到系统托盘"""
         self.hide()
     
-    def tray_icon_activated(self, reason):
-        """托盘图标激活事件"""
-        if reason == QSystemTrayIcon.DoubleClick:
-            self.toggle_visibility()
-    
-    def check_reminders(self):
-        """检查提醒"""
-        due_notes = note_manager.get_due_notes()
-        for note in due_notes:
-            # 这里可以实现提醒效果，比如闪烁、系统通知等
-            self.tray_icon.showMessage(
-                "便签提醒",
-                note.content,
-                QSystemTrayIcon.Information,
-                3000
-            )
-    
-    def quit_application(self):
-        """退出应用"""
-        self.tray_icon.hide()
-        QApplication.quit()
+    def commit_edits(self):
+        """保存尚未写入的编辑内容"""
+        for note_widget in self.note_widgets.values():
+            note_widget.commit_content()
     
     def mousePressEvent(self, event):
         """鼠标按下事件，实现拖动"""
         if event.button() == Qt.LeftButton:
             self.drag_position = event.globalPos() - self.frameGeometry().topLeft()
+            self.drag_timer.setInterval(self.frame_interval())
             event.accept()
     
     def mouseMoveEvent(self, event):
-        """鼠标移动事件，实现拖动"""
+        """鼠标移动事件，实现拖动
+
+        鼠标事件的频率可能远高于屏幕刷新率，每帧只移动一次窗口：第一次移动
+        立即生效，之后同一帧内的移动只记录目标位置，由帧定时器统一应用。
+        """
         if event.buttons() == Qt.LeftButton and hasattr(self, 'drag_position'):
-            self.move(event.globalPos() - self.drag_position)
-            event.accept()
\ No newline at end of file
+            self.drag_target = event.globalPos() - self.drag_position
+            if not self.drag_timer.isActive():
+                self.apply_drag()
+                self.drag_timer.start()
+            event.accept()
+    
+    def mouseReleaseEvent(self, event):
+        """鼠标释放事件，应用最后的拖动位置"""
+        if event.button() == Qt.LeftButton:
+            self.apply_drag()
+            self.drag_timer.stop()
+        super().mouseReleaseEvent(event)
+    
+    def apply_drag(self):
+        """将窗口移动到记录的拖动位置，没有新位置时停止帧定时器"""
+        if self.drag_target is None:
+            self.drag_timer.stop()
+            return
+        self.move(self.drag_target)
+        self.drag_target = None
+    
+    def frame_interval(self) -> int:
+        """当前屏幕一帧的时长（毫秒）"""
+        screen = self.windowHandle().screen() if self.windowHandle() else None
+        refresh_rate = screen.refreshRate() if screen else 0
+        if refresh_rate <= 1:
+            refresh_rate = config.DEFAULT_REFRESH_RATE
+        return max(1, round(1000 / refresh_rate))
\ No newline at end of file
@@ -1,7 +1,7 @@
 from PyQt5.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QTextEdit, 
-                             QPushButton, QComboBox, QDateTimeEdit, QLabel, 
+                             QPushButton, QComboBox, QLabel, 
                              QFrame, QSizePolicy)
-from PyQt5.QtCore import Qt, QDateTime, pyqtSignal
+from PyQt5.QtCore import Qt, QDateTime, QTimer, QEvent, pyqtSignal
 from PyQt5.QtGui import QFont, QPalette, QColor
 from datetime import datetime, timedelta
 import sys
@@ -12,9 +12,10 @@ current_dir = os.path.dirname(os.path.abspath(__file__))
 parent_dir = os.path.dirname(current_dir)
 sys.path.insert(0, parent_dir)
 
-from note_manager import Note, RepeatType
+from note_manager import Note, RepeatType, note_manager
 from config import config
-from widgets.time_picker import CompactTimePicker
+from clock import get_clock
+from widgets.time_picker import get_time_picker_popup, format_due_text, to_datetime
 
 class NoteWidget(QFrame):
     """单个笔记组件"""
@@ -22,10 +23,18 @@ class NoteWidget(QFrame):
     deleted = pyqtSignal(int)  # 笔记ID
     completed = pyqtSignal(int)  # 笔记ID
     
-    def __init__(self, note: Note):
-        super().__init__()
+    def __init__(self, note: Note, parent=None):
+        super().__init__(parent)
         self.note = note
         self.is_editing = True  # 新建的笔记默认处于编辑模式
+        self.content_loaded = False  # 编辑框中是否为全文（长内容未编辑时只显示预览）
+        self._status_color = None
+        
+        # 内容编辑停顿后再写入存储，避免每次按键都保存
+        self.save_timer = QTimer(self)
+        self.save_timer.setSingleShot(True)
+        self.save_timer.setInterval(config.EDIT_SAVE_DELAY)
+        self.save_timer.timeout.connect(self.commit_content)
         
         self.setup_ui()
         self.apply_styles()
@@ -58,8 +67,9 @@ class NoteWidget(QFrame):
         # 内容编辑区
         self.content_edit = QTextEdit()
         self.content_edit.setPlaceholderText("记录你要做的事情...")
-        self.content_edit.setText(self.note.content)
+        self.show_content(full=False)
         self.content_edit.textChanged.connect(self.on_content_changed)
+        self.content_edit.installEventFilter(self)
         
         # 时间选择区
         time_layout = QHBoxLayout()
@@ -71,12 +81,14 @@ class NoteWidget(QFrame):
         datetime_label = QLabel("提醒时间:")
         datetime_label.setFont(QFont(config.FONT_FAMILY, 8))
         
-        self.time_picker = CompactTimePicker()
-        self.time_picker.set_datetime(self.note.due_date)
-        self.time_picker.timeChanged.connect(self.on_datetime_changed)
+        # 只显示格式化文本，点击时打开共享的时间选择弹窗
+        self.time_button = QPushButton()
+        self.time_button.setObjectName("TimeButton")
+        self.time_button.setCursor(Qt.PointingHandCursor)
+        self.time_button.clicked.connect(self.edit_datetime)
         
         datetime_layout.addWidget(datetime_label)
-        datetime_layout.addWidget(self.time_picker)
+        datetime_layout.addWidget(self.time_button)
         
         # 重复规则选择
         repeat_layout = QVBoxLayout()
@@ -125,6 +137,12 @@ class NoteWidget(QFrame):
                 border: 1px solid #CCCCCC;
                 border-radius: 8px;
             }}
+            NoteWidget[completed="true"] {{
+                background: rgba(240, 240, 240, 180);
+            }}
+            NoteWidget[hovered="true"] {{
+                border: 1px solid #4A90E2;
+            }}
             QTextEdit {{
                 background: rgba(255, 255, 255, 200);
                 border: 1px solid #DDDDDD;
@@ -147,7 +165,20 @@ class NoteWidget(QFrame):
             QPushButton:hover {{
                 background: rgba(0, 0, 0, 0.1);
             }}
-            QDateTimeEdit, QComboBox {{
+            QPushButton#TimeButton {{
+                background: rgba(255, 255, 255, 200);
+                border: 1px solid #DDDDDD;
+                border-radius: 3px;
+                padding: 2px 4px;
+                font-size: 10px;
+                font-weight: normal;
+                text-align: left;
+                min-height: 20px;
+            }}
+            QPushButton#TimeButton:hover {{
+                border: 1px solid #4A90E2;
+            }}
+            QComboBox {{
                 background: rgba(255, 255, 255, 200);
                 border: 1px solid #DDDDDD;
                 border-radius: 3px;
@@ -166,38 +197,75 @@ class NoteWidget(QFrame):
     
     def on_content_changed(self):
         """内容改变事件"""
-        self.note.content = self.content_edit.toPlainText()
+        self.save_timer.start()
         self.update_status_label()
     
+    def show_content(self, full: bool):
+        """显示笔记内容：长内容只在编辑时读取全文，其余时间显示预览"""
+        self.content_loaded = full or self.note.content_hash is None
+        if self.content_loaded:
+            text = self.note.content
+        else:
+            text = self.note.preview + "…"
+        if self.content_edit.toPlainText() != text:
+            self.content_edit.blockSignals(True)
+            self.content_edit.setPlainText(text)
+            self.content_edit.blockSignals(False)
+    
+    def eventFilter(self, obj, event):
+        """编辑框获得焦点时加载全文，失去焦点后保存并恢复为预览"""
+        if obj is self.content_edit:
+            if event.type() == QEvent.FocusIn and not self.content_loaded:
+                self.show_content(full=True)
+            elif (event.type() == QEvent.FocusOut and event.reason() != Qt.PopupFocusReason
+                    and self.note.content_hash is not None):
+                self.commit_content()
+                self.show_content(full=False)
+        return super().eventFilter(obj, event)
+    
+    def commit_content(self):
+        """将编辑中的内容写入存储"""
+        self.save_timer.stop()
+        if not self.content_loaded:
+            return  # 编辑框中只是预览
+        content = self.content_edit.toPlainText()
+        if content != self.note.content:
+            note_manager.update_note(self.note.id, content=content)
+    
+    def sync_from_note(self):
+        """笔记在别处（例如另一个便签板）被修改后刷新显示"""
+        # 正在编辑的内容以编辑框为准
+        if not self.save_timer.isActive() and not self.content_edit.hasFocus():
+            self.show_content(full=False)
+        index = self.repeat_combo.findData(self.note.repeat_type)
+        if index != self.repeat_combo.currentIndex():
+            self.repeat_combo.blockSignals(True)
+            self.repeat_combo.setCurrentIndex(index)
+            self.repeat_combo.blockSignals(False)
+        self.update_status_label()
+    
+    def edit_datetime(self):
+        """打开共享的时间选择弹窗编辑提醒时间"""
+        get_time_picker_popup().edit(self.note.due_date, self.time_button, self.on_datetime_changed)
+    
     def on_datetime_changed(self, new_datetime):
-        """日期时间改变事件"""
-        # 验证日期不能是过去
-        if new_datetime < QDateTime.currentDateTime():
-            # 重置为当前时间+5分钟
-            current = QDateTime.currentDateTime().addSecs(300)
-            self.time_picker.set_datetime(current)
-            return
-        
+        """日期时间改变事件（时间选择器已保证不是过去的时间）"""
         # 转换为Python datetime并更新
-        python_datetime = datetime(
-            new_datetime.date().year(),
-            new_datetime.date().month(), 
-            new_datetime.date().day(),
-            new_datetime.time().hour(),
-            new_datetime.time().minute()
-        )
-        self.note.due_date = python_datetime
+        note_manager.update_note(self.note.id, due_date=to_datetime(new_datetime))
         self.update_status_label()
     
     def on_repeat_changed(self, index):
         """重复规则改变事件"""
         repeat_type = self.repeat_combo.currentData()
-        self.note.repeat_type = repeat_type
+        if repeat_type != self.note.repeat_type:
+            note_manager.update_note(self.note.id, repeat_type=repeat_type)
         self.update_status_label()
     
     def toggle_complete(self):
         """切换完成状态"""
-        if self.note.content.strip():  # 只有有内容时才允许完成
+        self.commit_content()
+        # 只有有内容时才允许完成（长内容不需要读取全文）
+        if self.note.content_hash is not None or self.note.content.strip():
             self.completed.emit(self.note.id)
     
     def delete_note(self):
@@ -206,7 +274,9 @@ class NoteWidget(QFrame):
     
     def update_status_label(self):
         """更新状态标签"""
-        now = datetime.now()
+        self.time_button.setText(format_due_text(self.note.due_date))
+        
+        now = get_clock().now()
         time_diff = self.note.due_date - now
         
         if time_diff.total_seconds() <= 0:
@@ -232,7 +302,10 @@ class NoteWidget(QFrame):
             status += f" 🔄 {self.note.repeat_type.value}"
         
         self.status_label.setText(status)
-        self.status_label.setStyleSheet(f"color: {color};")
+        # 颜色不变时不重新设置样式表，避免重复解析
+        if color != self._status_color:
+            self._status_color = color
+            self.status_label.setStyleSheet(f"color: {color};")
     
     def update_display(self):
         """更新显示状态"""
@@ -240,16 +313,27 @@ class NoteWidget(QFrame):
         if self.note.is_completed:
             self.complete_btn.setText("✓")
             self.content_edit.setStyleSheet("text-decoration: line-through; color: #999999;")
-            self.setStyleSheet(self.styleSheet() + "background: rgba(240, 240, 240, 180);")
+            self.set_style_state("completed", True)
         else:
             self.complete_btn.setText("○")
             self.content_edit.setStyleSheet("text-decoration: none; color: #000000;")
     
+    def set_style_state(self, name, value):
+        """设置样式状态属性并重新应用样式
+
+        通过动态属性切换样式，而不是追加样式表（追加会让样式表越来越长，
+        每次都要重新解析整个组件树）。
+        """
+        if self.property(name) == value:
+            return
+        self.setProperty(name, value)
+        self.style().unpolish(self)
+        self.style().polish(self)
+    
     def enterEvent(self, event):
         """鼠标进入事件"""
-        self.setStyleSheet(self.styleSheet() + "border: 1px solid #4A90E2;")
+        self.set_style_state("hovered", True)
     
     def leaveEvent(self, event):
         """鼠标离开事件"""
-        if not self.note.is_completed:
-            self.setStyleSheet(self.styleSheet() + "border: 1px solid #CCCCCC;")
\ No newline at end of file
+        self.set_style_state("hovered", False)
\ No newline at end of file
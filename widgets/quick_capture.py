@@ -0,0 +1,177 @@
+from PyQt5.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QTextEdit, QComboBox,
+                             QPushButton, QLabel, QShortcut, QApplication)
+from PyQt5.QtCore import Qt, QRect
+from PyQt5.QtGui import QCursor, QFont, QKeySequence
+from datetime import timedelta
+from typing import List
+import sys
+import os
+
+# 添加父目录到路径以便导入其他模块
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+sys.path.insert(0, parent_dir)
+
+from config import config
+from clock import get_clock
+from note_manager import RepeatType, note_manager
+from boards import Board
+from widgets.time_picker import TimePicker, to_qdatetime
+
+class QuickCapture(QWidget):
+    """快速添加便签的弹窗
+
+    启动时创建一次并预先完成样式和布局（prewarm），之后一直隐藏；从托盘
+    打开时只重置输入内容再显示，不需要先打开主窗口。保存时文件在后台线程
+    中写入，弹窗立即关闭，新便签经存储的变化通知出现在对应的便签板中。
+    """
+
+    def __init__(self, boards: List[Board], parent=None):
+        super().__init__(parent, Qt.Tool | Qt.FramelessWindowHint | Qt.WindowStaysOnTopHint)
+        self.setAttribute(Qt.WA_StyledBackground, True)
+        self.boards = boards
+        self.setup_ui()
+        self.apply_styles()
+
+    def setup_ui(self):
+        """设置界面"""
+        self.setWindowTitle("快速添加")
+        self.setFixedWidth(config.QUICK_CAPTURE_WIDTH)
+
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(10, 10, 10, 10)
+        layout.setSpacing(6)
+
+        title = QLabel("快速添加便签")
+        title.setFont(QFont(config.FONT_FAMILY, 10, QFont.Bold))
+        layout.addWidget(title)
+
+        self.content_edit = QTextEdit()
+        self.content_edit.setAcceptRichText(False)
+        self.content_edit.setPlaceholderText("提醒内容（Ctrl+Enter 保存，Esc 取消）")
+        self.content_edit.setFixedHeight(80)
+        layout.addWidget(self.content_edit)
+
+        self.time_picker = TimePicker()
+        layout.addWidget(self.time_picker)
+
+        options_layout = QHBoxLayout()
+        repeat_label = QLabel("重复:")
+        self.repeat_combo = QComboBox()
+        for repeat_type in RepeatType:
+            self.repeat_combo.addItem(repeat_type.value, repeat_type)
+        options_layout.addWidget(repeat_label)
+        options_layout.addWidget(self.repeat_combo, 1)
+
+        # 有多个带标签的便签板时可以选择归属
+        self.board_combo = QComboBox()
+        self.board_combo.addItem("不指定便签板", "")
+        for board in self.boards:
+            if board.tag and self.board_combo.findData(board.tag) < 0:
+                self.board_combo.addItem(board.name, board.tag)
+        self.board_combo.setVisible(self.board_combo.count() > 1)
+        options_layout.addWidget(self.board_combo, 1)
+        layout.addLayout(options_layout)
+
+        self.error_label = QLabel()
+        self.error_label.setObjectName("error")
+        self.error_label.hide()
+        layout.addWidget(self.error_label)
+
+        buttons_layout = QHBoxLayout()
+        buttons_layout.addStretch()
+        cancel_btn = QPushButton("取消")
+        cancel_btn.clicked.connect(self.hide)
+        self.save_btn = QPushButton("保存")
+        self.save_btn.clicked.connect(self.commit)
+        buttons_layout.addWidget(cancel_btn)
+        buttons_layout.addWidget(self.save_btn)
+        layout.addLayout(buttons_layout)
+
+        for keys in ("Ctrl+Return", "Ctrl+Enter"):
+            QShortcut(QKeySequence(keys), self, self.commit)
+        QShortcut(QKeySequence(Qt.Key_Escape), self, self.hide)
+
+    def apply_styles(self):
+        """应用样式"""
+        self.setStyleSheet(f"""
+            QuickCapture {{
+                background: rgb(255, 253, 231);
+                border: 1px solid #CCCCCC;
+            }}
+            QLabel {{
+                font-family: {config.FONT_FAMILY};
+                color: #444444;
+            }}
+            QLabel#error {{
+                color: #D0021B;
+            }}
+            QTextEdit {{
+                background: rgba(255, 255, 255, 220);
+                border: 1px solid #DDDDDD;
+                border-radius: 4px;
+                font-family: {config.FONT_FAMILY};
+                font-size: 12px;
+            }}
+            QTextEdit:focus {{
+                border: 1px solid #4A90E2;
+            }}
+            QPushButton {{
+                font-family: {config.FONT_FAMILY};
+                font-size: 12px;
+                padding: 4px 12px;
+            }}
+        """)
+
+    def prewarm(self):
+        """预先应用样式、计算布局并创建原生窗口，第一次打开时不再做这些工作"""
+        for widget in [self] + self.findChildren(QWidget):
+            widget.ensurePolished()
+        self.adjustSize()
+        self.winId()
+
+    def reset(self):
+        """清空输入，提醒时间默认为一小时后"""
+        self.content_edit.clear()
+        self.error_label.hide()
+        self.repeat_combo.setCurrentIndex(0)
+        now = get_clock().now().replace(second=0, microsecond=0)
+        # 弹窗长期存在，每次打开时刷新"只能选择今天及以后"的限制
+        self.time_picker.date_edit.setMinimumDate(to_qdatetime(now).date())
+        self.time_picker.quick_combo.setCurrentIndex(0)
+        self.time_picker.set_datetime(now + timedelta(hours=1))
+
+    def open(self):
+        """在鼠标附近（保持在屏幕内）显示并聚焦到内容输入框"""
+        self.reset()
+        screen = QApplication.screenAt(QCursor.pos()) or QApplication.primaryScreen()
+        available = screen.availableGeometry()
+        area = QRect(QCursor.pos(), self.size())
+        area.moveRight(min(area.right(), available.right()))
+        area.moveBottom(min(area.bottom(), available.bottom()))
+        self.move(max(area.left(), available.left()), max(area.top(), available.top()))
+        self.show()
+        self.raise_()
+        self.activateWindow()
+        self.content_edit.setFocus()
+
+    def commit(self):
+        """保存新便签（不等待写文件）并关闭"""
+        content = self.content_edit.toPlainText().strip()
+        if not content:
+            self.show_error("内容不能为空")
+            return
+        try:
+            with note_manager.batch(background_save=True):
+                note_manager.add_note(content, self.time_picker.get_python_datetime(),
+                                      self.repeat_combo.currentData(),
+                                      self.board_combo.currentData())
+        except ValueError as e:
+            self.show_error(str(e))
+            return
+        self.hide()
+
+    def show_error(self, message):
+        self.error_label.setText(message)
+        self.error_label.show()
+        self.adjustSize()
@@ -1,6 +1,6 @@
 from PyQt5.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QComboBox, 
-                             QDateEdit, QTimeEdit, QLabel, QGridLayout)
-from PyQt5.QtCore import QDateTime, QDate, QTime, pyqtSignal
+                             QDateEdit, QTimeEdit, QLabel, QGridLayout, QFrame)
+from PyQt5.QtCore import Qt, QDateTime, QDate, QTime, QPoint, pyqtSignal
 from PyQt5.QtGui import QFont
 from datetime import datetime, timedelta
 import sys
@@ -12,6 +12,62 @@ parent_dir = os.path.dirname(current_dir)
 sys.path.insert(0, parent_dir)
 
 from config import config
+from clock import get_clock
+
+def to_qdatetime(datetime_obj: datetime) -> QDateTime:
+    """Python datetime 转换为 QDateTime（精确到分钟）"""
+    return QDateTime(
+        QDate(datetime_obj.year, datetime_obj.month, datetime_obj.day),
+        QTime(datetime_obj.hour, datetime_obj.minute)
+    )
+
+def to_datetime(qdt: QDateTime) -> datetime:
+    """QDateTime 转换为 Python datetime（精确到分钟）"""
+    return datetime(
+        qdt.date().year(),
+        qdt.date().month(),
+        qdt.date().day(),
+        qdt.time().hour(),
+        qdt.time().minute()
+    )
+
+WEEKDAY_NAMES = {
+    1: "星期一",
+    2: "星期二",
+    3: "星期三",
+    4: "星期四",
+    5: "星期五",
+    6: "星期六",
+    7: "星期日"
+}
+
+SHORT_WEEKDAY_NAMES = {
+    1: "周一",
+    2: "周二",
+    3: "周三",
+    4: "周四",
+    5: "周五",
+    6: "周六",
+    7: "周日"
+}
+
+def weekday_text(date: QDate, today: QDate, short: bool = False) -> str:
+    """星期显示文本，今天/明天（完整版还有后天）使用特殊标识"""
+    if date == today:
+        return "今天"
+    if date == today.addDays(1):
+        return "明天"
+    if short:
+        return SHORT_WEEKDAY_NAMES.get(date.dayOfWeek(), "")
+    if date == today.addDays(2):
+        return "后天"
+    return WEEKDAY_NAMES.get(date.dayOfWeek(), "")
+
+def format_due_text(due_date: datetime) -> str:
+    """便签卡片上显示的提醒时间文本，例如「03-05 09:00 明天」"""
+    today = to_qdatetime(get_clock().now()).date()
+    weekday = weekday_text(QDate(due_date.year, due_date.month, due_date.day), today, short=True)
+    return f"{due_date.strftime('%m-%d %H:%M')} {weekday}"
 
 class TimePicker(QWidget):
     """高级时间选择器"""
@@ -20,7 +76,7 @@ class TimePicker(QWidget):
     
     def __init__(self, parent=None):
         super().__init__(parent)
-        self.current_datetime = QDateTime.currentDateTime()
+        self.current_datetime = to_qdatetime(get_clock().now())
         self.setup_ui()
         self.apply_styles()
         self.connect_signals()
@@ -64,10 +120,11 @@ class TimePicker(QWidget):
         date_label = QLabel("日期:")
         date_label.setFont(QFont(config.FONT_FAMILY, 9))
         
+        now = to_qdatetime(get_clock().now())
         self.date_edit = QDateEdit()
         self.date_edit.setCalendarPopup(True)
-        self.date_edit.setDate(QDate.currentDate())
-        self.date_edit.setMinimumDate(QDate.currentDate())  # 只能选择今天及以后的日期
+        self.date_edit.setDate(now.date())
+        self.date_edit.setMinimumDate(now.date())  # 只能选择今天及以后的日期
         self.date_edit.setDisplayFormat("yyyy-MM-dd")
         
         # 时间选择
@@ -75,7 +132,7 @@ class TimePicker(QWidget):
         time_label.setFont(QFont(config.FONT_FAMILY, 9))
         
         self.time_edit = QTimeEdit()
-        self.time_edit.setTime(QTime.currentTime().addSecs(3600))  # 默认1小时后
+        self.time_edit.setTime(now.time().addSecs(3600))  # 默认1小时后
         self.time_edit.setDisplayFormat("HH:mm")
         
         # 星期显示
@@ -140,7 +197,8 @@ class TimePicker(QWidget):
         if index == 0:  # 自定义时间
             return
         
-        now = QDateTime.currentDateTime()
+        now = to_qdatetime(get_clock().now())
+        today = now.date()
         new_datetime = now
         
         if index == 1:  # 15分钟后
@@ -152,13 +210,13 @@ class TimePicker(QWidget):
         elif index == 4:  # 2小时后
             new_datetime = now.addSecs(7200)
         elif index == 5:  # 今天 12:00
-            new_datetime = QDateTime(QDate.currentDate(), QTime(12, 0))
+            new_datetime = QDateTime(today, QTime(12, 0))
         elif index == 6:  # 今天 18:00
-            new_datetime = QDateTime(QDate.currentDate(), QTime(18, 0))
+            new_datetime = QDateTime(today, QTime(18, 0))
         elif index == 7:  # 今天 21:00
-            new_datetime = QDateTime(QDate.currentDate(), QTime(21, 0))
+            new_datetime = QDateTime(today, QTime(21, 0))
         elif index == 8:  # 明天 09:00
-            new_datetime = QDateTime(QDate.currentDate().addDays(1), QTime(9, 0))
+            new_datetime = QDateTime(today.addDays(1), QTime(9, 0))
         elif index == 9:  # 明天此时
             new_datetime = now.addDays(1)
         
@@ -176,9 +234,10 @@ class TimePicker(QWidget):
         new_datetime = QDateTime(date, time)
         
         # 验证日期不能是过去
-        if new_datetime < QDateTime.currentDateTime():
+        now = to_qdatetime(get_clock().now())
+        if new_datetime < now:
             # 重置为当前时间+5分钟
-            current = QDateTime.currentDateTime().addSecs(300)
+            current = now.addSecs(300)
             self.date_edit.setDate(current.date())
             self.time_edit.setTime(current.time())
             return
@@ -192,31 +251,8 @@ class TimePicker(QWidget):
     
     def update_weekday_label(self):
         """更新星期显示"""
-        date = self.date_edit.date()
-        weekday = date.dayOfWeek()
-        
-        weekdays = {
-            1: "星期一",
-            2: "星期二", 
-            3: "星期三",
-            4: "星期四",
-            5: "星期五",
-            6: "星期六",
-            7: "星期日"
-        }
-        
-        weekday_text = weekdays.get(weekday, "")
-        
-        # 添加特殊日期标识
-        today = QDate.currentDate()
-        if date == today:
-            weekday_text = "今天"
-        elif date == today.addDays(1):
-            weekday_text = "明天"
-        elif date == today.addDays(2):
-            weekday_text = "后天"
-        
-        self.weekday_label.setText(weekday_text)
+        today = to_qdatetime(get_clock().now()).date()
+        self.weekday_label.setText(weekday_text(self.date_edit.date(), today))
     
     def get_datetime(self) -> QDateTime:
         """获取当前选择的日期时间"""
@@ -225,10 +261,7 @@ class TimePicker(QWidget):
     def set_datetime(self, datetime_obj):
         """设置日期时间"""
         if isinstance(datetime_obj, datetime):
-            qdatetime = QDateTime(
-                QDate(datetime_obj.year, datetime_obj.month, datetime_obj.day),
-                QTime(datetime_obj.hour, datetime_obj.minute)
-            )
+            qdatetime = to_qdatetime(datetime_obj)
         elif isinstance(datetime_obj, QDateTime):
             qdatetime = datetime_obj
         else:
@@ -241,139 +274,87 @@ class TimePicker(QWidget):
     
     def get_python_datetime(self) -> datetime:
         """获取Python datetime对象"""
-        qdt = self.get_datetime()
-        return datetime(
-            qdt.date().year(),
-            qdt.date().month(), 
-            qdt.date().day(),
-            qdt.time().hour(),
-            qdt.time().minute()
-        )
+        return to_datetime(self.get_datetime())
 
-class CompactTimePicker(QWidget):
-    """紧凑版时间选择器（用于笔记组件中）"""
-    
-    timeChanged = pyqtSignal(QDateTime)
+class TimePickerPopup(QFrame):
+    """共享的时间选择弹窗
+
+    所有便签共用一个弹窗（内含带快速选择的 TimePicker），编辑哪个便签就
+    临时附着到哪个便签上，便签卡片本身只显示格式化后的时间文本。
+    """
     
     def __init__(self, parent=None):
-        super().__init__(parent)
+        super().__init__(parent, Qt.Popup)
+        self._callback = None
+        self._owner = None
         self.setup_ui()
         self.apply_styles()
-        self.connect_signals()
     
     def setup_ui(self):
         """设置界面"""
-        layout = QHBoxLayout(self)
-        layout.setContentsMargins(0, 0, 0, 0)
-        layout.setSpacing(6)
-        
-        # 日期选择
-        self.date_edit = QDateEdit()
-        self.date_edit.setCalendarPopup(True)
-        self.date_edit.setDate(QDate.currentDate())
-        self.date_edit.setMinimumDate(QDate.currentDate())
-        self.date_edit.setDisplayFormat("MM-dd")
-        self.date_edit.setFixedWidth(70)
-        
-        # 时间选择
-        self.time_edit = QTimeEdit()
-        self.time_edit.setTime(QTime.currentTime().addSecs(3600))
-        self.time_edit.setDisplayFormat("HH:mm")
-        self.time_edit.setFixedWidth(60)
-        
-        # 星期显示
-        self.weekday_label = QLabel()
-        self.weekday_label.setFont(QFont(config.FONT_FAMILY, 9))
-        self.weekday_label.setFixedWidth(40)
-        self.update_weekday_label()
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(8, 8, 8, 8)
         
-        layout.addWidget(self.date_edit)
-        layout.addWidget(self.time_edit)
-        layout.addWidget(self.weekday_label)
-        layout.addStretch()
+        self.picker = TimePicker()
+        self.picker.timeChanged.connect(self.on_time_changed)
+        layout.addWidget(self.picker)
     
     def apply_styles(self):
         """应用样式"""
-        style_sheet = f"""
-            QDateEdit, QTimeEdit {{
-                background: rgba(255, 255, 255, 200);
-                border: 1px solid #DDDDDD;
-                border-radius: 3px;
-                padding: 2px 4px;
-                font-family: {config.FONT_FAMILY};
-                font-size: 10px;
-            }}
-            QLabel {{
-                background: transparent;
-                font-family: {config.FONT_FAMILY};
-                color: #666666;
-                font-size: 9px;
-            }}
-        """
-        self.setStyleSheet(style_sheet)
-    
-    def connect_signals(self):
-        """连接信号槽"""
-        self.date_edit.dateChanged.connect(self.on_datetime_changed)
-        self.time_edit.timeChanged.connect(self.on_datetime_changed)
-    
-    def on_datetime_changed(self):
-        """日期时间改变事件"""
-        date = self.date_edit.date()
-        time = self.time_edit.time()
-        new_datetime = QDateTime(date, time)
-        
-        # 验证日期不能是过去
-        if new_datetime < QDateTime.currentDateTime():
-            current = QDateTime.currentDateTime().addSecs(300)
-            self.date_edit.setDate(current.date())
-            self.time_edit.setTime(current.time())
-            return
-        
-        self.update_weekday_label()
-        self.timeChanged.emit(new_datetime)
+        self.setStyleSheet("""
+            TimePickerPopup {
+                background: white;
+                border: 1px solid #CCCCCC;
+                border-radius: 6px;
+            }
+        """)
     
-    def update_weekday_label(self):
-        """更新星期显示"""
-        date = self.date_edit.date()
-        weekday = date.dayOfWeek()
-        
-        weekdays = {
-            1: "周一",
-            2: "周二", 
-            3: "周三",
-            4: "周四",
-            5: "周五",
-            6: "周六",
-            7: "周日"
-        }
+    def edit(self, datetime_obj: datetime, anchor: QWidget, callback):
+        """附着到某个便签并显示在 anchor 下方
+
+        callback(QDateTime) 在用户修改时间时调用，弹窗关闭后自动解除附着。
+        """
+        self.detach()
         
-        weekday_text = weekdays.get(weekday, "")
+        # 弹窗长期存在，每次打开时刷新"只能选择今天及以后"的限制
+        today = to_qdatetime(get_clock().now()).date()
+        self.picker.date_edit.setMinimumDate(today)
+        self.picker.quick_combo.setCurrentIndex(0)
+        self.picker.set_datetime(datetime_obj)
         
-        today = QDate.currentDate()
-        if date == today:
-            weekday_text = "今天"
-        elif date == today.addDays(1):
-            weekday_text = "明天"
+        # 设置完初始值后再附着，避免初始化时回写便签
+        self._callback = callback
+        self._owner = anchor
+        anchor.destroyed.connect(self.detach)
         
-        self.weekday_label.setText(weekday_text)
+        self.move(anchor.mapToGlobal(QPoint(0, anchor.height())))
+        self.show()
     
-    def get_datetime(self) -> QDateTime:
-        """获取当前选择的日期时间"""
-        return QDateTime(self.date_edit.date(), self.time_edit.time())
+    def detach(self):
+        """解除与当前便签的附着"""
+        if self._owner is not None:
+            try:
+                self._owner.destroyed.disconnect(self.detach)
+            except (TypeError, RuntimeError):
+                pass
+        self._callback = None
+        self._owner = None
     
-    def set_datetime(self, datetime_obj):
-        """设置日期时间"""
-        if isinstance(datetime_obj, datetime):
-            qdatetime = QDateTime(
-                QDate(datetime_obj.year, datetime_obj.month, datetime_obj.day),
-                QTime(datetime_obj.hour, datetime_obj.minute)
-            )
-        elif isinstance(datetime_obj, QDateTime):
-            qdatetime = datetime_obj
-        else:
-            return
-        
-        self.date_edit.setDate(qdatetime.date())
-        self.time_edit.setTime(qdatetime.time())
-        self.update_weekday_label()
\ No newline at end of file
+    def on_time_changed(self, new_datetime):
+        """时间改变时回写到附着的便签"""
+        if self._callback is not None:
+            self._callback(new_datetime)
+    
+    def hideEvent(self, event):
+        """关闭弹窗时解除附着"""
+        self.detach()
+        super().hideEvent(event)
+
+_shared_popup = None
+
+def get_time_picker_popup() -> TimePickerPopup:
+    """获取所有便签共享的时间选择弹窗（首次使用时创建）"""
+    global _shared_popup
+    if _shared_popup is None:
+        _shared_popup = TimePickerPopup()
+    return _shared_popup
\ No newline at end of file